@@ -1,78 +1,57 @@
 # analysis/analyze_mlflow.py
-# MLflow의 'MAB_Online' 실험에서 run을 읽어 arm별 CTR/트래픽 비중/시간 추이를 집계합니다.
+# MLflow의 'MAB_Online' 실험에서 reward 이벤트를 읽어 arm별 CTR/트래픽 비중/시간 추이를 집계합니다.
+# 이벤트는 mlflow.db(SQLite 백엔드)를 analysis/export_mlflow.py 로 증분 내보낸 Parquet 파일에서 읽습니다.
+# (실행할 때마다 새로 쌓인 metric만 먼저 내보냄, MLflow 서버/패키지 불필요)
 
 import os
+import sys
 import math
 from datetime import datetime, timezone
 
-import mlflow
 import pandas as pd
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from export_mlflow import default_db, default_out, export, load_events  # noqa: E402
+
 # ===== 설정 =====
-MLFLOW_URI = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000")
+MLFLOW_DB = default_db()
 EXPERIMENT_NAME = os.getenv("MAB_EXPERIMENT", "MAB_Online")
+EXPORT_DIR = default_out(EXPERIMENT_NAME)
 
-print(f"[INFO] MLFLOW_TRACKING_URI = {MLFLOW_URI}")
-mlflow.set_tracking_uri(MLFLOW_URI)
-
-# ===== 실험 찾기 =====
-exp = mlflow.get_experiment_by_name(EXPERIMENT_NAME)
-if exp is None:
-    raise SystemExit(f"[ERROR] Experiment '{EXPERIMENT_NAME}' not found. MLflow UI에서 실험이 생성되었는지 확인하세요.")
-exp_id = exp.experiment_id
-print(f"[INFO] Experiment id = {exp_id}")
-
-# ===== run 조회 =====
-# NOTE: reward(메트릭), arm(파라미터) 기준
-df = mlflow.search_runs(
-    experiment_ids=[exp_id],
-    order_by=["start_time ASC"],    # 시간순
-    # filter_string="attributes.status = 'FINISHED'"  # 필요 시 필터
-)
-
-if df.empty:
-    raise SystemExit("[WARN] runs가 없습니다. Streamlit에서 선택 이벤트를 몇 번 발생시킨 뒤 다시 실행하세요.")
-
-# 필요한 컬럼만 추출(없어도 에러 안 나게 안전 처리)
-def safe(col):
-    return col if col in df.columns else None
-
-cols = {
-    "run_id": "run_id",
-    "arm": safe("params.arm"),
-    "reward": safe("metrics.reward"),
-    "start_time": "start_time",
-}
-use_cols = [c for c in cols.values() if c is not None]
-df = df[use_cols].copy()
+print(f"[INFO] MLflow DB = {MLFLOW_DB}")
+print(f"[INFO] export dir = {EXPORT_DIR}")
 
-# start_time → datetime
-df["ts"] = pd.to_datetime(df["start_time"], unit="ms", utc=True).dt.tz_convert(None)
-
-# NaN/이상치 정리
-if "reward" in df.columns:
-    df = df[df["metrics.reward"].notna()]
-    df["reward"] = df["metrics.reward"].astype(float)
+# ===== 증분 내보내기 =====
+if os.path.exists(MLFLOW_DB):
+    res = export(MLFLOW_DB, EXPORT_DIR, EXPERIMENT_NAME)
+    print(f"[INFO] exported {res['rows']} new metric rows ({res['secs']:.2f}s, watermark rowid={res['watermark']})")
 else:
-    raise SystemExit("[ERROR] run에 metrics.reward가 없습니다. /update가 정상 기록되는지 확인하세요.")
+    print(f"[WARN] {MLFLOW_DB} 가 없습니다. 이미 내보낸 파일만 읽습니다.")
 
-if "params.arm" not in df.columns:
-    raise SystemExit("[ERROR] run에 params.arm이 없습니다. /update에서 arm 파라미터가 기록되는지 확인하세요.")
+# ===== 이벤트 조회 =====
+# 이벤트 싱크는 arm별 run 하나에 reward를 step 히스토리로 쌓는다.
+# (예전 방식의 이벤트 1건 = run 1개도 길이 1짜리 히스토리로 똑같이 읽힌다)
+df = load_events(EXPORT_DIR)
+if df.empty:
+    raise SystemExit(f"[WARN] 실험 '{EXPERIMENT_NAME}'의 reward 이벤트가 없습니다. "
+                     "Streamlit에서 선택 이벤트를 몇 번 발생시킨 뒤 다시 실행하세요.")
 
-df.rename(columns={"params.arm": "arm"}, inplace=True)
+# ts_ms → datetime
+df["ts"] = pd.to_datetime(df["ts_ms"], unit="ms", utc=True).dt.tz_convert(None)
+df = df.sort_values("ts", kind="stable").reset_index(drop=True)
 
-print(f"[INFO] 총 run 수: {len(df)}")
+print(f"[INFO] 총 이벤트 수: {len(df)}")
 print(df.tail(5))
 
 # ===== 집계: arm별 전체 CTR & 트래픽 비중 =====
 summary = (
     df.groupby("arm")
-      .agg(n_runs=("run_id", "count"),
+      .agg(n_events=("reward", "count"),
            ctr=("reward", "mean"))
       .sort_values("ctr", ascending=False)
 )
-summary["traffic_share"] = summary["n_runs"] / summary["n_runs"].sum()
+summary["traffic_share"] = summary["n_events"] / summary["n_events"].sum()
 print("\n=== ARM SUMMARY ===")
 print(summary.to_string(float_format=lambda x: f"{x:.4f}"))
 
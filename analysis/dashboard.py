@@ -1,16 +1,31 @@
 # analysis/dashboard.py
-# MLflow 'MAB_Online' 실험을 읽어 arm별 CTR 요약/추이를 시각화하는 Streamlit 대시보드
+# arm별 CTR 요약/추이를 시각화하는 Streamlit 대시보드
+# - 집계(기본): API가 기록하는 분 단위 집계 SQLite(app.aggregates)를 워터마크 이후 변경분만 증분 조회
+# - MLflow   : 'MAB_Online' 실험의 reward 이벤트. mlflow.db를 analysis/export_mlflow.py 로 증분 내보낸
+#              Parquet 파일(날짜/arm 파티션)에서 읽는다(새로 쌓인 metric만 내보낸 뒤 스캔, MLflow 서버 불필요)
+# - 실시간   : API의 /metrics/stream(SSE)을 구독해 새 점만 차트에 덧붙임(add_rows), 재조회/재계산 없음
 
+import json
 import os
+import sys
 from datetime import timedelta
 
-import mlflow
+import altair as alt
 import pandas as pd
+import requests
 import streamlit as st
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.aggregates import COLUMNS as AGG_COLUMNS, AggregateReader  # noqa: E402
+from analysis.export_mlflow import default_db, default_out, export, load_events  # noqa: E402
+
 # ===== 설정 =====
-MLFLOW_URI_DEFAULT = "http://127.0.0.1:5000"
 EXPERIMENT_DEFAULT = "MAB_Online"
+AGG_DB_DEFAULT = os.path.join(ROOT, "data", "state", "aggregates.sqlite")
+API_URL_DEFAULT = "http://127.0.0.1:8000"
 
 st.set_page_config(page_title="MAB + MLflow Dashboard", layout="wide")
 
@@ -19,41 +34,110 @@ st.caption("arm별 CTR 요약과 시간 추이를 시각화합니다.")
 
 with st.sidebar:
     st.header("⚙️ 설정")
-    mlflow_uri = st.text_input("MLflow Tracking URI", os.getenv("MLFLOW_TRACKING_URI", MLFLOW_URI_DEFAULT))
+    source = st.radio("데이터 소스", ["집계(로컬)", "실시간(SSE)", "MLflow"], horizontal=True)
+    agg_path = st.text_input("집계 DB 경로", os.getenv("AGG_DB_PATH", AGG_DB_DEFAULT))
+    api_url = st.text_input("Policy API URL", os.getenv("API_URL", API_URL_DEFAULT))
+    live_interval = st.number_input("실시간 갱신 간격(초)", min_value=0.2, max_value=60.0, value=1.0)
+    mlflow_db = st.text_input("MLflow DB 경로 (SQLite)", default_db())
     experiment_name = st.text_input("Experiment name", os.getenv("MAB_EXPERIMENT", EXPERIMENT_DEFAULT))
+    export_dir = st.text_input("MLflow 내보내기 경로 (Parquet)", default_out(experiment_name))
     time_window_mins = st.number_input("이동평균 창 크기(분)", min_value=1, max_value=240, value=20)
     st.markdown("---")
-    st.caption("※ MLflow 서버가 먼저 실행 중이어야 합니다.")
+    st.caption("※ MLflow 소스는 서버 없이 SQLite 백엔드 파일을 직접 읽습니다.")
 
 @st.cache_data(show_spinner=True, ttl=30)
-def load_runs(mlflow_uri: str, experiment_name: str) -> pd.DataFrame:
-    mlflow.set_tracking_uri(mlflow_uri)
-    exp = mlflow.get_experiment_by_name(experiment_name)
-    if exp is None:
-        return pd.DataFrame()
-    df = mlflow.search_runs(experiment_ids=[exp.experiment_id], order_by=["start_time ASC"])
-    return df
-
-df = load_runs(mlflow_uri, experiment_name)
-
-if df.empty:
-    st.warning(f"실험 `{experiment_name}`에서 run을 찾지 못했습니다. Streamlit UI에서 선택 이벤트를 발생시킨 뒤 다시 열어보세요.")
+def load_mlflow_events(db_path: str, export_dir: str, experiment_name: str) -> pd.DataFrame:
+    # 새로 쌓인 metric만 Parquet로 내보낸 뒤(워터마크 이후) 파일 전체를 스캔
+    if os.path.exists(db_path):
+        export(db_path, export_dir, experiment_name)
+    return load_events(export_dir)
+
+def line_chart(data: pd.DataFrame, y: str):
+    return alt.Chart(data).mark_line().encode(x='ts:T', y=f'{y}:Q', color='arm:N').properties(height=300)
+
+
+def load_aggregates(path: str) -> pd.DataFrame:
+    # 세션에 (bucket, arm) → 행 을 들고 있다가 워터마크 이후 바뀐 버킷만 덮어쓴다
+    state = st.session_state.get("agg")
+    if state is None or state["path"] != path:
+        state = st.session_state["agg"] = {"path": path, "reader": AggregateReader(path), "rows": {}}
+    for row in state["reader"].read_new():
+        state["rows"][(row[0], row[1])] = row
+    return pd.DataFrame(list(state["rows"].values()), columns=list(AGG_COLUMNS))
+
+
+def sse_events(url: str):
+    # text/event-stream 의 'data: {...}' 줄만 JSON으로 파싱
+    with requests.get(url, stream=True, timeout=(3, 60)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if line and line.startswith("data: "):
+                yield json.loads(line[len("data: "):])
+
+
+if source == "실시간(SSE)":
+    st.caption("API가 보내는 점을 차트에 덧붙입니다(스크립트 재실행/재조회 없음). 설정을 바꾸면 다시 연결합니다.")
+    table = st.empty()
+    panels = {"ctr": "📈 창(window) CTR", "share": "📊 트래픽 비중", "mean": "🎲 사후 평균 alpha/(alpha+beta)"}
+    charts = {}
+    try:
+        for ev in sse_events(f"{api_url}/metrics/stream?interval={live_interval}"):
+            ts = pd.to_datetime(ev["ts"], unit="s")
+            arms = ev["arms"]
+            table.dataframe(pd.DataFrame(arms).T, use_container_width=True)
+            for key, title in panels.items():
+                point = pd.DataFrame({arm: [v.get(key)] for arm, v in arms.items()}, index=[ts], dtype=float)
+                if key not in charts:
+                    st.subheader(title)
+                    charts[key] = st.line_chart(point, height=250)
+                else:
+                    charts[key].add_rows(point)
+    except requests.RequestException as e:
+        st.error(f"/metrics/stream 연결 실패: {e}")
     st.stop()
 
-# 안전 추출
-def has(col: str) -> bool: return col in df.columns
-required_metrics = ["metrics.reward"]
-required_params = ["params.arm"]
-if not all(has(c) for c in required_metrics + required_params):
-    st.error("필수 컬럼이 부족합니다. /update에서 reward(메트릭), arm(파라미터)을 기록하는지 확인하세요.")
-    st.dataframe(df.head(10))
+if source == "집계(로컬)":
+    bdf = load_aggregates(agg_path)
+    if bdf.empty:
+        st.warning(f"집계 DB `{agg_path}`에 데이터가 없습니다. API(/choose, /update)가 실행 중인지 확인하세요.")
+        st.stop()
+    bdf["ts"] = pd.to_datetime(bdf["bucket"], unit="s")
+    bdf = bdf.sort_values(["arm", "ts"]).reset_index(drop=True)
+
+    min_ts, max_ts = bdf["ts"].min(), bdf["ts"].max()
+    start_ts, end_ts = st.sidebar.date_input("기간(시작/끝)", value=(min_ts.date(), max_ts.date()))
+    bdf = bdf.loc[(bdf["ts"].dt.date >= start_ts) & (bdf["ts"].dt.date <= end_ts)].copy()
+
+    summary = bdf.groupby("arm")[["exposures", "clicks", "reward_sum"]].sum()
+    summary["ctr"] = summary["reward_sum"] / summary["exposures"].where(summary["exposures"] > 0)
+    summary["traffic_share"] = summary["exposures"] / summary["exposures"].sum()
+    st.subheader("✅ ARM Summary")
+    st.dataframe(summary.sort_values("ctr", ascending=False)
+                        .style.format({"ctr": "{:.3f}", "traffic_share": "{:.2%}"}), use_container_width=True)
+
+    # 누적/이동평균 CTR = 보상 합 / 노출 수 (버킷 단위)
+    g = bdf.groupby("arm")
+    bdf["cum_ctr"] = g["reward_sum"].cumsum() / g["exposures"].cumsum().where(lambda x: x > 0)
+    rolled = (bdf.set_index("ts").groupby("arm")[["reward_sum", "exposures"]]
+                 .rolling(f"{time_window_mins}min").sum().reset_index())
+    rolled["ma_ctr"] = rolled["reward_sum"] / rolled["exposures"].where(rolled["exposures"] > 0)
+
+    st.subheader("📈 누적 CTR (Cumulative CTR)")
+    st.altair_chart(line_chart(bdf, "cum_ctr"), use_container_width=True)
+    st.subheader(f"📈 이동평균 CTR (window={time_window_mins}분)")
+    st.altair_chart(line_chart(rolled, "ma_ctr"), use_container_width=True)
+    st.subheader("🧾 최근 버킷")
+    st.dataframe(bdf.sort_values("ts", ascending=False)[["ts", "arm", "exposures", "clicks", "reward_sum"]].head(30),
+                 use_container_width=True)
+    st.caption(f"워터마크 seq={st.session_state['agg']['reader'].watermark} · 새로고침 시 변경된 버킷만 읽습니다.")
     st.stop()
 
-# 가공
-gdf = df[["run_id", "start_time", "metrics.reward", "params.arm"]].copy()
-gdf["ts"] = pd.to_datetime(gdf["start_time"], unit="ms", utc=True).dt.tz_convert(None)
-gdf.rename(columns={"metrics.reward": "reward", "params.arm": "arm"}, inplace=True)
-gdf["reward"] = gdf["reward"].astype(float)
+gdf = load_mlflow_events(mlflow_db, export_dir, experiment_name)
+if gdf.empty:
+    st.warning(f"실험 `{experiment_name}`의 reward 이벤트가 없습니다(`{mlflow_db}` → `{export_dir}`). "
+               "Streamlit UI에서 선택 이벤트를 발생시킨 뒤 다시 열어보세요.")
+    st.stop()
+gdf["ts"] = pd.to_datetime(gdf["ts_ms"], unit="ms", utc=True).dt.tz_convert(None)
 
 # 사이드바 필터 (기간)
 min_ts, max_ts = gdf["ts"].min(), gdf["ts"].max()
@@ -65,11 +149,11 @@ gdf = gdf.loc[mask].copy()
 # 요약 테이블
 summary = (
     gdf.groupby("arm")
-       .agg(n_runs=("run_id", "count"),
+       .agg(n_events=("reward", "count"),
             ctr=("reward", "mean"))
        .sort_values("ctr", ascending=False)
 )
-summary["traffic_share"] = summary["n_runs"] / summary["n_runs"].sum()
+summary["traffic_share"] = summary["n_events"] / summary["n_events"].sum()
 
 st.subheader("✅ ARM Summary")
 st.dataframe(summary.style.format({"ctr":"{:.3f}", "traffic_share":"{:.2%}"}), use_container_width=True)
@@ -91,19 +175,11 @@ ma_df = (
 )
 
 # 시각화
-import altair as alt
-
 st.subheader("📈 누적 CTR (Cumulative CTR)")
-cum_chart = alt.Chart(gdf).mark_line().encode(
-    x='ts:T', y='cum_ctr:Q', color='arm:N'
-).properties(height=300)
-st.altair_chart(cum_chart, use_container_width=True)
+st.altair_chart(line_chart(gdf, "cum_ctr"), use_container_width=True)
 
 st.subheader(f"📈 이동평균 CTR (window={time_window_mins}분)")
-ma_chart = alt.Chart(ma_df).mark_line().encode(
-    x='ts:T', y='ma_ctr:Q', color='arm:N'
-).properties(height=300)
-st.altair_chart(ma_chart, use_container_width=True)
+st.altair_chart(line_chart(ma_df, "ma_ctr"), use_container_width=True)
 
 st.subheader("🧾 최근 이벤트")
 st.dataframe(
@@ -0,0 +1,224 @@
+# analysis/export_mlflow.py
+# MLflow SQLite 백엔드(mlflow.db)의 metric 히스토리를 Parquet 파일로 증분 내보내기.
+# - mlflow.search_runs(HTTP 페이지 조회, run당 넓은 행) + run별 get_metric_history 대신
+#   metrics ⨝ runs ⨝ params(arm)를 SQL 한 번으로 읽어 청크 단위로 스트리밍한다(mlflow 패키지/서버 불필요, 읽기 전용)
+# - 출력: <out>/day=YYYY-MM-DD/arm=<arm>/part-<청크 첫 rowid>.parquet (hive 파티션, UTC 날짜, zstd)
+#   컬럼(긴 형식): ts_ms(int64), run_id, step(int64), key, value(float64). run_id/key는 dictionary 인코딩
+#   이벤트 1건 = key "reward" 한 행 + 같은 step의 sample_*/숫자 meta 행(app/mlflow_utils.py 기록 방식)
+# - 워터마크: metrics 테이블 rowid(삽입 순서로 증가). 마지막으로 내보낸 rowid를 <out>/_watermark.json 에 두고
+#   다음 실행은 그 이후만 읽는다. 파일을 모두 쓴 뒤 워터마크를 갱신하고, part 파일 이름이 청크의 첫 rowid라
+#   중간에 죽은 뒤 다시 돌려도 같은 파일을 덮어쓴다(중복 없음)
+# - 다른 DB/실험을 가리키거나 DB가 교체되면(rowid가 워터마크보다 작아짐) 자동으로 처음부터 다시 만든다
+#   내보낸 뒤 삭제된 run은 파일에 남으므로 --full 로 다시 만든다
+#
+# 사용 예:
+#   python analysis/export_mlflow.py                          # mlflow.db → data/artifacts/mlflow_export/MAB_Online
+#   python analysis/export_mlflow.py --db /path/mlflow.db --full
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from typing import Dict, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPERIMENT_DEFAULT = "MAB_Online"
+EXPORT_ROOT_DEFAULT = os.path.join(ROOT, "data", "artifacts", "mlflow_export")
+WATERMARK_FILE = "_watermark.json"
+CHUNK_ROWS = 500_000
+
+SCHEMA = pa.schema([
+    ("ts_ms", pa.int64()),
+    ("run_id", pa.dictionary(pa.int32(), pa.string())),
+    ("step", pa.int64()),
+    ("key", pa.dictionary(pa.int32(), pa.string())),
+    ("value", pa.float64()),
+])
+PARTITION_SCHEMA = pa.schema([("day", pa.string()), ("arm", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+_QUERY = """
+SELECT m.rowid, m.timestamp, m.run_uuid, m.step, m.key, m.value, p.value
+FROM metrics m
+JOIN runs r ON r.run_uuid = m.run_uuid
+JOIN params p ON p.run_uuid = m.run_uuid AND p.key = 'arm'
+WHERE m.rowid > ? AND m.rowid <= ? AND r.experiment_id = ? AND r.lifecycle_stage = 'active' AND m.is_nan = 0
+ORDER BY m.rowid
+"""
+
+
+def default_db() -> str:
+    """MLFLOW_DB > MLFLOW_TRACKING_URI(sqlite:///...) > 저장소 루트의 mlflow.db"""
+    if os.getenv("MLFLOW_DB"):
+        return os.environ["MLFLOW_DB"]
+    uri = os.getenv("MLFLOW_TRACKING_URI", "")
+    if uri.startswith("sqlite:///"):
+        return uri[len("sqlite:///"):]
+    return os.path.join(ROOT, "mlflow.db")
+
+
+def default_out(experiment: str) -> str:
+    return os.path.join(os.getenv("MLFLOW_EXPORT_DIR", EXPORT_ROOT_DEFAULT), experiment)
+
+
+def read_watermark(out_dir: str) -> Optional[Dict]:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_watermark(out_dir: str, state: Dict):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _clear(out_dir: str):
+    if not os.path.isdir(out_dir):
+        return
+    for name in os.listdir(out_dir):
+        if name.startswith("day="):
+            shutil.rmtree(os.path.join(out_dir, name))
+    wm = os.path.join(out_dir, WATERMARK_FILE)
+    if os.path.exists(wm):
+        os.remove(wm)
+
+
+def _write_chunk(out_dir: str, rows: list) -> int:
+    """청크 하나를 (날짜, arm) 파티션별 파일로 나눠 쓴다. 반환: 쓴 파일 수."""
+    rowid, ts, run_id, step, key, value, arm = zip(*rows)
+    ts_ms = np.asarray(ts, dtype=np.int64)
+    days = ts_ms // 86_400_000
+    arms = np.asarray(arm, dtype=object)
+    table = pa.table({
+        "ts_ms": ts_ms,
+        "run_id": pa.array(run_id, pa.string()).dictionary_encode(),
+        "step": np.asarray(step, dtype=np.int64),
+        "key": pa.array(key, pa.string()).dictionary_encode(),
+        "value": np.asarray(value, dtype=np.float64),
+    }, schema=SCHEMA)
+    name = f"part-{rowid[0]:012d}.parquet"
+    files = 0
+    for d in np.unique(days):
+        in_day = days == d
+        day = time.strftime("%Y-%m-%d", time.gmtime(int(d) * 86400))
+        for a in np.unique(arms[in_day]):
+            idx = np.flatnonzero(in_day & (arms == a))
+            part_dir = os.path.join(out_dir, f"day={day}", f"arm={quote(str(a), safe='')}")
+            os.makedirs(part_dir, exist_ok=True)
+            tmp = os.path.join(part_dir, "." + name + ".tmp")   # 점으로 시작하면 dataset 탐색에서 빠진다
+            pq.write_table(table.take(pa.array(idx)), tmp, compression="zstd")
+            os.replace(tmp, os.path.join(part_dir, name))
+            files += 1
+    return files
+
+
+def export(db_path: str, out_dir: str, experiment: str = EXPERIMENT_DEFAULT, full: bool = False,
+           chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """
+    db_path의 experiment metric을 out_dir로 증분 내보내기.
+    반환: {"rows": 이번에 내보낸 행 수, "files": 쓴 파일 수, "watermark": 마지막 rowid, "secs": 소요 시간}
+    """
+    t0 = time.perf_counter()
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"MLflow DB not found: {db_path}")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        exp = conn.execute("SELECT experiment_id FROM experiments WHERE name = ?", (experiment,)).fetchone()
+        max_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM metrics").fetchone()[0]
+        state = None if full else read_watermark(out_dir)
+        if state is not None and (state.get("experiment") != experiment or state.get("rowid", 0) > max_rowid
+                                  or state.get("db") != os.path.abspath(db_path)):
+            print(f"[WARN] {out_dir} does not match {db_path} ({experiment}), rebuilding")
+            state = None
+        if state is None:
+            _clear(out_dir)
+            state = {"version": 1, "experiment": experiment, "rowid": 0, "rows": 0}
+        state["db"] = os.path.abspath(db_path)
+        os.makedirs(out_dir, exist_ok=True)
+
+        rows_out = files = 0
+        if exp is not None:
+            cur = conn.execute(_QUERY, (state["rowid"], max_rowid, exp[0]))
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                files += _write_chunk(out_dir, rows)
+                rows_out += len(rows)
+        # 상한을 시작 시점의 최대 rowid로 고정 → 도중에 들어온 행은 다음 실행에서 읽는다
+        # 실험에 속하지 않는 행도 다시 볼 필요가 없으므로 워터마크는 그 상한까지 전진
+        state["rowid"] = max_rowid
+        state["rows"] += rows_out
+        state["updated"] = time.time()
+        _write_watermark(out_dir, state)
+    finally:
+        conn.close()
+    return {"rows": rows_out, "files": files, "watermark": state["rowid"], "secs": time.perf_counter() - t0}
+
+
+def load_events(out_dir: str, keys: Sequence[str] = ("reward",), arms: Optional[Sequence[str]] = None,
+                since_ms: Optional[int] = None):
+    """
+    내보낸 파일에서 이벤트를 읽어 pandas DataFrame으로 반환.
+    컬럼: run_id, arm, step, ts_ms, <keys...> (이벤트당 한 행, ts_ms 순). 파티션(날짜/arm)과 key로 가지치기.
+    """
+    import pandas as pd
+
+    columns = ["run_id", "arm", "step", "ts_ms"]
+    if not os.path.isdir(out_dir):
+        return pd.DataFrame(columns=columns + list(keys))
+    dataset = ds.dataset(out_dir, schema=pa.unify_schemas([SCHEMA, PARTITION_SCHEMA]), format="parquet",
+                         partitioning=PARTITIONING)
+    flt = ds.field("key").isin(list(keys))
+    if arms is not None:
+        flt &= ds.field("arm").isin(list(arms))
+    if since_ms is not None:
+        day = time.strftime("%Y-%m-%d", time.gmtime(since_ms // 1000))
+        flt &= (ds.field("day") >= day) & (ds.field("ts_ms") >= since_ms)
+    table = dataset.to_table(columns=columns + ["key", "value"], filter=flt)
+    df = table.to_pandas()
+    if df.empty:
+        return pd.DataFrame(columns=columns + list(keys))
+    for col in ("run_id", "key"):
+        df[col] = df[col].astype(str)
+    if list(keys) == [keys[0]]:
+        df = df[columns + ["value"]].rename(columns={"value": keys[0]})
+    else:
+        df = (df.pivot_table(index=columns, columns="key", values="value", aggfunc="last")
+                .reindex(columns=list(keys)).reset_index())
+        df.columns.name = None
+    return df.sort_values("ts_ms", kind="stable").reset_index(drop=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export MLflow metric history (SQLite backend) to partitioned Parquet")
+    ap.add_argument("--db", default=None, help="MLflow SQLite DB 경로 (기본: MLFLOW_DB / sqlite 트래킹 URI / mlflow.db)")
+    ap.add_argument("--experiment", default=os.getenv("MAB_EXPERIMENT", EXPERIMENT_DEFAULT))
+    ap.add_argument("--out", default=None, help="출력 디렉터리 (기본: data/artifacts/mlflow_export/<experiment>)")
+    ap.add_argument("--full", action="store_true", help="워터마크를 무시하고 전부 다시 내보내기")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="한 번에 읽어 쓰는 metric 행 수")
+    args = ap.parse_args(argv)
+
+    db = args.db or default_db()
+    out = args.out or default_out(args.experiment)
+    res = export(db, out, args.experiment, full=args.full, chunk_rows=args.chunk_rows)
+    print(f"[OK] {res['rows']} metric rows → {res['files']} files in {out} "
+          f"(watermark rowid={res['watermark']}, {res['secs']:.2f}s)")
+    return res
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# 대시보드용 시간 버킷 집계 저장소(SQLite).
+# - API가 (버킷 시작 시각, arm)별 노출 수/클릭 수/보상 합을 메모리에 누적하고 주기적으로 UPSERT
+#   (여러 워커가 같은 파일에 써도 값은 더해지기만 한다)
+# - 행마다 seq(쓰기 트랜잭션 순번)를 기록 → 리더는 마지막으로 본 seq보다 큰 행만 가져온다(워터마크)
+#   SQLite 쓰기 트랜잭션은 직렬화되므로 seq는 커밋 순서대로 증가하고 놓치는 행이 없다
+# - 조회 비용은 바뀐 버킷 수에만 비례, 전체 이벤트 수와 무관
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arm_bucket (
+    bucket     INTEGER NOT NULL,   -- 버킷 시작 unix time(초)
+    arm        TEXT    NOT NULL,
+    exposures  INTEGER NOT NULL DEFAULT 0,
+    clicks     INTEGER NOT NULL DEFAULT 0,
+    reward_sum REAL    NOT NULL DEFAULT 0,
+    seq        INTEGER NOT NULL,
+    PRIMARY KEY (bucket, arm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS arm_bucket_seq ON arm_bucket (seq);
+"""
+
+_UPSERT = """
+INSERT INTO arm_bucket (bucket, arm, exposures, clicks, reward_sum, seq) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (bucket, arm) DO UPDATE SET
+    exposures = exposures + excluded.exposures,
+    clicks = clicks + excluded.clicks,
+    reward_sum = reward_sum + excluded.reward_sum,
+    seq = excluded.seq
+"""
+
+COLUMNS = ("bucket", "arm", "exposures", "clicks", "reward_sum", "seq")
+Row = Tuple[int, str, int, int, float, int]
+
+
+def _connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")     # 대시보드 읽기가 쓰기를 막지 않도록
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+    return conn
+
+
+class AggregateWriter:
+    """
+    요청 경로에서는 메모리 배열만 갱신하고(버킷별 (k, 3): 노출, 클릭, 보상 합),
+    flusher 스레드가 flush_secs마다 바뀐 버킷을 한 트랜잭션으로 기록한다.
+    """
+
+    def __init__(self, path: str, arms: Sequence[str], bucket_secs: int = 60, flush_secs: float = 5.0):
+        self.path = path
+        self.arms = list(arms)
+        self.index = {a: i for i, a in enumerate(self.arms)}
+        self.bucket_secs = bucket_secs
+        self.flush_secs = flush_secs
+        self._pending: Dict[int, np.ndarray] = {}
+        self._totals = np.zeros((len(self.arms), 3))   # 프로세스 시작 후 누적(실시간 스트림용)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._conn = _connect(path)
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---- 요청 경로 ----
+    def _bucket(self, ts: float) -> np.ndarray:
+        return self._bucket_at(int(ts // self.bucket_secs) * self.bucket_secs)
+
+    def _bucket_at(self, b: int) -> np.ndarray:
+        arr = self._pending.get(b)
+        if arr is None:
+            arr = self._pending[b] = np.zeros((len(self.arms), 3))
+        return arr
+
+    def add_exposure(self, ts: float, arm: str, count: int = 1):
+        i = self.index[arm]
+        with self._lock:
+            self._bucket(ts)[i, 0] += count
+            self._totals[i, 0] += count
+
+    def add_reward(self, ts: float, arm: str, reward: float):
+        i = self.index[arm]
+        with self._lock:
+            for row in (self._bucket(ts)[i], self._totals[i]):
+                row[1] += reward > 0
+                row[2] += reward
+
+    def add_exposures(self, ts: float, arm_idx: np.ndarray):
+        counts = np.bincount(arm_idx, minlength=len(self.arms))
+        with self._lock:
+            self._bucket(ts)[:, 0] += counts
+            self._totals[:, 0] += counts
+
+    def add_rewards(self, ts: float, arm_idx: np.ndarray, rewards: np.ndarray):
+        k = len(self.arms)
+        clicks = np.bincount(arm_idx, weights=rewards > 0, minlength=k)
+        total = np.bincount(arm_idx, weights=rewards, minlength=k)
+        with self._lock:
+            for arr in (self._bucket(ts), self._totals):
+                arr[:, 1] += clicks
+                arr[:, 2] += total
+
+    @property
+    def pending(self) -> int:
+        """SQLite에 아직 기록하지 않은 버킷 수."""
+        return len(self._pending)
+
+    def totals(self) -> np.ndarray:
+        """(k, 3) 누적 [노출, 클릭, 보상 합] 복사본."""
+        with self._lock:
+            return self._totals.copy()
+
+    # ---- 기록 ----
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        rows = [(b, self.arms[i], int(v[0]), int(v[1]), float(v[2]))
+                for b, arr in sorted(pending.items()) for i, v in enumerate(arr) if v.any()]
+        if not rows:
+            return
+        with self._write_lock:
+            conn = self._conn
+            try:
+                conn.execute("BEGIN IMMEDIATE")   # 쓰기 락을 먼저 잡아야 seq가 커밋 순서와 일치
+                (seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM arm_bucket").fetchone()
+                conn.executemany(_UPSERT, [r + (seq,) for r in rows])
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                with self._lock:   # 다음 flush에서 다시 기록되도록 되돌려 놓는다
+                    for b, arr in pending.items():
+                        self._bucket_at(b)[:] += arr
+                raise
+
+    def start_flusher(self):
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="aggregate-flush", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        self._conn.close()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_secs):
+            try:
+                self.flush()
+            except sqlite3.Error as e:   # 잠금 경합 등: 값은 메모리에 남아 다음 주기에 다시 기록
+                print(f"[WARN] aggregate flush failed: {e}")
+
+
+class AggregateReader:
+    """워터마크(seq) 이후에 바뀐 버킷만 읽는 증분 리더. 같은 (bucket, arm)은 최신 값으로 덮어쓰면 된다."""
+
+    def __init__(self, path: str, watermark: int = 0):
+        self.path = path
+        self.watermark = watermark
+
+    def read_new(self) -> List[Row]:
+        if not os.path.exists(self.path):
+            return []
+        conn = _connect(self.path, readonly=True)
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM arm_bucket WHERE seq > ? ORDER BY seq", (self.watermark,)
+            ).fetchall()
+        finally:
+            conn.close()
+        if rows:
+            self.watermark = rows[-1][-1]
+        return rows
@@ -1,31 +1,248 @@
+import time
+
 import numpy as np
-from collections import defaultdict
-from typing import Dict, List, Tuple
-
-class ThompsonBandit:
-    def __init__(self, arms: List[str], discount: float = 1.0):
-        self.arms = arms
-        self.a = defaultdict(lambda: 1.0)  # successes
-        self.b = defaultdict(lambda: 1.0)  # failures
-        self.n = defaultdict(int)          # exposures
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .bandit_state import LocalState
+
+# 감쇠 스케일이 이 값보다 작아지면 raw 파라미터에 반영하고 1로 되돌린다(언더/오버플로 방지)
+_RENORM_BELOW = 1e-100
+
+ArmsLike = Union[Sequence[str], Sequence[int], np.ndarray]
+
+
+def _check_rewards(r: np.ndarray):
+    # Bernoulli 보상은 [0, 1]: 벗어나면 alpha/beta가 음수가 되어 이후 모든 beta 샘플링이 실패한다
+    if not np.all((r >= 0.0) & (r <= 1.0)):
+        raise ValueError(f"rewards must be in [0, 1], got {r[~((r >= 0.0) & (r <= 1.0))][:5].tolist()}")
+
+
+class BetaBernoulliPolicy:
+    """
+    Bernoulli 보상 arm 정책의 공통 뼈대(정책 구현은 app.policies 참고).
+    - alpha/beta/n 은 arm 순서대로 연속 배열에 저장
+    - 감쇠는 전역 스케일 하나로 지연 적용: 실제 alpha = raw_a * scale
+      (update 때 모든 arm을 곱하지 않고 scale만 줄인 뒤, 너무 작아지면 재정규화)
+    - 배열은 state 백엔드(app.bandit_state)가 소유. 락은 복사/갱신 구간에만 잡고
+      점수 계산은 락 밖에서 수행한다.
+    - 하위 클래스는 _scores(alpha, beta, m) → (m, k) 점수 행렬만 구현하면 된다(행마다 argmax가 선택).
+    - guardrails: allowed(n) → 후보 arm 마스크(None이면 제한 없음)를 주는 객체(app.policies.Guardrails)
+    - propensity_refresh: 몬테카를로 선택 확률을 다시 뽑는 최소 간격(초). 그 사이 /update로 사후분포가
+      바뀌어도 직전 추정을 그대로 쓴다(후보 마스크가 바뀌면 즉시 다시 계산). 0이면 바뀔 때마다 계산
+    """
+
+    name = "base"
+    exact_propensities = False   # _propensities가 해석식이면 True(싸고, 오래된 값이 틀린 값이라 항상 다시 계산)
+
+    def __init__(self, arms: List[str], discount: float = 1.0, seed: int | None = None, state=None,
+                 propensity_samples: int = 4096, guardrails=None, propensity_refresh: float = 0.25):
+        if not 0.0 < discount <= 1.0:
+            raise ValueError(f"discount must be in (0, 1], got {discount}")
+        self.arms = list(arms)
+        self.index = {arm: i for i, arm in enumerate(self.arms)}
+        k = len(self.arms)
+        self.state = state if state is not None else LocalState(self.arms)
+        if self.state.k != k:
+            raise ValueError("state backend arm count does not match arms")
+        buf = self.state.buf
+        self._params = buf[0:1]                 # [scale]
+        self._a = buf[1:1 + k]                  # successes (raw)
+        self._b = buf[1 + k:1 + 2 * k]          # failures (raw)
+        self._n = buf[1 + 2 * k:]               # exposures
         self.discount = discount
+        self.rng = np.random.default_rng(seed)
+        self.propensity_samples = propensity_samples
+        self.guardrails = guardrails
+        self.propensity_refresh = propensity_refresh
+        # (파라미터 키, 후보 마스크 키, 계산 시각, 선택 확률)
+        self._prop_cache: Tuple[bytes, bytes, float, np.ndarray] | None = None
+
+    @property
+    def _scale(self) -> float:
+        return float(self._params[0])
+
+    @_scale.setter
+    def _scale(self, value: float):
+        self._params[0] = value
+
+    # ---- 파라미터 조회 ----
+    def posterior(self) -> Tuple[np.ndarray, np.ndarray]:
+        """현재 (alpha, beta) 복사본을 일관된 시점으로 반환."""
+        with self.state.lock(shared=True):
+            scale = self._params[0]
+            return self._a * scale, self._b * scale
+
+    @property
+    def alpha(self) -> np.ndarray:
+        return self.posterior()[0]
+
+    @property
+    def beta(self) -> np.ndarray:
+        return self.posterior()[1]
+
+    @property
+    def a(self) -> Dict[str, float]:
+        return dict(zip(self.arms, self.alpha.tolist()))
+
+    @property
+    def b(self) -> Dict[str, float]:
+        return dict(zip(self.arms, self.beta.tolist()))
+
+    @property
+    def n(self) -> Dict[str, int]:
+        return dict(zip(self.arms, (int(x) for x in self._n)))
 
-    def choose(self) -> Tuple[str, Dict[str, float]]:
-        samples = {arm: np.random.beta(self.a[arm], self.b[arm]) for arm in self.arms}
-        arm = max(samples, key=samples.get)
-        self.n[arm] += 1
-        return arm, samples
-
-    def update(self, arm: str, reward: float):
-        # 감쇠 적용(최근성 반영)
-        if self.discount < 1.0:
-            for k in self.arms:
-                self.a[k] *= self.discount
-                self.b[k] *= self.discount
-        self.a[arm] += reward
-        self.b[arm] += (1 - reward)
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """(alpha, beta, 후보 arm 마스크)를 같은 시점으로. 마스크는 가드레일이 없거나 제한이 없으면 None."""
+        with self.state.lock(shared=True):
+            scale = self._params[0]
+            alpha, beta = self._a * scale, self._b * scale
+            n = self._n.copy() if self.guardrails is not None else None
+        return alpha, beta, (self.guardrails.allowed(n) if n is not None else None)
+
+    # ---- 정책별 구현 ----
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def _propensities(self, alpha: np.ndarray, beta: np.ndarray, allowed: Optional[np.ndarray]) -> np.ndarray:
+        """
+        기본값: _scores를 propensity_samples번 뽑아 arm별 1등 비율(몬테카를로).
+        0이 되지 않도록 후보 arm에만 (승리 수 + 1) / (샘플 수 + 후보 수) 로 평활.
+        """
+        m, k = self.propensity_samples, len(self.arms)
+        scores = _mask(self._scores(alpha, beta, m), allowed)
+        wins = np.bincount(scores.argmax(axis=1), minlength=k)
+        ok = np.ones(k) if allowed is None else allowed.astype(np.float64)
+        return (wins + ok) / (m + ok.sum())
+
+    def propensities(self, context=None) -> np.ndarray:
+        """
+        arm별 선택 확률(가드레일 포함).
+        현재 (alpha, beta, 후보 마스크)를 키로 캐시해서 바뀔 때만 다시 계산한다
+        (mmap 백엔드에서 다른 워커가 바꾼 경우도 키가 달라져서 감지됨).
+        몬테카를로 추정은 /update마다 키가 바뀌므로 propensity_refresh초에 한 번만 다시 뽑는다
+        (이벤트 루프에서 매 /choose마다 samples x k 베타 샘플링을 하지 않도록).
+        """
+        alpha, beta, allowed = self._snapshot()
+        key = alpha.tobytes() + beta.tobytes()
+        mask = b"" if allowed is None else allowed.tobytes()
+        now = time.monotonic()
+        cache = self._prop_cache
+        if cache is not None and cache[1] == mask and (
+                cache[0] == key
+                or (not self.exact_propensities and now - cache[2] < self.propensity_refresh)):
+            return cache[3]
+        prop = self._propensities(alpha, beta, allowed)
+        self._prop_cache = (key, mask, now, prop)
+        return prop
+
+    # ---- 선택 ----
+    def choose(self, context=None, record: bool = True) -> Tuple[str, Dict[str, float]]:
+        """
+        context는 무시(컨텍스트 정책과 같은 인터페이스, app.contextual 참고).
+        record=False면 노출 수(n)는 올리지 않는다(호출자가 record_exposure로 직접 기록).
+        반환: (arm, arm별 점수)
+        """
+        alpha, beta, allowed = self._snapshot()
+        scores = self._scores(alpha, beta, 1)[0]
+        i = int(np.argmax(_mask(scores, allowed)))
+        if record:
+            self.record_exposure(i)
+        return self.arms[i], dict(zip(self.arms, scores.tolist()))
+
+    def record_exposure(self, arm: Union[str, int], count: int = 1, context=None):
+        i = self.index[arm] if isinstance(arm, str) else arm
+        with self.state.lock():
+            self._n[i] += count
+
+    def record_exposures(self, idx: np.ndarray):
+        """arm 인덱스 배열만큼 노출 수를 한 번에 올린다."""
+        counts = np.bincount(idx, minlength=len(self.arms))
+        with self.state.lock():
+            self._n += counts
+
+    def choose_batch(self, n: int, record: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        현재 파라미터로 n건을 한 번에 선택. (arm 인덱스 배열, (n, k) 점수 행렬) 반환.
+        가드레일 마스크도 배치 시작 시점 기준(배치 크기만큼 최소 노출/상한을 넘을 수 있음).
+        """
+        alpha, beta, allowed = self._snapshot()
+        scores = self._scores(alpha, beta, n)
+        idx = _mask(scores, allowed).argmax(axis=1)
+        if record:
+            self.record_exposures(idx)
+        return idx, scores
+
+    # ---- 갱신 ----
+    def update(self, arm: str, reward: float, context=None):
+        if not 0.0 <= reward <= 1.0:
+            raise ValueError(f"reward must be in [0, 1], got {reward}")
+        i = self.index[arm]
+        with self.state.lock():
+            # 감쇠 적용(최근성 반영): 모든 arm에 곱하는 대신 scale만 갱신
+            if self.discount < 1.0:
+                self._scale *= self.discount
+                if self._scale < _RENORM_BELOW:
+                    self._renormalize()
+            scale = self._scale
+            self._a[i] += reward / scale
+            self._b[i] += (1 - reward) / scale
+
+    def update_batch(self, arms: ArmsLike, rewards: Sequence[float]):
+        """update()를 순서대로 len(arms)번 호출한 것과 같은 결과(감쇠 포함)."""
+        idx = self._indices(arms)
+        r = np.asarray(rewards, dtype=float)
+        with self.state.lock():
+            self._update_batch(idx, r)
+
+    def _update_batch(self, idx: np.ndarray, r: np.ndarray):
+        _check_rewards(r)
+        k = len(self.arms)
+        if self.discount >= 1.0:
+            self._a += np.bincount(idx, weights=r, minlength=k)
+            self._b += np.bincount(idx, weights=1.0 - r, minlength=k)
+            return
+        # i번째 이벤트 직후 scale = scale0 * d^(i+1). 스케일이 너무 작아지지 않도록 청크 단위로 처리
+        chunk = max(1, int(np.log(_RENORM_BELOW) / np.log(self.discount)))
+        for s in range(0, len(idx), chunk):
+            ci, cr = idx[s:s + chunk], r[s:s + chunk]
+            scales = self._scale * self.discount ** np.arange(1, len(ci) + 1)
+            self._a += np.bincount(ci, weights=cr / scales, minlength=k)
+            self._b += np.bincount(ci, weights=(1.0 - cr) / scales, minlength=k)
+            self._scale = float(scales[-1])
+            if self._scale < _RENORM_BELOW:
+                self._renormalize()
+
+    def _renormalize(self):
+        scale = self._scale
+        self._a *= scale
+        self._b *= scale
+        self._scale = 1.0
+
+    def _indices(self, arms: ArmsLike) -> np.ndarray:
+        arr = np.asarray(arms)
+        if arr.dtype.kind in "iu":
+            return arr.astype(np.intp, copy=False)
+        return np.fromiter((self.index[a] for a in arms), dtype=np.intp, count=len(arr))
 
     # 유틸
     def ctr(self, arm: str) -> float:
-        denom = self.a[arm] + self.b[arm]
-        return self.a[arm] / denom if denom > 0 else 0.0
+        i = self.index[arm]
+        with self.state.lock(shared=True):
+            a, b = self._a[i], self._b[i]
+        denom = a + b
+        return float(a / denom) if denom > 0 else 0.0
+
+
+def _mask(scores: np.ndarray, allowed: Optional[np.ndarray]) -> np.ndarray:
+    # 후보가 아닌 arm은 -inf (argmax에서 제외)
+    return scores if allowed is None else np.where(allowed, scores, -np.inf)
+
+
+class ThompsonBandit(BetaBernoulliPolicy):
+    """Beta-Bernoulli 톰슨 샘플링: 점수 = Beta(alpha, beta) 샘플."""
+
+    name = "thompson"
+
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        return self.rng.beta(alpha, beta, size=(m, len(alpha)))
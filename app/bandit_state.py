@@ -0,0 +1,118 @@
+# 밴딧 파라미터 저장소(백엔드).
+# 레이아웃은 float64 배열 하나: [scale, a(k), b(k), n(k)]
+# - local: 프로세스 메모리 + threading.Lock (단일 워커)
+# - mmap : 같은 노드의 여러 uvicorn 워커가 파일 하나를 mmap으로 공유, 갱신은 flock으로 원자적
+
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MAGIC = b"TSBSTAT1"
+_HEADER_SIZE = 4096
+
+
+def _init_params(buf: np.ndarray, k: int):
+    buf[0] = 1.0               # scale
+    buf[1:1 + 2 * k] = 1.0     # a, b (Beta(1,1) 사전분포)
+    buf[1 + 2 * k:] = 0.0      # n
+
+
+class LocalState:
+    """프로세스 로컬 배열. 락은 파라미터 복사/갱신 구간에만 잡는다."""
+
+    def __init__(self, arms: List[str]):
+        self.k = len(arms)
+        self.buf = np.empty(1 + 3 * self.k)
+        _init_params(self.buf, self.k)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lock(self, shared: bool = False):
+        with self._lock:
+            yield
+
+    def reset(self):
+        with self.lock():
+            _init_params(self.buf, self.k)
+
+    def close(self):
+        pass
+
+
+class SharedFileState:
+    """
+    mmap 공유 파일. 헤더(4KB)에 arm 목록을 기록해 두고, 다른 arm 구성으로 열면 에러.
+    - 프로세스 간: fcntl.flock (읽기는 LOCK_SH, 쓰기는 LOCK_EX)
+    - 프로세스 내 스레드 간: flock은 같은 fd를 공유하므로 threading.Lock을 함께 사용
+    """
+
+    def __init__(self, path: str, arms: List[str]):
+        if fcntl is None:
+            raise RuntimeError("mmap state backend requires fcntl (POSIX only)")
+        self.path = path
+        self.k = len(arms)
+        size = _HEADER_SIZE + 8 * (1 + 3 * self.k)
+        header = _MAGIC + json.dumps({"arms": list(arms)}).encode("utf-8")
+        if len(header) > _HEADER_SIZE:
+            raise ValueError("too many arms for state header")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._tlock = threading.Lock()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                self._mm = mmap.mmap(self._fd, size)
+                self._mm[:len(header)] = header
+                self.buf = np.ndarray((1 + 3 * self.k,), dtype=np.float64, buffer=self._mm, offset=_HEADER_SIZE)
+                _init_params(self.buf, self.k)
+                self._mm.flush()
+            else:
+                if os.fstat(self._fd).st_size != size:
+                    raise ValueError(f"state file {path} has a different arm layout")
+                self._mm = mmap.mmap(self._fd, size)
+                stored = bytes(self._mm[:_HEADER_SIZE]).rstrip(b"\0")
+                if stored != header:
+                    raise ValueError(f"state file {path} was created for different arms")
+                self.buf = np.ndarray((1 + 3 * self.k,), dtype=np.float64, buffer=self._mm, offset=_HEADER_SIZE)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def lock(self, shared: bool = False):
+        with self._tlock:
+            fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reset(self):
+        with self.lock():
+            _init_params(self.buf, self.k)
+
+    def close(self):
+        self.buf = None
+        self._mm.close()
+        os.close(self._fd)
+
+
+def make_state(backend: str, arms: List[str], path: str | None = None):
+    if backend == "local":
+        return LocalState(arms)
+    if backend == "mmap":
+        if not path:
+            raise ValueError("mmap state backend requires a path")
+        return SharedFileState(path, arms)
+    raise ValueError(f"unknown bandit state backend: {backend}")
@@ -3,5 +3,77 @@ import os
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000")
 MLFLOW_EXPERIMENT = os.getenv("MLFLOW_EXPERIMENT", "MAB_Online")
 DISCOUNT = float(os.getenv("BANDIT_DISCOUNT", "1.0"))   # 1.0 = 감쇠 없음
-MIN_EXPOSURE = int(os.getenv("MIN_EXPOSURE", "5"))      # 가드레일(선택)
-MAX_CAP = float(os.getenv("MAX_CAP", "0.9"))            # arm 최대 90% (선택)
+MIN_EXPOSURE = int(os.getenv("MIN_EXPOSURE", "5"))      # 가드레일: 모든 arm 최소 노출 수(0이면 끔)
+MAX_CAP = float(os.getenv("MAX_CAP", "0.9"))            # 가드레일: arm 누적 노출 비중 상한(1 이상이면 끔)
+
+# mab 모드 정책: thompson | ucb1 | klucb | egreedy | ab(고정 분할 A/B 테스트)
+BANDIT_POLICY = os.getenv("BANDIT_POLICY", "thompson")
+EPSILON = float(os.getenv("EPSILON", "0.1"))            # egreedy 탐색 확률
+UCB_C = float(os.getenv("UCB_C", "1.0"))                # ucb1 탐색 보너스 배수
+KLUCB_C = float(os.getenv("KLUCB_C", "0.0"))            # klucb: ln N + c ln ln N
+AB_SPLIT = {arm: float(w) for arm, w in (part.split("=") for part in os.getenv("AB_SPLIT", "A=0.5,B=0.5").split(",") if part)}
+
+# 순차 검정(/experiment/decision): 대조군 대비 mSPRT always-valid p값, P(대조군보다 좋음), CUSUM
+SEQ_CONTROL = os.getenv("SEQ_CONTROL", "A")
+SEQ_ALPHA = float(os.getenv("SEQ_ALPHA", "0.05"))
+SEQ_TAU = float(os.getenv("SEQ_TAU", "0.02"))              # mSPRT 혼합 표준편차(기대 CTR 차이 규모)
+SEQ_MIN_SAMPLES = int(os.getenv("SEQ_MIN_SAMPLES", "100"))  # arm당 최소 노출 전에는 판단 보류
+SEQ_SINCE = int(os.getenv("SEQ_SINCE", "0"))               # 재시작 시 이 시각(unix 초) 이후 집계로 복원(실험 시작)
+CUSUM_K = float(os.getenv("CUSUM_K", "0.005"))             # CUSUM 허용 편차(최소 검출 CTR 차이의 절반)
+CUSUM_H = float(os.getenv("CUSUM_H", "10"))                # CUSUM 경보 임계값(클릭 단위)
+AB_AUTO_STOP = os.getenv("AB_AUTO_STOP", "0") == "1"        # ab 정책: 결론이 나면 승자에 전체 트래픽
+
+# 이벤트 싱크(/update → MLflow 비동기 배치 기록)
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))        # 큐가 가득 차면 드롭
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))          # 배치 최대 이벤트 수
+EVENT_FLUSH_SECS = float(os.getenv("EVENT_FLUSH_SECS", "2.0"))        # 배치 최대 대기 시간
+EVENT_RUN_MAX_EVENTS = int(os.getenv("EVENT_RUN_MAX_EVENTS", "100000"))  # run 하나당 최대 이벤트(초과 시 새 run)
+MLFLOW_RETRY_SECS = float(os.getenv("MLFLOW_RETRY_SECS", "1.0"))        # MLflow 연결 실패 시 첫 재시도 대기
+MLFLOW_RETRY_MAX_SECS = float(os.getenv("MLFLOW_RETRY_MAX_SECS", "30.0"))  # 재시도 대기 상한(지수 백오프)
+
+# 밴딧 상태 백엔드: local(프로세스 메모리) | mmap(같은 노드의 워커들이 파일 공유)
+BANDIT_STATE_BACKEND = os.getenv("BANDIT_STATE_BACKEND", "local")
+BANDIT_STATE_PATH = os.getenv("BANDIT_STATE_PATH", "data/state/bandit_state.bin")
+
+# 이벤트 저장소(노출/클릭 원시 로그, append-only 세그먼트 파일)
+EVENT_STORE_DIR = os.getenv("EVENT_STORE_DIR", "data/events")
+EVENT_STORE_SEGMENT_MB = int(os.getenv("EVENT_STORE_SEGMENT_MB", "64"))      # 세그먼트 회전 크기
+EVENT_STORE_BLOCK_RECORDS = int(os.getenv("EVENT_STORE_BLOCK_RECORDS", "256"))  # 블록당 레코드 수
+EVENT_STORE_FSYNC = os.getenv("EVENT_STORE_FSYNC", "interval")              # interval | never (API는 always 거부)
+EVENT_STORE_FLUSH_SECS = float(os.getenv("EVENT_STORE_FLUSH_SECS", "1.0"))   # 주기 flush/fsync 간격
+
+# 밴딧 스냅샷/워밍 재시작(local 백엔드 전용, mmap 백엔드는 상태 파일 자체가 유지됨)
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/state/bandit_snapshot.json")
+SNAPSHOT_SECS = float(os.getenv("SNAPSHOT_SECS", "30"))   # 0 이하면 스냅샷 끔
+
+# 대시보드용 시간 버킷 집계(SQLite, app.aggregates)
+AGG_DB_PATH = os.getenv("AGG_DB_PATH", "data/state/aggregates.sqlite")
+AGG_BUCKET_SECS = int(os.getenv("AGG_BUCKET_SECS", "60"))      # 버킷 크기(초)
+AGG_FLUSH_SECS = float(os.getenv("AGG_FLUSH_SECS", "5"))       # 메모리 → SQLite 기록 주기
+
+# /metrics/stream (SSE) 기본 push 간격과 CTR 창 크기(틱 수)
+METRICS_STREAM_SECS = float(os.getenv("METRICS_STREAM_SECS", "1.0"))
+METRICS_STREAM_WINDOW = int(os.getenv("METRICS_STREAM_WINDOW", "60"))
+
+# 노출(propensity) 로깅
+PROPENSITY_SAMPLES = int(os.getenv("PROPENSITY_SAMPLES", "4096"))         # 선택 확률 MC 샘플 수
+PROPENSITY_REFRESH_MS = float(os.getenv("PROPENSITY_REFRESH_MS", "250"))  # MC 선택 확률 재계산 최소 간격(0 = 매번)
+DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "100000"))     # /update 조인용 최근 결정 수
+
+# variant serve() 응답 캐시(app/response_cache.py): 최대 항목 수, 유효 시간(초). 어느 쪽이든 0이면 끔
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# /choose 응답에 debug(arm별 샘플/점수) 포함 여부 기본값(요청의 debug 필드로 덮어쓸 수 있음)
+CHOOSE_DEBUG = os.getenv("CHOOSE_DEBUG", "1") == "1"
+
+# 배치 엔드포인트(/choose/batch, /update/batch) 요청당 최대 건수
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "1000"))
+
+# 컨텍스트 밴딧: mab(컨텍스트 무시) | segment(세그먼트별 톰슨) | linucb | lints(선형 톰슨)
+BANDIT_MODE = os.getenv("BANDIT_MODE", "mab")
+SEGMENT_KEYS = [k for k in os.getenv("SEGMENT_KEYS", "").split(",") if k]   # 예: "device,genre"
+MAX_SEGMENTS = int(os.getenv("MAX_SEGMENTS", "1000"))   # 세그먼트 상태 LRU 크기
+CONTEXT_DIM = int(os.getenv("CONTEXT_DIM", "64"))       # 해시 특성 차원(bias 포함)
+LINUCB_ALPHA = float(os.getenv("LINUCB_ALPHA", "1.0"))
+LINTS_V = float(os.getenv("LINTS_V", "0.5"))
@@ -0,0 +1,46 @@
+# /choose 가 발급한 결정(decision)을 /update 에서 찾기 위한 최근 결정 캐시.
+# 워커 재시작/다른 워커로 간 요청은 여기서 못 찾을 수 있지만,
+# 노출 이벤트는 이벤트 저장소에 남으므로 오프라인 조인은 decision_id로 항상 가능하다.
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class Decision(NamedTuple):
+    arm: str
+    propensity: float
+    ts: float
+    context: Optional[Dict[str, Any]] = None   # 컨텍스트 정책 update용
+
+
+def new_decision_id() -> int:
+    # 0은 '없음'으로 쓰므로 제외. 63비트 = 이벤트 저장소(u8)를 부호 있는 int64(numpy/pandas/SQLite)로 읽어도 음수가 안 되는 크기
+    # JS 숫자는 2^53까지만 정확하므로 API 응답에서는 문자열로 보낸다(app/main.py /choose)
+    while True:
+        did = int.from_bytes(os.urandom(8), "little") >> 1
+        if did:
+            return did
+
+
+class DecisionCache:
+    """크기 제한 LRU (스레드 안전). 가장 오래된 결정부터 밀려난다."""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._d: "OrderedDict[int, Decision]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, decision_id: int, decision: Decision):
+        with self._lock:
+            self._d[decision_id] = decision
+            if len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+
+    def get(self, decision_id: int) -> Optional[Decision]:
+        with self._lock:
+            return self._d.get(decision_id)
+
+    def __len__(self) -> int:
+        return len(self._d)
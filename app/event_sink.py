@@ -0,0 +1,173 @@
+# 요청 핸들러와 MLflow 기록을 분리하는 백그라운드 이벤트 싱크.
+# - /update 는 bounded 큐에 넣기만 하고 즉시 반환(큐가 가득 차면 드롭 후 카운트)
+# - 워커 스레드가 배치 크기 또는 대기 시간 기준으로 모아서 writer(events)에 넘김
+# - 종료 시 남은 이벤트를 모두 flush
+# - init(예: MLflow 연결)은 워커 스레드에서 지수 백오프로 재시도: 준비 전에도 submit은 바로 성공하고
+#   이벤트는 bounded 큐에 쌓였다가 준비되면 기록된다(종료 때까지 실패하면 남은 이벤트는 failed로 센다)
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+class EventSink:
+    def __init__(
+        self,
+        writer: Callable[[List[dict]], None],
+        maxsize: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        on_close: Optional[Callable[[], None]] = None,
+        init: Optional[Callable[[], None]] = None,
+        retry_initial: float = 1.0,
+        retry_max: float = 30.0,
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_close = on_close
+        self.init = init
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self.ready = threading.Event()
+        if init is None:
+            self.ready.set()
+        # 카운터
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.init_failures = 0
+
+    # ---- 생산자 측 ----
+    def submit(self, event: dict) -> bool:
+        try:
+            self._q.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def submit_many(self, events: List[dict]) -> int:
+        """여러 이벤트를 넣고 실제로 들어간 수를 반환(가득 차면 나머지는 드롭)."""
+        ok = 0
+        for event in events:
+            try:
+                self._q.put_nowait(event)
+            except queue.Full:
+                break
+            ok += 1
+        with self._lock:
+            self.enqueued += ok
+            self.dropped += len(events) - ok
+        return ok
+
+    # ---- 수명 주기 ----
+    def start(self):
+        if self._thread is None:
+            self._closing.clear()
+            self._thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._closing.set()  # init 재시도 대기를 깨운다
+        self._q.put(_STOP)   # 큐가 가득 차 있어도 워커가 비우는 중이므로 대기
+        self._thread.join(timeout)
+        self._thread = None
+        if self.on_close:
+            self.on_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self._q.qsize(),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "ready": self.ready.is_set(),
+                "init_failures": self.init_failures,
+            }
+
+    # ---- 워커 ----
+    def _init_with_retry(self) -> bool:
+        delay = self.retry_initial
+        while True:
+            last = self._closing.is_set()   # 종료 요청 후에는 한 번만 더 시도
+            try:
+                self.init()
+            except Exception as e:
+                with self._lock:
+                    self.init_failures += 1
+                if last:
+                    print(f"[WARN] event sink init failed, giving up: {e}")
+                    return False
+                print(f"[WARN] event sink init failed, retry in {delay:.1f}s: {e}")
+                self._closing.wait(delay)
+                delay = min(delay * 2, self.retry_max)
+            else:
+                self.ready.set()
+                return True
+
+    def _drain(self):
+        # init이 끝내 실패: 큐에 남은 이벤트는 기록하지 못한 것으로 센다
+        n = 0
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                n += 1
+        with self._lock:
+            self.failed += n
+
+    def _run(self):
+        if not self.ready.is_set() and not self._init_with_retry():
+            self._drain()
+            return
+        batch: List[dict] = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _flush(self, batch: List[dict]):
+        try:
+            self.writer(batch)
+            ok, bad = len(batch), 0
+        except Exception as e:  # 기록 실패가 API를 죽이지 않도록
+            print(f"[WARN] event sink write failed ({len(batch)} events): {e}")
+            ok, bad = 0, len(batch)
+        with self._lock:
+            self.written += ok
+            self.failed += bad
+            self.batches += 1
@@ -0,0 +1,54 @@
+# /metrics/stream (SSE) 페이로드 계산.
+# 연결마다 LiveMetrics 하나: 틱마다 누적 카운터의 차이를 최근 window 틱만큼 들고 있어서
+# 전체 이력을 다시 읽지 않고 창 단위 CTR을 O(k) 로 갱신한다.
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def _num(x: float) -> Optional[float]:
+    # JSON에 NaN 대신 null
+    return float(x) if np.isfinite(x) else None
+
+
+class LiveMetrics:
+    def __init__(self, arms: List[str], window: int = 30):
+        self.arms = list(arms)
+        self._prev: Optional[np.ndarray] = None
+        self._deltas: "deque[np.ndarray]" = deque(maxlen=window)
+        self._win = np.zeros((len(self.arms), 3))
+
+    def tick(self, ts: float, totals: np.ndarray,
+             posterior: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
+        """
+        totals: (k, 3) 누적 [노출, 클릭, 보상 합], posterior: (alpha, beta) 또는 None(컨텍스트 정책)
+        반환: arm별 누적 노출/보상, 트래픽 비중, 창 CTR, 첫 arm 대비 CTR 차이(lift), 사후분포
+        """
+        delta = np.zeros_like(totals) if self._prev is None else totals - self._prev
+        self._prev = totals.copy()
+        if len(self._deltas) == self._deltas.maxlen:
+            self._win -= self._deltas[0]
+        self._deltas.append(delta)
+        self._win += delta
+
+        exposures = totals[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = exposures / exposures.sum()
+            ctr = self._win[:, 2] / self._win[:, 0]
+        lift = ctr - ctr[0]
+        arms = {}
+        for i, arm in enumerate(self.arms):
+            row = {
+                "exposures": int(exposures[i]),
+                "rewards": float(totals[i, 2]),
+                "share": _num(share[i]),
+                "ctr": _num(ctr[i]),
+                "lift": _num(lift[i]),
+            }
+            if posterior is not None:
+                a, b = float(posterior[0][i]), float(posterior[1][i])
+                row.update(alpha=a, beta=b, mean=a / (a + b))
+            arms[arm] = row
+        return {"ts": ts, "window_ticks": len(self._deltas), "arms": arms}
@@ -1,30 +1,426 @@
-from fastapi import FastAPI
-from .schemas import ChooseRequest, ChooseResponse, UpdateRequest
-from .bandit import ThompsonBandit
-from .mlflow_utils import log_online_event
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from .schemas import (ChooseBatchRequest, ChooseBatchResponse, ChooseRequest, ChooseResponse, ExposeRequest,
+                      UpdateBatchRequest, UpdateRequest)
+from .aggregates import AggregateReader, AggregateWriter
+from .bandit_state import make_state
+from .contextual import make_contextual
+from .policies import Guardrails, make_policy
+from .decisions import Decision, DecisionCache, new_decision_id
+from .event_sink import EventSink
+from .live import LiveMetrics
+from .metrics import PHASES, PhaseTimer, gauge
+from .mlflow_utils import MlflowEventWriter
+from .storage import EventStore, KIND_CLICK, KIND_EXPOSURE, build_records
+from .snapshot import Snapshotter, restore
+from .sequential import SequentialTest
+from .response_cache import ResponseCache, make_key
 from . import config
 import variants.variant_a as A
 import variants.variant_b as B
-from typing import Dict
+from variants.catalog import reload_catalog
+from typing import Dict, Tuple
+import numpy as np
 
-ARMS = {"A": A.serve, "B": B.serve}
-bandit = ThompsonBandit(list(ARMS.keys()), discount=config.DISCOUNT)
+try:
+    import orjson  # noqa: F401  (있으면 ORJSONResponse 사용)
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
 
-app = FastAPI(title="MAB+MLflow Online API")
+VARIANTS = {"A": A, "B": B}
+ARMS = {arm: v.serve for arm, v in VARIANTS.items()}
+if config.BANDIT_MODE == "mab":
+    bandit = make_policy(
+        config.BANDIT_POLICY, list(ARMS.keys()),
+        epsilon=config.EPSILON, ucb_c=config.UCB_C, klucb_c=config.KLUCB_C, split=config.AB_SPLIT,
+        guardrails=Guardrails(config.MIN_EXPOSURE, config.MAX_CAP),
+        discount=config.DISCOUNT,
+        propensity_samples=config.PROPENSITY_SAMPLES, propensity_refresh=config.PROPENSITY_REFRESH_MS / 1000,
+        state=make_state(config.BANDIT_STATE_BACKEND, list(ARMS.keys()), config.BANDIT_STATE_PATH),
+    )
+else:
+    # 컨텍스트 정책 상태는 프로세스 메모리에만 있다(이벤트 로그에 컨텍스트가 없어 재생 불가)
+    bandit = make_contextual(
+        config.BANDIT_MODE, list(ARMS.keys()),
+        segment_keys=config.SEGMENT_KEYS, max_segments=config.MAX_SEGMENTS,
+        dim=config.CONTEXT_DIM, alpha=config.LINUCB_ALPHA, v=config.LINTS_V,
+        discount=config.DISCOUNT, propensity_samples=config.PROPENSITY_SAMPLES,
+    )
+
+if config.EVENT_STORE_FSYNC == "always":
+    # append는 async 핸들러에서 동기로 호출된다 → 블록마다 fsync하면 그동안 이벤트 루프 전체가 멈춘다
+    raise ValueError("EVENT_STORE_FSYNC=always blocks the event loop on every block write; "
+                     "use interval (flusher thread fsyncs every EVENT_STORE_FLUSH_SECS) or never")
+store = EventStore(
+    config.EVENT_STORE_DIR,
+    list(ARMS.keys()),
+    max_segment_bytes=config.EVENT_STORE_SEGMENT_MB << 20,
+    block_records=config.EVENT_STORE_BLOCK_RECORDS,
+    fsync=config.EVENT_STORE_FSYNC,
+    flush_secs=config.EVENT_STORE_FLUSH_SECS,
+)
+
+decisions = DecisionCache(config.DECISION_CACHE_SIZE)
+responses = ResponseCache(config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL)
+aggregates = AggregateWriter(config.AGG_DB_PATH, list(ARMS.keys()),
+                             bucket_secs=config.AGG_BUCKET_SECS, flush_secs=config.AGG_FLUSH_SECS)
+# 순차 검정 통계는 이 워커 기준(집계와 같은 지점에서 갱신), 시작 시 SQLite 집계에서 복원
+experiment = SequentialTest(list(ARMS.keys()), config.SEQ_CONTROL, alpha=config.SEQ_ALPHA, tau=config.SEQ_TAU,
+                            min_samples=config.SEQ_MIN_SAMPLES, cusum_k=config.CUSUM_K, cusum_h=config.CUSUM_H)
+
+# 이벤트 기록 + 밴딧 갱신을 한 단위로 묶는다(스냅샷 시점 일관성)
+_commit_lock = threading.Lock()
+snapshotter = None
+if config.BANDIT_MODE == "mab" and config.BANDIT_STATE_BACKEND == "local" and config.SNAPSHOT_SECS > 0:
+    snapshotter = Snapshotter(bandit, store, config.SNAPSHOT_PATH, config.SNAPSHOT_SECS, _commit_lock)
+
+# MLflow 연결은 워커 스레드에서 지연/재시도(init) → 서버가 없어도 API는 바로 뜨고 이벤트는 큐에서 대기
+_writer = MlflowEventWriter()
+sink = EventSink(
+    _writer.write,
+    maxsize=config.EVENT_QUEUE_SIZE,
+    batch_size=config.EVENT_BATCH_SIZE,
+    flush_interval=config.EVENT_FLUSH_SECS,
+    on_close=_writer.close,
+    init=_writer.connect,
+    retry_initial=config.MLFLOW_RETRY_SECS,
+    retry_max=config.MLFLOW_RETRY_MAX_SECS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if snapshotter is not None:
+        info = restore(bandit, config.SNAPSHOT_PATH, config.EVENT_STORE_DIR)
+        print(f"[INFO] bandit restored: {info}")
+        snapshotter.start()
+    _seed_experiment()
+    store.start_flusher()
+    aggregates.start_flusher()
+    sink.start()
+    yield
+    sink.close()   # 남은 이벤트 flush 후 run 종료
+    if snapshotter is not None:
+        snapshotter.stop()   # 마지막 스냅샷
+    store.close()
+    aggregates.close()
+
+
+def _seed_experiment():
+    totals = np.zeros((len(ARMS), 3))
+    for bucket, arm, exposures, clicks, reward_sum, _ in AggregateReader(config.AGG_DB_PATH).read_new():
+        if bucket >= config.SEQ_SINCE and arm in experiment.index:
+            totals[experiment.index[arm]] += (exposures, clicks, reward_sum)
+    experiment.seed(totals)
+    _maybe_conclude()
+
+
+def _maybe_conclude():
+    # ab 정책 + AB_AUTO_STOP: 검정이 결론나면 승자에 전체 트래픽(한 번만)
+    if config.AB_AUTO_STOP and getattr(bandit, "winner", False) is None and experiment.conclusive:
+        winner = experiment.decision()["winner"]
+        bandit.conclude(winner)
+        print(f"[INFO] experiment concluded: routing all traffic to {winner}")
+
+
+# 핸들러는 모두 async: 밴딧 선택/갱신과 이벤트 버퍼 기록은 수 µs~수백 µs 의 CPU 작업이라
+# 스레드풀로 넘기지 않고 이벤트 루프에서 바로 처리한다. _commit_lock 구간 안에는 await가 없고
+# 디스크 fsync는 저장소 flusher 스레드, MLflow 기록은 싱크 워커 스레드가 맡는다.
+# 응답은 dict → FastJSONResponse 로 바로 직렬화(response_model은 문서용, 재검증 생략)
+app = FastAPI(title="MAB+MLflow Online API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+
+def _serve(arm: str, user_id: str, context):
+    v = VARIANTS[arm]
+    key = make_key(arm, user_id, context, getattr(v, "CACHE_SCOPE", "context"))
+    return responses.get(key, v.version(), lambda: v.serve(user_id, context))
+
+def _want_debug(flag) -> bool:
+    return config.CHOOSE_DEBUG if flag is None else flag
 
 @app.get("/health")
-def health():
-    return {"status":"ok","arms":list(ARMS.keys())}
+async def health():
+    return {"status":"ok","arms":list(ARMS.keys()),"events":sink.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text format. 히스토그램 외 값은 스크레이프 시점에 각 객체에서 읽는다(요청 경로 비용 없음)."""
+    arms = list(ARMS.keys())
+    totals = aggregates.totals()
+    ev = sink.stats()
+    lines = PHASES.render()
+    for j, (name, help) in enumerate((("policy_exposures_total", "Exposures served by this worker"),
+                                      ("policy_clicks_total", "Rewarded updates (reward > 0) by this worker"),
+                                      ("policy_reward_total", "Sum of rewards received by this worker"))):
+        lines += gauge(name, help, (({"arm": a}, totals[i, j]) for i, a in enumerate(arms)), kind="counter")
+    if hasattr(bandit, "posterior"):
+        alpha, beta = bandit.posterior()
+        lines += gauge("bandit_alpha", "Beta posterior alpha", (({"arm": a}, alpha[i]) for i, a in enumerate(arms)))
+        lines += gauge("bandit_beta", "Beta posterior beta", (({"arm": a}, beta[i]) for i, a in enumerate(arms)))
+        lines += gauge("bandit_exposures", "Exposure count in bandit state",
+                       (({"arm": a}, n) for a, n in bandit.n.items()))
+    lines += gauge("event_sink_queue_depth", "Events waiting for the MLflow writer", [({}, ev["queued"])])
+    for key in ("enqueued", "dropped", "written", "failed"):
+        lines += gauge(f"event_sink_{key}_total", f"Event sink {key} events", [({}, ev[key])], kind="counter")
+    lines += gauge("event_sink_ready", "1 once the MLflow writer is connected", [({}, ev["ready"])])
+    lines += gauge("event_sink_init_failures_total", "Failed MLflow connection attempts",
+                   [({}, ev["init_failures"])], kind="counter")
+    lines += gauge("event_store_pending_records", "Records buffered before the next block write",
+                   [({}, store.pending)])
+    lines += gauge("aggregate_pending_buckets", "Time buckets not yet flushed to SQLite", [({}, aggregates.pending)])
+    lines += gauge("decision_cache_size", "Recent decisions kept for /update joins", [({}, len(decisions))])
+    rc = responses.stats()
+    lines += gauge("response_cache_hits_total", "Variant responses served from cache",
+                   (({"arm": a}, rc["hits"].get(a, 0)) for a in arms), kind="counter")
+    lines += gauge("response_cache_misses_total", "Variant responses computed by serve()",
+                   (({"arm": a}, rc["misses"].get(a, 0)) for a in arms), kind="counter")
+    for key in ("evictions", "expired", "invalidated"):
+        lines += gauge(f"response_cache_{key}_total", f"Response cache entries {key}", [({}, rc[key])],
+                       kind="counter")
+    lines += gauge("response_cache_size", "Cached variant responses", [({}, rc["size"])])
+    treatments = [(a, i) for a, i in experiment.index.items() if i != experiment.c]
+    lines += gauge("experiment_p_value", "Always-valid mSPRT p-value vs control",
+                   (({"arm": a}, experiment.p_value[i]) for a, i in treatments))
+    lines += gauge("experiment_conclusive", "1 once any arm differs from control at SEQ_ALPHA",
+                   [({}, experiment.conclusive)])
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/stream")
+async def metrics_stream(request: Request, interval: float = config.METRICS_STREAM_SECS,
+                         window: int = config.METRICS_STREAM_WINDOW):
+    """
+    Server-Sent Events: interval초마다 arm별 사후분포/트래픽 비중/창 CTR을 push.
+    값은 이 워커 기준(누적 카운터는 워커별, mmap 백엔드의 사후분포는 전체 공유).
+    """
+    live = LiveMetrics(bandit.arms, max(1, window))
+    interval = max(0.2, interval)
+
+    async def events():
+        while not await request.is_disconnected():
+            posterior = bandit.posterior() if hasattr(bandit, "posterior") else None
+            payload = live.tick(time.time(), aggregates.totals(), posterior)
+            yield f"data: {json.dumps(payload)}\n\n"
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/experiment/decision")
+async def experiment_decision():
+    """순차 검정의 현재 판단(continue | stop, 승자)과 arm별 통계. 언제 조회해도 1종 오류는 SEQ_ALPHA 이하."""
+    out = experiment.decision()
+    out["policy"] = getattr(bandit, "name", config.BANDIT_MODE)
+    out["routed_to"] = getattr(bandit, "winner", None)
+    return out
+
+def _reload_variants() -> Dict[str, str]:
+    reload_catalog()
+    for v in VARIANTS.values():
+        v.reload()
+    # 버전이 바뀐 항목은 조회 시에도 무효화되지만, 옛 카탈로그 객체를 붙잡지 않도록 바로 비운다
+    responses.invalidate()
+    return {arm: str(v.version()) for arm, v in VARIANTS.items()}
+
+@app.post("/variants/reload")
+async def variants_reload():
+    """재시작 없이 카탈로그/variant 모델 산출물을 다시 읽는다(전처리·재학습 후). 응답 캐시는 비워진다."""
+    versions = await asyncio.to_thread(_reload_variants)
+    return {"versions": versions, "response_cache": responses.stats()}
+
+def _log_exposure(ts: float, user_id: str, arm: str, item_id, propensity: float, decision_id: int, context):
+    """노출 한 건을 이벤트 저장소/정책 n/집계/순차 검정/결정 캐시에 기록."""
+    with _commit_lock:
+        store.append(ts, user_id, arm, item_id=item_id, propensity=propensity, kind=KIND_EXPOSURE,
+                     decision_id=decision_id)
+        bandit.record_exposure(arm, context=context)
+    aggregates.add_exposure(ts, arm)
+    experiment.add_exposure(arm)
+    decisions.put(decision_id, Decision(arm, propensity, ts, context))
+
 
 @app.post("/choose", response_model=ChooseResponse)
-def choose(req: ChooseRequest):
-    arm, samples = bandit.choose()
-    items = ARMS[arm](req.user_id, req.context)
-    resp = {"arm": arm, "items": items, "debug": {"samples": samples}}
-    return resp
+async def choose(req: ChooseRequest):
+    """record=False(프리페치)면 결정만 만들고 노출은 기록하지 않는다 → 보여 줄 때 /expose."""
+    t = PhaseTimer(PHASES, "choose")
+    arm, samples = bandit.choose(req.context, record=False)
+    propensity = float(bandit.propensities(req.context)[bandit.index[arm]])
+    t.mark("sample")
+    items = _serve(arm, req.user_id, req.context)
+    t.mark("serve")
+    decision_id = new_decision_id()
+    if req.record:
+        _log_exposure(time.time(), req.user_id, arm, items[0]["item_id"] if items else None, propensity,
+                      decision_id, req.context)
+    t.mark("log")
+    resp = {"arm": arm, "items": items, "decision_id": str(decision_id), "propensity": propensity}
+    if _want_debug(req.debug):
+        resp["debug"] = {"samples": samples}
+    t.done()
+    return FastJSONResponse(resp)
+
+
+@app.post("/expose")
+async def expose(req: ExposeRequest):
+    """
+    record=False 로 받은 결정을 실제로 보여 줬을 때 노출로 기록한다.
+    결정 캐시에 의존하지 않으므로(값을 그대로 돌려받음) 다른 워커로 가도 된다.
+    """
+    if req.arm not in bandit.index:
+        raise HTTPException(status_code=400, detail=f"unknown arm: {req.arm}")
+    try:
+        decision_id = int(req.decision_id)
+    except ValueError:
+        decision_id = 0
+    if decision_id <= 0:
+        raise HTTPException(status_code=400, detail="invalid decision_id")
+    _log_exposure(time.time(), req.user_id, req.arm, req.item_id, req.propensity, decision_id, req.context)
+    return FastJSONResponse({"ok": True})
+
+
+def _resolve(req: UpdateRequest) -> Tuple[int, float, Dict]:
+    """decision_id → (id, 노출 시 propensity, 컨텍스트). 캐시에 없으면 propensity는 NaN."""
+    decision_id, propensity, context = 0, float("nan"), req.context
+    if req.decision_id:
+        try:
+            decision_id = int(req.decision_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid decision_id")
+        d = decisions.get(decision_id)
+        if d is not None:
+            if d.arm != req.arm:
+                raise HTTPException(status_code=400, detail=f"arm {req.arm} does not match decision arm {d.arm}")
+            propensity = d.propensity
+            context = d.context if d.context is not None else context
+    return decision_id, propensity, context
+
+
+def _event(ts: float, req: UpdateRequest, propensity: float) -> dict:
+    meta = dict(req.meta or {})
+    if propensity == propensity:   # NaN이 아니면
+        meta["propensity"] = propensity
+    return {"ts": ts, "arm": req.arm, "reward": req.reward, "meta": meta}
+
 
 @app.post("/update")
-def update(req: UpdateRequest):
-    bandit.update(req.arm, req.reward)
-    log_online_event(arm=req.arm, reward=req.reward, meta=req.meta, samples=None)
-    return {"ok": True}
+async def update(req: UpdateRequest):
+    if req.arm not in bandit.index:
+        raise HTTPException(status_code=400, detail=f"unknown arm: {req.arm}")
+    t = PhaseTimer(PHASES, "update")
+    ts = time.time()
+    decision_id, propensity, context = _resolve(req)
+    t.mark("resolve")
+    with _commit_lock:
+        store.append(ts, req.user_id, req.arm, item_id=req.item_id, reward=req.reward,
+                     propensity=propensity, kind=KIND_CLICK, decision_id=decision_id)
+        bandit.update(req.arm, req.reward, context)
+    t.mark("commit")
+    aggregates.add_reward(ts, req.arm, req.reward)
+    experiment.add_reward(req.arm, req.reward)
+    _maybe_conclude()
+    sink.submit(_event(ts, req, propensity))
+    t.mark("log")
+    t.done()
+    return FastJSONResponse({"ok": True})
+
+
+def _check_batch(n: int):
+    if n > config.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"batch too large: {n} > {config.BATCH_MAX_SIZE}")
+
+
+@app.post("/choose/batch", response_model=ChooseBatchResponse)
+async def choose_batch(req: ChooseBatchRequest):
+    """
+    여러 결정을 한 번에: mab 모드는 같은 파라미터 스냅샷에서 한 번에 뽑고(choose_batch),
+    노출 로그는 블록 하나로 기록한다. 컨텍스트 모드는 요청별 선택(HTTP/검증 비용만 절약).
+    개별 요청의 record는 무시한다(배치는 항상 노출로 기록).
+    """
+    reqs = req.requests
+    _check_batch(len(reqs))
+    t = PhaseTimer(PHASES, "choose_batch")
+    n = len(reqs)
+    if n == 0:
+        return FastJSONResponse({"results": []})
+    want_debug = _want_debug(req.debug)
+    if config.BANDIT_MODE == "mab":
+        idx, scores = bandit.choose_batch(n, record=False)
+        arms = [bandit.arms[i] for i in idx]
+        props = bandit.propensities()[idx].tolist()
+        debug = ([{"samples": dict(zip(bandit.arms, row))} for row in scores.tolist()] if want_debug
+                 else [None] * n)
+    else:
+        arms, props, debug = [], [], []
+        for r in reqs:
+            arm, samples = bandit.choose(r.context, record=False)
+            arms.append(arm)
+            props.append(float(bandit.propensities(r.context)[bandit.index[arm]]))
+            debug.append({"samples": samples} if want_debug else None)
+    t.mark("sample")
+    items = [_serve(arm, r.user_id, r.context) for arm, r in zip(arms, reqs)]
+    t.mark("serve")
+    ts = time.time()
+    ids = [new_decision_id() for _ in range(n)]
+    records = build_records(ts, [r.user_id for r in reqs], [store.arm_index[a] for a in arms], KIND_EXPOSURE,
+                            item_ids=[it[0]["item_id"] if it else None for it in items],
+                            propensities=props, decision_ids=ids)
+    with _commit_lock:
+        store.append_many(records)
+        if config.BANDIT_MODE == "mab":
+            bandit.record_exposures(idx)
+        else:
+            for arm, r in zip(arms, reqs):
+                bandit.record_exposure(arm, context=r.context)
+    arm_idx = records["arm"].astype(np.intp)
+    aggregates.add_exposures(ts, arm_idx)
+    experiment.add_exposures(np.bincount(arm_idx, minlength=len(ARMS)))
+    for did, arm, p, r in zip(ids, arms, props, reqs):
+        decisions.put(did, Decision(arm, p, ts, r.context))
+    t.mark("log")
+    results = []
+    for arm, it, did, p, dbg in zip(arms, items, ids, props, debug):
+        res = {"arm": arm, "items": it, "decision_id": str(did), "propensity": p}
+        if dbg is not None:
+            res["debug"] = dbg
+        results.append(res)
+    t.done()
+    return FastJSONResponse({"results": results})
+
+
+@app.post("/update/batch")
+async def update_batch(req: UpdateBatchRequest):
+    """보상 배열을 검증 후 한 번에 기록/갱신. 하나라도 잘못되면 아무것도 반영하지 않는다(400)."""
+    events = req.events
+    _check_batch(len(events))
+    for e in events:
+        if e.arm not in bandit.index:
+            raise HTTPException(status_code=400, detail=f"unknown arm: {e.arm}")
+    t = PhaseTimer(PHASES, "update_batch")
+    resolved = [_resolve(e) for e in events]
+    t.mark("resolve")
+    ts = time.time()
+    records = build_records(ts, [e.user_id for e in events], [store.arm_index[e.arm] for e in events],
+                            KIND_CLICK, item_ids=[e.item_id for e in events],
+                            rewards=[e.reward for e in events],
+                            propensities=[p for _, p, _ in resolved],
+                            decision_ids=[d for d, _, _ in resolved])
+    with _commit_lock:
+        store.append_many(records)
+        if config.BANDIT_MODE == "mab":
+            bandit.update_batch([e.arm for e in events], [e.reward for e in events])
+        else:
+            for e, (_, _, ctx) in zip(events, resolved):
+                bandit.update(e.arm, e.reward, ctx)
+    t.mark("commit")
+    arm_idx, rewards = records["arm"].astype(np.intp), records["reward"].astype(np.float64)
+    aggregates.add_rewards(ts, arm_idx, rewards)
+    experiment.add_rewards(arm_idx, rewards)
+    _maybe_conclude()
+    sink.submit_many([_event(ts, e, p) for e, (_, p, _) in zip(events, resolved)])
+    t.mark("log")
+    t.done()
+    return FastJSONResponse({"ok": True, "n": len(events)})
@@ -0,0 +1,110 @@
+# /metrics (Prometheus text format) 용 경량 계측.
+# - 히스토그램은 스레드별 샤드(threading.local)에만 쓴다: 요청 경로에 락/원자 연산 없음
+#   샤드는 스레드가 처음 기록할 때 한 번만 등록되고, 스크레이프 때 모든 샤드를 합산한다
+#   (합산 중 다른 스레드가 쓰는 값은 다음 스크레이프에 반영 — 카운터는 단조 증가라 문제없음)
+# - 그 밖의 값(arm별 카운터, 큐 깊이, 사후분포)은 스크레이프 시점에 기존 객체에서 읽는 게이지로 만든다
+
+import bisect
+import threading
+from time import perf_counter as _now
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# 초 단위 버킷(50µs ~ 1s)
+DEFAULT_BUCKETS = (5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+Labels = Tuple[str, ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, List[float]]] = []
+        self._register = threading.Lock()   # 스레드당 첫 기록 때만 사용
+
+    def _shard(self) -> Dict[Labels, List[float]]:
+        shard = getattr(self._local, "d", None)
+        if shard is None:
+            shard = self._local.d = {}
+            with self._register:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, labels: Labels, value: float):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # [버킷별 개수..., +Inf 개수, 합]
+            cell = shard[labels] = [0.0] * (len(self.buckets) + 2)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        with self._register:
+            shards = list(self._shards)
+        total: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            for labels, cell in list(shard.items()):
+                acc = total.setdefault(labels, [0.0] * len(cell))
+                for i, v in enumerate(cell):
+                    acc[i] += v
+        return total
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, cell in sorted(self.collect().items()):
+            base = _labels(self.labelnames, labels)
+            cum = 0.0
+            for le, n in zip(self.buckets + (float("inf"),), cell[:-1]):
+                cum += n
+                le_s = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{le_s}"}} {cum:g}')
+            lines.append(f"{self.name}_count{{{base}}} {cum:g}")
+            lines.append(f"{self.name}_sum{{{base}}} {cell[-1]!r}")
+        return lines
+
+
+class PhaseTimer:
+    """
+    엔드포인트 한 번의 구간별 시간 기록.
+        t = PhaseTimer(PHASES, "choose"); ...; t.mark("sample"); ...; t.mark("serve"); t.done()
+    mark는 직전 mark 이후 경과 시간을, done은 전체 시간을 phase="total"로 기록한다.
+    """
+
+    __slots__ = ("hist", "endpoint", "start", "last")
+
+    def __init__(self, hist: Histogram, endpoint: str):
+        self.hist = hist
+        self.endpoint = endpoint
+        self.start = self.last = _now()
+
+    def mark(self, phase: str):
+        now = _now()
+        self.hist.observe((self.endpoint, phase), now - self.last)
+        self.last = now
+
+    def done(self):
+        self.hist.observe((self.endpoint, "total"), _now() - self.start)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in zip(names, values))
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def gauge(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]], kind: str = "gauge") -> List[str]:
+    """스크레이프 시점 값 → Prometheus 텍스트 줄. samples: ({라벨: 값}, 숫자)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        base = _labels(list(labels), list(labels.values()))
+        lines.append(f"{name}{{{base}}} {float(value)!r}" if base else f"{name} {float(value)!r}")
+    return lines
+
+
+PHASES = Histogram("policy_phase_seconds", "Policy API latency by endpoint and phase", ("endpoint", "phase"))
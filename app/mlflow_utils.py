@@ -1,10 +1,29 @@
-import mlflow, time
-from .config import MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT
+# MLflow 기록 백엔드.
+# mlflow는 import만으로도 무겁고 set_experiment는 트래킹 서버에 요청을 보내므로, 이 모듈은 import 시점에
+# mlflow를 건드리지 않는다. 연결은 MlflowEventWriter.connect()가 처음 필요할 때(이벤트 싱크 워커 스레드에서)
+# 수행하고, 실패하면 싱크가 재시도하는 동안 이벤트는 큐에 쌓인다 → API는 MLflow 상태와 무관하게 바로 뜬다.
+
+import time
+from functools import lru_cache
+
+from .config import MLFLOW_TRACKING_URI, MLFLOW_EXPERIMENT, EVENT_RUN_MAX_EVENTS
+
+# log_batch 한 번에 보낼 수 있는 metric 최대 개수(MLflow 제한)
+MAX_METRICS_PER_BATCH = 1000
+
+
+@lru_cache(maxsize=1)
+def _fluent():
+    # 레거시 fluent API용: 처음 쓸 때 한 번만 import/설정
+    import mlflow
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+    return mlflow
 
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-mlflow.set_experiment(MLFLOW_EXPERIMENT)
 
 def log_online_event(arm: str, reward: float, meta: dict | None = None, samples: dict | None = None):
+    # 이벤트 1건 = run 1개 (레거시/디버깅용). 온라인 경로는 MlflowEventWriter 사용.
+    mlflow = _fluent()
     with mlflow.start_run(run_name=f"{arm}_{int(time.time())}", nested=False):
         mlflow.log_param("arm", arm)
         mlflow.log_metric("reward", reward)
@@ -17,3 +36,85 @@ def log_online_event(arm: str, reward: float, meta: dict | None = None, samples:
                     mlflow.log_metric(str(k), float(v))
                 else:
                     mlflow.set_tag(str(k), str(v))
+
+
+class MlflowEventWriter:
+    """
+    arm별로 오래 유지되는 run에 이벤트를 step 단위 metric으로 배치 기록한다.
+    - run 하나에 reward 히스토리가 쌓이므로 분석 시에는 metric history를 읽는다.
+    - 숫자형 meta는 같은 step의 metric으로 기록, 문자열 meta는 run 단위 tag로 남길 수 없어 생략.
+    - run당 이벤트가 max_events를 넘으면 종료하고 새 run을 연다.
+    - connect() 전에는 mlflow를 import하지 않는다(EventSink의 init으로 넘겨 재시도).
+    """
+
+    def __init__(self, tracking_uri: str = MLFLOW_TRACKING_URI, experiment: str = MLFLOW_EXPERIMENT,
+                 max_events: int = EVENT_RUN_MAX_EVENTS):
+        self.tracking_uri = tracking_uri
+        self.experiment = experiment
+        self.max_events = max_events
+        self.client = None
+        self.experiment_id = None
+        self._runs: dict[str, list] = {}   # arm -> [run_id, 다음 step]
+
+    def connect(self):
+        """mlflow import + 실험 조회/생성. 서버가 없으면 예외(호출자가 재시도)."""
+        if self.client is not None:
+            return
+        from mlflow.tracking import MlflowClient
+        client = MlflowClient(tracking_uri=self.tracking_uri)
+        exp = client.get_experiment_by_name(self.experiment)
+        self.experiment_id = exp.experiment_id if exp is not None else client.create_experiment(self.experiment)
+        self.client = client
+
+    def _run_for(self, arm: str):
+        cur = self._runs.get(arm)
+        if cur is None or cur[1] >= self.max_events:
+            if cur is not None:
+                self.client.set_terminated(cur[0])
+            run = self.client.create_run(
+                self.experiment_id,
+                run_name=f"online_{arm}_{int(time.time())}",
+                tags={"source": "event_sink"},
+            )
+            from mlflow.entities import Param
+            self.client.log_batch(run.info.run_id, params=[Param("arm", arm)])
+            cur = self._runs[arm] = [run.info.run_id, 0]
+        return cur
+
+    def write(self, events: list[dict]):
+        from mlflow.entities import Metric
+        self.connect()
+        by_arm: dict[str, list[dict]] = {}
+        for ev in events:
+            by_arm.setdefault(ev["arm"], []).append(ev)
+
+        for arm, evs in by_arm.items():
+            metrics: list = []
+            for ev in evs:
+                cur = self._run_for(arm)
+                step = cur[1]
+                cur[1] += 1
+                ts = int(ev.get("ts", time.time()) * 1000)
+                metrics.append(Metric("reward", float(ev["reward"]), ts, step))
+                for k, v in (ev.get("samples") or {}).items():
+                    metrics.append(Metric(f"sample_{k}", float(v), ts, step))
+                for k, v in (ev.get("meta") or {}).items():
+                    if isinstance(v, (int, float)) and not isinstance(v, bool):
+                        metrics.append(Metric(str(k), float(v), ts, step))
+                # run 교체 직전이면 지금까지 모은 것을 먼저 보낸다
+                if cur[1] >= self.max_events:
+                    self._flush(cur[0], metrics)
+                    metrics = []
+            if metrics:
+                self._flush(self._runs[arm][0], metrics)
+
+    def _flush(self, run_id: str, metrics: list):
+        for i in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+            self.client.log_batch(run_id, metrics=metrics[i:i + MAX_METRICS_PER_BATCH])
+
+    def close(self):
+        if self.client is None:
+            return
+        for run_id, _ in self._runs.values():
+            self.client.set_terminated(run_id)
+        self._runs.clear()
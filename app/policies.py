@@ -0,0 +1,211 @@
+# 비컨텍스트(mab) 정책 모음 + 가드레일. 설정(BANDIT_POLICY)으로 고른다.
+# - 모든 정책은 BetaBernoulliPolicy(app.bandit)를 상속: 같은 state 버퍼 [scale, a(k), b(k), n(k)],
+#   같은 감쇠/배치 갱신/스냅샷 경로를 쓰고 점수 계산(_scores)만 다르다
+# - 통계는 사후분포 파라미터에서 바로 계산: 유효 관측 수 = alpha + beta (Beta(1,1) 사전 의사관측 2건 포함),
+#   평균 = alpha / (alpha + beta). 감쇠(BANDIT_DISCOUNT)도 그대로 반영된다
+# - 결정적 정책(UCB1, KL-UCB)의 propensity는 1/0, epsilon-greedy와 A/B 고정 분할은 해석식, 톰슨은 몬테카를로
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .bandit import BetaBernoulliPolicy, ThompsonBandit, _mask
+
+_KL_EPS = 1e-12
+_BISECT_ITERS = 12
+_NEWTON_ITERS = 2
+
+
+class Guardrails:
+    """
+    - min_exposure: 노출 수가 이 값보다 적은 arm이 있으면 그 arm들 중에서만 고른다(강제 탐색)
+    - max_cap     : 누적 노출 비중이 이 값 이상인 arm은 후보에서 뺀다(1 이상이면 끔)
+    제한이 없으면 allowed()는 None.
+    """
+
+    def __init__(self, min_exposure: int = 0, max_cap: float = 1.0):
+        self.min_exposure = min_exposure
+        self.max_cap = max_cap
+
+    def allowed(self, n: np.ndarray) -> Optional[np.ndarray]:
+        if self.min_exposure > 0:
+            low = n < self.min_exposure
+            if low.any():
+                return low
+        if self.max_cap < 1.0:
+            total = n.sum()
+            if total > 0:
+                ok = n < self.max_cap * total
+                if ok.any() and not ok.all():
+                    return ok
+        return None
+
+
+def _kl(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    return p * np.log(p / q) + (1 - p) * np.log((1 - p) / (1 - q))
+
+
+def _one_hot(scores: np.ndarray, allowed: Optional[np.ndarray]) -> np.ndarray:
+    p = np.zeros(len(scores))
+    p[int(np.argmax(_mask(scores, allowed)))] = 1.0
+    return p
+
+
+class UCB1(BetaBernoulliPolicy):
+    """점수 = 평균 + c * sqrt(2 ln N / n_a). 결정적 정책."""
+
+    name = "ucb1"
+    exact_propensities = True
+
+    def __init__(self, arms: List[str], c: float = 1.0, **kw):
+        super().__init__(arms, **kw)
+        self.c = c
+
+    def _index(self, alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+        n = alpha + beta
+        return alpha / n + self.c * np.sqrt(2.0 * np.log(n.sum()) / n)
+
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        return np.broadcast_to(self._index(alpha, beta), (m, len(alpha)))
+
+    def _propensities(self, alpha, beta, allowed):
+        return _one_hot(self._index(alpha, beta), allowed)
+
+
+class KLUCB(BetaBernoulliPolicy):
+    """
+    점수 = max{q : n_a * KL(평균_a, q) <= ln N + c ln ln N} (Bernoulli KL).
+    구간 [p, Pinsker 상한 p + sqrt(bound/2)] 을 이분해 좁힌 뒤 아래쪽 끝에서 뉴턴법으로 마무리한다
+    (KL(p, q)는 q > p 에서 볼록 증가, 이분 구간 안으로 클립). arm 전체를 한 번에 계산, 결정적 정책.
+    """
+
+    name = "klucb"
+    exact_propensities = True
+
+    def __init__(self, arms: List[str], c: float = 0.0, **kw):
+        super().__init__(arms, **kw)
+        self.c = c
+        self._index_cache: Tuple[bytes, np.ndarray] | None = None   # choose와 propensities가 같은 값을 재사용
+
+    def _index(self, alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+        key = alpha.tobytes() + beta.tobytes()
+        cache = self._index_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        n = alpha + beta
+        p = np.clip(alpha / n, _KL_EPS, 1 - _KL_EPS)
+        log_t = np.log(n.sum())
+        bound = (log_t + self.c * np.log(max(log_t, 1.0))) / n
+        lo, hi = p, np.minimum(p + np.sqrt(bound / 2), 1 - _KL_EPS)
+        for _ in range(_BISECT_ITERS):
+            q = (lo + hi) / 2
+            under = _kl(p, q) <= bound
+            lo = np.where(under, q, lo)
+            hi = np.where(under, hi, q)
+        q = lo
+        for _ in range(_NEWTON_ITERS):
+            q = np.clip(q - (_kl(p, q) - bound) * q * (1 - q) / np.maximum(q - p, _KL_EPS), lo, hi)
+        self._index_cache = (key, q)
+        return q
+
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        return np.broadcast_to(self._index(alpha, beta), (m, len(alpha)))
+
+    def _propensities(self, alpha, beta, allowed):
+        return _one_hot(self._index(alpha, beta), allowed)
+
+
+class EpsilonGreedy(BetaBernoulliPolicy):
+    """
+    확률 epsilon으로 균등 탐색, 아니면 평균이 가장 높은 arm.
+    탐색 행은 균등 난수 점수로 채워서 가드레일 마스크가 있어도 후보 안에서 균등하게 고른다.
+    """
+
+    name = "egreedy"
+    exact_propensities = True
+
+    def __init__(self, arms: List[str], epsilon: float = 0.1, **kw):
+        if not 0.0 <= epsilon <= 1.0:
+            raise ValueError(f"epsilon must be in [0, 1], got {epsilon}")
+        super().__init__(arms, **kw)
+        self.epsilon = epsilon
+
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        k = len(alpha)
+        scores = np.empty((m, k))
+        scores[:] = alpha / (alpha + beta)
+        explore = self.rng.random(m) < self.epsilon
+        n_explore = int(explore.sum())
+        if n_explore:
+            scores[explore] = self.rng.random((n_explore, k))
+        return scores
+
+    def _propensities(self, alpha, beta, allowed):
+        k = len(alpha)
+        ok = np.ones(k, dtype=bool) if allowed is None else allowed
+        return self.epsilon * ok / ok.sum() + (1 - self.epsilon) * _one_hot(alpha / (alpha + beta), allowed)
+
+
+class FixedSplit(BetaBernoulliPolicy):
+    """
+    A/B 고정 분할: 사후분포와 무관하게 weights 비율로 배정(순차 검정 app.sequential 의 전제).
+    점수 = log w + Gumbel 잡음 → 행별 argmax가 weights 비율을 따른다(마스크가 있으면 후보 안에서 비율 유지).
+    conclude(arm)으로 실험 종료 후 승자에 전체 트래픽을 보낸다.
+    """
+
+    name = "ab"
+    exact_propensities = True
+
+    def __init__(self, arms: List[str], weights: Optional[Dict[str, float]] = None, **kw):
+        super().__init__(arms, **kw)
+        w = np.array([(weights or {}).get(a, 1.0 if not weights else 0.0) for a in self.arms], dtype=np.float64)
+        if (w < 0).any() or w.sum() <= 0:
+            raise ValueError(f"invalid A/B split weights: {weights}")
+        self.weights = w / w.sum()
+        self.winner: Optional[str] = None
+
+    def conclude(self, arm: str):
+        w = np.zeros(len(self.arms))
+        w[self.index[arm]] = 1.0
+        self.weights = w
+        self.winner = arm
+        self._prop_cache = None   # 사후분포는 그대로라 캐시 키로는 감지되지 않는다
+
+    def _scores(self, alpha: np.ndarray, beta: np.ndarray, m: int) -> np.ndarray:
+        with np.errstate(divide="ignore"):
+            log_w = np.log(self.weights)
+        return log_w + self.rng.gumbel(size=(m, len(self.arms)))
+
+    def _propensities(self, alpha, beta, allowed):
+        w = self.weights if allowed is None else self.weights * allowed
+        return w / w.sum() if w.sum() > 0 else _one_hot(self.weights, allowed)
+
+
+POLICIES = {
+    ThompsonBandit.name: ThompsonBandit,
+    UCB1.name: UCB1,
+    KLUCB.name: KLUCB,
+    EpsilonGreedy.name: EpsilonGreedy,
+    FixedSplit.name: FixedSplit,
+}
+
+
+def make_policy(name: str, arms: List[str], epsilon: float = 0.1, ucb_c: float = 1.0,
+                klucb_c: float = 0.0, split: Optional[Dict[str, float]] = None, **kw) -> BetaBernoulliPolicy:
+    """
+    name: thompson | ucb1 | klucb | egreedy | ab
+    kw  : discount, seed, state, propensity_samples, propensity_refresh, guardrails
+          (모든 정책 공통, ab는 가드레일 무시)
+    """
+    if name == "ab":
+        kw.pop("guardrails", None)   # 분할 비율 자체가 트래픽 정책(가드레일이 끼면 배정이 결과에 의존하게 됨)
+        return FixedSplit(arms, weights=split, **kw)
+    if name == "ucb1":
+        return UCB1(arms, c=ucb_c, **kw)
+    if name == "klucb":
+        return KLUCB(arms, c=klucb_c, **kw)
+    if name == "egreedy":
+        return EpsilonGreedy(arms, epsilon=epsilon, **kw)
+    if name == "thompson":
+        return ThompsonBandit(arms, **kw)
+    raise ValueError(f"unknown bandit policy: {name} (choose from {sorted(POLICIES)})")
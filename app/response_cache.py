@@ -0,0 +1,92 @@
+# variant serve() 응답 캐시.
+# - 키: (arm, user_id, 컨텍스트 해시). variant가 CACHE_SCOPE로 무엇에 의존하는지 알려 주면 키를 줄인다
+#     "arm"     : 유저/컨텍스트 무관(고정 목록) → arm당 한 칸
+#     "user"    : 유저별로만 다름(컨텍스트 무시)
+#     "context" : 유저 + 컨텍스트(기본값, 모르면 가장 안전한 쪽)
+# - 크기 제한 LRU + TTL(조회 시 만료 확인, 별도 청소 스레드 없음)
+# - 무효화: 항목마다 만들 때의 variant version()을 저장, 조회 시 현재 버전과 다르면 버리고 다시 계산
+#   (카탈로그/모델을 다시 읽으면 버전이 바뀌므로 재시작 없이 새 결과가 나간다)
+# - serve()는 락 밖에서 호출: 같은 키를 동시에 놓치면 두 번 계산될 수 있지만 결과는 같다
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def context_key(context: Optional[Dict[str, Any]]) -> str:
+    if not context:
+        return ""
+    return json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def make_key(arm: str, user_id: str, context: Optional[Dict[str, Any]], scope: str = "context") -> Tuple:
+    if scope == "arm":
+        return (arm, None, None)
+    if scope == "user":
+        return (arm, user_id, None)
+    return (arm, user_id, context_key(context))
+
+
+class ResponseCache:
+    """크기 제한 LRU + TTL (스레드 안전). maxsize <= 0 또는 ttl <= 0 이면 항상 다시 계산(비활성)."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = maxsize > 0 and ttl > 0
+        self._d: "OrderedDict[Tuple, Tuple[float, Hashable, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.expired = 0
+        self.invalidated = 0
+
+    def get(self, key: Tuple, version: Hashable, compute: Callable[[], List[Dict]]) -> List[Dict]:
+        """캐시된 응답(공유 객체, 수정 금지)을 돌려주거나 compute()로 만들어 넣는다."""
+        if not self.enabled:
+            return compute()
+        arm = key[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._d.get(key)
+            if entry is not None:
+                expires, v, value = entry
+                if v == version and now < expires:
+                    self._d.move_to_end(key)
+                    self.hits[arm] = self.hits.get(arm, 0) + 1
+                    return value
+                del self._d[key]
+                if v != version:
+                    self.invalidated += 1
+                else:
+                    self.expired += 1
+            self.misses[arm] = self.misses.get(arm, 0) + 1
+        value = compute()
+        with self._lock:
+            self._d[key] = (now + self.ttl, version, value)
+            self._d.move_to_end(key)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, arm: Optional[str] = None) -> int:
+        """arm(없으면 전부)의 항목을 지운다. 버전 비교로도 무효화되지만 메모리를 바로 돌려받을 때 쓴다."""
+        with self._lock:
+            keys = [k for k in self._d if arm is None or k[0] == arm]
+            for k in keys:
+                del self._d[k]
+            self.invalidated += len(keys)
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._d), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": dict(self.hits), "misses": dict(self.misses), "evictions": self.evictions,
+                    "expired": self.expired, "invalidated": self.invalidated}
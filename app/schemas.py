@@ -1,17 +1,50 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, List, Any
 
 class ChooseRequest(BaseModel):
     user_id: str
     context: Optional[Dict[str, Any]] = None
+    debug: Optional[bool] = None     # 응답에 debug(arm별 점수) 포함 여부, None이면 CHOOSE_DEBUG 설정
+    record: bool = True              # False면 노출을 기록하지 않는다(프리페치). 실제로 보여 줄 때 /expose 로 기록
+
+class Item(BaseModel):
+    item_id: int
+    title: str
+    genre: Optional[str] = None
+    genres: List[str] = []
 
 class ChooseResponse(BaseModel):
     arm: str
-    items: List[str]
-    debug: Dict[str, Any]
+    items: List[Item]
+    decision_id: str                 # /update 에 그대로 돌려주면 노출과 클릭이 조인됨
+    propensity: float                # 선택된 arm의 선택 확률
+    debug: Optional[Dict[str, Any]] = None
 
 class UpdateRequest(BaseModel):
     user_id: str
     arm: str
-    reward: float
+    reward: float = Field(ge=0.0, le=1.0)   # Bernoulli 보상(클릭 1, 미클릭 0), 범위 밖이면 422
+    item_id: Optional[int] = None
+    decision_id: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None   # decision_id를 못 찾을 때(다른 워커 등) 컨텍스트 정책용
     meta: Optional[Dict[str, Any]] = None
+
+class ExposeRequest(BaseModel):
+    # record=False 로 받아 둔 /choose 응답을 실제로 보여 줄 때 보낸다(응답 값을 그대로 돌려줌)
+    user_id: str
+    arm: str
+    decision_id: str
+    propensity: float = Field(gt=0.0, le=1.0)
+    item_id: Optional[int] = None
+    context: Optional[Dict[str, Any]] = None
+
+# 배치 엔드포인트(서버 간 호출/부하 테스트용): 요청 배열을 한 번에 처리
+class ChooseBatchRequest(BaseModel):
+    requests: List[ChooseRequest]
+    debug: Optional[bool] = None     # 배치 전체에 적용(개별 요청의 debug는 무시)
+
+class ChooseBatchResponse(BaseModel):
+    results: List[ChooseResponse]
+
+class UpdateBatchRequest(BaseModel):
+    events: List[UpdateRequest]
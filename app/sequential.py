@@ -0,0 +1,211 @@
+# A/B 실험 순차 검정(조기 종료 판단).
+# - arm별 충분통계(노출 수, 클릭 수, 보상 합)만 들고 이벤트마다 O(1)로 갱신, 전체 이력을 다시 읽지 않는다
+# - mSPRT(mixture SPRT, 정규 근사): 처리군-대조군 CTR 차이 theta에 N(0, tau^2) 혼합을 둔 우도비
+#     Lambda = sqrt(V / (V + tau^2)) * exp(theta_hat^2 tau^2 / (2 V (V + tau^2))),
+#     V = p_c(1-p_c)/n_c + p_t(1-p_t)/n_t
+#   항상 유효한(always-valid) p값 = 지금까지의 min(1 / Lambda) → 언제 들여다보고 멈춰도 1종 오류 <= alpha
+#   처리군이 여럿이면 Bonferroni(alpha / 처리군 수)
+# - 베이지안: Beta(1 + 클릭, 1 + 비클릭) 사후분포의 정규 근사로 P(처리군 > 대조군), 기대 손실
+# - CUSUM(Page): 처리군 노출/클릭 흐름에서 대조군 CTR 대비 위(+)/아래(-) 방향 누적 편차, h를 넘으면 경보
+#   노출은 결과 0으로, 이후 클릭은 +1 보정으로 반영(클릭이 노출보다 늦게 도착하므로)
+# 통계적 보장은 트래픽이 결과와 무관하게 배정될 때(고정 분할, BANDIT_POLICY=ab) 성립한다.
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _phi(x: float) -> float:
+    return math.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def _cdf(x: float) -> float:
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2)))
+
+
+class SequentialTest:
+    """
+    control: 대조군 arm. alpha: 유의수준. tau: mSPRT 혼합 분포 표준편차(기대하는 CTR 차이 규모).
+    min_samples: 두 arm 모두 이만큼 노출되기 전에는 p값을 갱신하지 않는다(정규 근사 보호).
+    cusum_k: 허용 편차(보통 최소 검출 효과의 절반), cusum_h: 경보 임계값(클릭 단위).
+    """
+
+    def __init__(self, arms: Sequence[str], control: str, alpha: float = 0.05, tau: float = 0.02,
+                 min_samples: int = 100, cusum_k: float = 0.005, cusum_h: float = 10.0):
+        self.arms = list(arms)
+        self.index = {a: i for i, a in enumerate(self.arms)}
+        if control not in self.index:
+            raise ValueError(f"unknown control arm: {control}")
+        if len(self.arms) < 2:
+            raise ValueError("sequential test needs at least two arms")
+        self.control = control
+        self.c = self.index[control]
+        self.alpha = alpha
+        self.tau2 = tau * tau
+        self.min_samples = min_samples
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        k = len(self.arms)
+        self.n = np.zeros(k)
+        self.clicks = np.zeros(k)
+        self.reward_sum = np.zeros(k)
+        self.p_value = np.ones(k)          # arm별 always-valid p값(대조군 칸은 1)
+        self.cusum = np.zeros((k, 2))      # [위 방향, 아래 방향]
+        self._lock = threading.Lock()
+
+    # ---- 갱신(이벤트당 O(1)) ----
+    def seed(self, totals: np.ndarray):
+        """재시작 시 누적 [노출, 클릭, 보상 합] (k, 3)에서 복원. CUSUM은 0부터 다시 시작."""
+        with self._lock:
+            self.n[:] = totals[:, 0]
+            self.clicks[:] = totals[:, 1]
+            self.reward_sum[:] = totals[:, 2]
+            for i in range(len(self.arms)):
+                self._refresh(i)
+
+    def add_exposure(self, arm: str, count: int = 1):
+        i = self.index[arm]
+        with self._lock:
+            self.n[i] += count
+            self._cusum_exposure(i, count)
+            self._touch(i)
+
+    def add_exposures(self, counts: np.ndarray):
+        with self._lock:
+            self.n += counts
+            for i in np.flatnonzero(counts):
+                self._cusum_exposure(int(i), int(counts[i]))
+            self._refresh_all()
+
+    def add_reward(self, arm: str, reward: float):
+        i = self.index[arm]
+        with self._lock:
+            self.reward_sum[i] += reward
+            if reward > 0:
+                self.clicks[i] += 1
+                self._cusum_click(i, 1)
+            self._touch(i)
+
+    def add_rewards(self, arm_idx: np.ndarray, rewards: np.ndarray):
+        k = len(self.arms)
+        clicks = np.bincount(arm_idx, weights=rewards > 0, minlength=k)
+        total = np.bincount(arm_idx, weights=rewards, minlength=k)
+        with self._lock:
+            self.clicks += clicks
+            self.reward_sum += total
+            for i in np.flatnonzero(clicks):
+                self._cusum_click(int(i), int(clicks[i]))
+            self._refresh_all()
+
+    def _ctr(self, i: int) -> float:
+        return min(self.clicks[i] / self.n[i], 1.0) if self.n[i] > 0 else 0.0
+
+    def _cusum_exposure(self, i: int, count: int):
+        # count건의 결과 0 관측: 각 단계가 같은 부호라 한 번에 더하고 0에서 잘라도 순차 적용과 같다
+        if i == self.c:
+            return
+        p_c, k = self._ctr(self.c), self.cusum_k
+        s = self.cusum[i]
+        s[0] = max(0.0, s[0] - count * (p_c + k))
+        s[1] = max(0.0, s[1] + count * (p_c - k))
+
+    def _cusum_click(self, i: int, count: int):
+        if i == self.c:
+            return
+        s = self.cusum[i]
+        s[0] += count
+        s[1] = max(0.0, s[1] - count)
+
+    def _touch(self, i: int):
+        if i == self.c:
+            self._refresh_all()   # 대조군이 바뀌면 모든 비교가 바뀐다(arm 수만큼, 보통 1~2)
+        else:
+            self._refresh(i)
+
+    def _refresh_all(self):
+        for i in range(len(self.arms)):
+            if i != self.c:
+                self._refresh(i)
+
+    def _refresh(self, i: int):
+        """처리군 i의 mSPRT 우도비를 다시 계산해 always-valid p값(누적 최소)을 갱신."""
+        c = self.c
+        if i == c or min(self.n[i], self.n[c]) < self.min_samples:
+            return
+        p_c, p_t = self._ctr(c), self._ctr(i)
+        v = p_c * (1 - p_c) / self.n[c] + p_t * (1 - p_t) / self.n[i]
+        if v <= 0:
+            return
+        theta = p_t - p_c
+        log_lr = 0.5 * math.log(v / (v + self.tau2)) + theta * theta * self.tau2 / (2 * v * (v + self.tau2))
+        self.p_value[i] = min(self.p_value[i], math.exp(-log_lr) if log_lr > 0 else 1.0)
+
+    # ---- 조회 ----
+    def _posterior(self, i: int):
+        a = 1.0 + self.clicks[i]
+        b = 1.0 + max(self.n[i] - self.clicks[i], 0.0)
+        mean = a / (a + b)
+        var = a * b / ((a + b) ** 2 * (a + b + 1))
+        return mean, var
+
+    def decision(self) -> Dict:
+        """
+        현재 판단. decision = "stop"(어느 처리군이든 p <= alpha / 처리군 수) | "continue".
+        stop이면 winner = 대조군보다 유의하게 좋은 처리군 중 CTR 최고, 없으면(모두 유의하게 나쁨) 대조군.
+        """
+        with self._lock:
+            n, clicks, reward_sum = self.n.copy(), self.clicks.copy(), self.reward_sum.copy()
+            p_value, cusum = self.p_value.copy(), self.cusum.copy()
+            post = [self._posterior(i) for i in range(len(self.arms))]
+        threshold = self.alpha / (len(self.arms) - 1)
+        c = self.c
+        mean_c, var_c = post[c]
+        arms = {}
+        comparisons = {}
+        better: List[int] = []
+        significant = False
+        for i, arm in enumerate(self.arms):
+            ctr = min(clicks[i] / n[i], 1.0) if n[i] > 0 else 0.0
+            arms[arm] = {"exposures": int(n[i]), "clicks": int(clicks[i]), "reward_sum": float(reward_sum[i]),
+                         "ctr": ctr}
+            if i == c:
+                continue
+            mean_t, var_t = post[i]
+            d, s = mean_t - mean_c, math.sqrt(var_t + var_c)
+            ctr_c = arms[self.control]["ctr"]
+            alarm: Optional[str] = None
+            if cusum[i, 0] >= self.cusum_h:
+                alarm = "up"
+            elif cusum[i, 1] >= self.cusum_h:
+                alarm = "down"
+            comparisons[arm] = {
+                "diff": ctr - ctr_c,
+                "lift": (ctr / ctr_c - 1.0) if ctr_c > 0 else None,
+                "p_value": float(p_value[i]),
+                "significant": bool(p_value[i] <= threshold),
+                "prob_beat_control": _cdf(d / s),
+                "expected_loss": s * _phi(d / s) - d * _cdf(-d / s),   # 처리군을 골랐을 때 E[max(대조군 - 처리군, 0)]
+                "cusum": {"up": float(cusum[i, 0]), "down": float(cusum[i, 1]), "alarm": alarm},
+            }
+            if p_value[i] <= threshold:
+                significant = True
+                if ctr > ctr_c:
+                    better.append(i)
+        winner = None
+        if significant:
+            winner = max(better, key=lambda i: arms[self.arms[i]]["ctr"]) if better else c
+        return {
+            "decision": "stop" if significant else "continue",
+            "winner": self.arms[winner] if winner is not None else None,
+            "control": self.control,
+            "alpha": self.alpha,
+            "threshold": threshold,
+            "arms": arms,
+            "comparisons": comparisons,
+        }
+
+    @property
+    def conclusive(self) -> bool:
+        return bool((self.p_value <= self.alpha / (len(self.arms) - 1)).any())
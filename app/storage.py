@@ -1,9 +1,331 @@
-# 데모에서는 bandit 내부 상태만 사용.
-# 추후 Redis/SQLite로 노출/클릭 원시로그를 적재하고 리포트에 활용 가능.
-LOGS = []
+# 노출/클릭 원시 로그를 위한 append-only 이벤트 저장소.
+#
+# 세그먼트 파일 구조 (data/events/00000001.seg ...)
+#   [MAGIC 8B][헤더 길이 u32][헤더 JSON: version, dtype, arms]
+#   [블록 길이 u32][crc32 u32][레코드 바이트] ...   ← 레코드 = EVENT_DTYPE 고정 길이 행
+# - 쓰기는 메모리 블록에 모았다가 블록 단위로 append, 크기를 넘으면 다음 세그먼트로 회전
+# - 프로세스가 다시 뜨면 항상 새 세그먼트부터 쓴다(찢어진 꼬리 뒤에 덧붙이지 않음)
+#   세그먼트 파일은 첫 기록 때 연다(import만 하는 스크립트가 빈 세그먼트를 남기지 않도록)
+# - 여러 워커(uvicorn --workers)가 같은 디렉터리에 써도 되도록 세그먼트 번호는 디렉터리 락(.lock, flock) 아래에서
+#   "현재 최대 + 1"로 잡고 O_EXCL로 만든다. 워커마다 자기 세그먼트에만 쓴다
+# - 읽기는 블록 단위 스트리밍: 세그먼트 전체를 메모리에 올리지 않는다
 
-def append_log(event: dict):
-    LOGS.append(event)
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-def get_logs():
-    return LOGS
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: 락 없이 O_EXCL 재시도만
+    fcntl = None
+
+SCHEMA_VERSION = 2
+KIND_EXPOSURE = 0   # /choose: 노출(결정)
+KIND_CLICK = 1      # /update: 보상
+EVENT_DTYPE = np.dtype([
+    ("ts", "<f8"),           # unix time (sec)
+    ("user_hash", "<u8"),    # hash_user(user_id)
+    ("decision_id", "<u8"),  # /choose 가 발급, 노출-클릭 조인 키(없으면 0)
+    ("arm", "<u2"),          # 헤더 arms 목록의 인덱스
+    ("kind", "u1"),          # KIND_EXPOSURE | KIND_CLICK
+    ("item_id", "<i4"),      # 없으면 -1
+    ("reward", "<f4"),
+    ("propensity", "<f4"),   # 선택 확률, 모르면 NaN
+])
+
+_MAGIC = b"EVSEG001"
+_U32 = struct.Struct("<I")
+_BLOCK_HEAD = struct.Struct("<II")   # (nbytes, crc32)
+_SUFFIX = ".seg"
+_LOCK_NAME = ".lock"
+
+Position = Tuple[int, int]   # (세그먼트 번호, 바이트 오프셋)
+
+
+def hash_user(user_id: str) -> int:
+    # 프로세스마다 달라지는 hash() 대신 고정 해시
+    return int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def build_records(ts: float, user_ids: Sequence[str], arm_idx: Sequence[int], kind: int,
+                  item_ids: Optional[Sequence[Optional[int]]] = None,
+                  rewards: Optional[Sequence[float]] = None,
+                  propensities: Optional[Sequence[float]] = None,
+                  decision_ids: Optional[Sequence[int]] = None) -> np.ndarray:
+    """배치 요청 → EVENT_DTYPE 배열(EventStore.append_many 입력). arm은 저장소 arms 기준 인덱스."""
+    rec = np.zeros(len(user_ids), dtype=EVENT_DTYPE)
+    rec["ts"] = ts
+    rec["user_hash"] = np.fromiter((hash_user(u) for u in user_ids), dtype=np.uint64, count=len(user_ids))
+    rec["arm"] = arm_idx
+    rec["kind"] = kind
+    rec["item_id"] = -1 if item_ids is None else [-1 if i is None else i for i in item_ids]
+    if rewards is not None:
+        rec["reward"] = rewards
+    rec["propensity"] = np.nan if propensities is None else propensities
+    if decision_ids is not None:
+        rec["decision_id"] = decision_ids
+    return rec
+
+
+def _segment_path(root: str, seq: int) -> str:
+    return os.path.join(root, f"{seq:08d}{_SUFFIX}")
+
+
+def list_segments(root: str) -> List[int]:
+    if not os.path.isdir(root):
+        return []
+    seqs = []
+    for name in os.listdir(root):
+        if name.endswith(_SUFFIX) and name[:-len(_SUFFIX)].isdigit():
+            seqs.append(int(name[:-len(_SUFFIX)]))
+    return sorted(seqs)
+
+
+@contextmanager
+def _dir_lock(root: str):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(root, _LOCK_NAME), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EventStore:
+    """
+    프로세스당 writer 하나인 이벤트 저장소(스레드 안전, 여러 프로세스가 같은 디렉터리를 공유 가능).
+    fsync: "always"(블록마다) | "interval"(flush_secs마다) | "never"(OS에 맡김)
+    "always"는 append를 부른 스레드가 fsync를 기다리므로 오프라인 스크립트용(API 프로세스는 app/main.py에서 거부)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        arms: Sequence[str],
+        max_segment_bytes: int = 64 << 20,
+        block_records: int = 256,
+        fsync: str = "interval",
+        flush_secs: float = 1.0,
+    ):
+        if fsync not in ("always", "interval", "never"):
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        self.root = root
+        self.arms = list(arms)
+        self.arm_index = {a: i for i, a in enumerate(self.arms)}
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync = fsync
+        self.flush_secs = flush_secs
+        self._buf = np.zeros(block_records, dtype=EVENT_DTYPE)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        os.makedirs(root, exist_ok=True)
+        existing = list_segments(root)
+        self._seq = (existing[-1] if existing else 0)
+        self._f = None   # 첫 기록 때 _open_next
+
+    # ---- 쓰기 ----
+    def append(self, ts: float, user_id: str, arm: str, item_id: int | None = None,
+               reward: float = 0.0, propensity: float = float("nan"),
+               kind: int = KIND_CLICK, decision_id: int = 0):
+        with self._lock:
+            row = self._buf[self._pending]
+            row["ts"] = ts
+            row["user_hash"] = hash_user(user_id)
+            row["decision_id"] = decision_id
+            row["arm"] = self.arm_index[arm]
+            row["kind"] = kind
+            row["item_id"] = -1 if item_id is None else item_id
+            row["reward"] = reward
+            row["propensity"] = propensity
+            self._pending += 1
+            if self._pending == len(self._buf):
+                self._write_pending()
+
+    def append_many(self, records: np.ndarray):
+        """EVENT_DTYPE 구조화 배열을 그대로 기록(arm은 이미 인덱스)."""
+        with self._lock:
+            self._write_pending()
+            if len(records):
+                self._write_block(np.ascontiguousarray(records, dtype=EVENT_DTYPE).tobytes())
+
+    def flush(self, sync: bool = False):
+        with self._lock:
+            self._write_pending()
+            if self._f is not None and (sync or (self.fsync != "never" and self._dirty)):
+                self._sync()
+
+    def position(self) -> Position:
+        """지금까지 파일에 쓰인 지점(메모리 블록은 먼저 flush)."""
+        with self._lock:
+            self._write_pending()
+            if self._f is None:
+                return self._seq + 1, 0   # 아직 연 세그먼트 없음 → 다음 세그먼트 처음부터
+            return self._seq, self._f.tell()
+
+    @property
+    def pending(self) -> int:
+        """아직 파일에 쓰지 않은 메모리 블록의 레코드 수."""
+        return self._pending
+
+    def start_flusher(self):
+        # 트래픽이 적어도 블록이 메모리에 오래 머물지 않도록 주기적으로 flush
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="event-store-flush", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            self._write_pending()
+            if self._f is not None:
+                self._sync()
+                self._f.close()
+                self._f = None
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_secs):
+            self.flush()
+
+    # ---- 내부 ----
+    def _open_next(self):
+        if self._f is not None:
+            f, self._f = self._f, None   # 새 파일을 못 열어도 닫힌 파일을 다시 쓰지 않도록
+            os.fsync(f.fileno())
+            f.close()
+        header = json.dumps({
+            "version": SCHEMA_VERSION,
+            "dtype": EVENT_DTYPE.descr,
+            "arms": self.arms,
+            "created": time.time(),
+        }).encode("utf-8")
+        with _dir_lock(self.root):
+            while True:
+                existing = list_segments(self.root)
+                seq = max(self._seq, existing[-1] if existing else 0) + 1
+                try:
+                    f = open(_segment_path(self.root, seq), "xb")
+                except FileExistsError:   # 락이 없는 환경에서 다른 워커와 경합
+                    self._seq = seq
+                    continue
+                break
+        self._seq = seq
+        f.write(_MAGIC + _U32.pack(len(header)) + header)
+        f.flush()
+        self._f = f
+
+    def _write_pending(self):
+        if self._pending:
+            try:
+                self._write_block(self._buf[:self._pending].tobytes())
+            finally:
+                # 실패해도 버퍼를 비운다(그 블록은 잃지만 이후 append는 계속 동작, 다음 기록 때 세그먼트를 다시 연다)
+                self._pending = 0
+
+    def _write_block(self, data: bytes):
+        if self._f is None or self._f.tell() + len(data) > self.max_segment_bytes:
+            self._open_next()
+        self._f.write(_BLOCK_HEAD.pack(len(data), zlib.crc32(data)) + data)
+        self._f.flush()
+        self._dirty = True
+        # interval: flusher 스레드가 돌고 있으면 fsync는 그쪽에 맡긴다(요청 경로에서 디스크 대기 없음)
+        if self.fsync == "always" or (
+            self.fsync == "interval" and self._flusher is None
+            and time.monotonic() - self._last_sync >= self.flush_secs
+        ):
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._f.fileno())
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+
+# ---- 읽기 ----
+def _read_header(f) -> dict:
+    magic = f.read(len(_MAGIC))
+    if magic != _MAGIC:
+        raise ValueError(f"not an event segment: {f.name}")
+    (n,) = _U32.unpack(f.read(_U32.size))
+    return json.loads(f.read(n).decode("utf-8"))
+
+
+def _remap(records: np.ndarray, seg_arms: List[str], arms: Optional[Sequence[str]]) -> np.ndarray:
+    if arms is None or list(arms) == seg_arms:
+        return records
+    lut = np.array([list(arms).index(a) if a in arms else np.iinfo(np.uint16).max for a in seg_arms],
+                   dtype=np.uint16)
+    records["arm"] = lut[records["arm"]]
+    return records
+
+
+def iter_blocks(
+    root: str,
+    start: Optional[Position] = None,
+    arms: Optional[Sequence[str]] = None,
+) -> Iterator[Tuple[np.ndarray, Position]]:
+    """
+    (레코드 배열, 다음 읽기 위치)를 블록 단위로 순서대로 yield.
+    - start: 이 위치(포함)부터 읽기. None이면 처음부터
+    - arms : 주면 arm 코드를 이 목록 기준으로 다시 매핑(목록에 없는 arm은 0xFFFF)
+    - 마지막 블록이 잘렸거나 CRC가 맞지 않으면 그 세그먼트는 거기서 멈춘다
+    """
+    for seq in list_segments(root):
+        if start is not None and seq < start[0]:
+            continue
+        with open(_segment_path(root, seq), "rb") as f:
+            header = _read_header(f)
+            dtype = np.dtype([tuple(x) for x in header["dtype"]])
+            seg_arms = header["arms"]
+            if start is not None and seq == start[0] and start[1] > f.tell():
+                f.seek(start[1])
+            while True:
+                head = f.read(_BLOCK_HEAD.size)
+                if len(head) < _BLOCK_HEAD.size:
+                    break
+                n, crc = _BLOCK_HEAD.unpack(head)
+                data = f.read(n)
+                if len(data) < n or zlib.crc32(data) != crc:
+                    break
+                records = np.frombuffer(data, dtype=dtype).copy()
+                if dtype != EVENT_DTYPE:
+                    records = _upgrade(records)
+                yield _remap(records, seg_arms, arms), (seq, f.tell())
+
+
+def _upgrade(records: np.ndarray) -> np.ndarray:
+    # 예전 스키마 세그먼트: 공통 필드만 복사, 없는 필드는 기본값
+    # (v1은 /update 클릭만 기록했으므로 kind 기본값은 클릭)
+    out = np.zeros(len(records), dtype=EVENT_DTYPE)
+    out["kind"] = KIND_CLICK
+    out["item_id"] = -1
+    out["propensity"] = np.nan
+    for name in records.dtype.names:
+        if name in EVENT_DTYPE.names:
+            out[name] = records[name]
+    return out
+
+
+def iter_events(root: str, start: Optional[Position] = None,
+                arms: Optional[Sequence[str]] = None) -> Iterator[np.ndarray]:
+    for records, _ in iter_blocks(root, start, arms):
+        yield records
@@ -0,0 +1,58 @@
+# bench_bandit.py
+# ThompsonBandit 핫패스 마이크로벤치마크: arm 수 × 감쇠(discount) 설정별
+# - choose       : 단건 선택(record=True)
+# - update       : 단건 갱신(감쇠가 있으면 지연 스케일 + 재정규화 경로 포함)
+# - update_batch : 배치 갱신의 건당 비용
+# - propensity   : 선택 확률 MC 추정(캐시 미스)
+#
+# 사용 예:
+#   python benchmarks/bench_bandit.py --arms 2,10,100 --discounts 1.0,0.999 --json benchmarks/results/bandit.json
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from common import measure, meta, print_table, save_json
+
+from app.bandit import ThompsonBandit
+
+
+def bench(k: int, discount: float, number: int, batch: int) -> dict:
+    arms = [f"arm{i}" for i in range(k)]
+    bandit = ThompsonBandit(arms, discount=discount, seed=0)
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, k, size=batch)
+    rewards = (rng.random(batch) < 0.1).astype(np.float64)
+
+    def propensity():
+        bandit._prop_cache = None
+        bandit.propensities()
+
+    row = {"arms": k, "discount": discount}
+    row["choose_us"] = measure(lambda: bandit.choose(), number)["median_us"]
+    row["update_us"] = measure(lambda: bandit.update(arms[0], 1.0), number)["median_us"]
+    row["update_batch_us"] = measure(lambda: bandit.update_batch(idx, rewards), 20, per=batch)["median_us"]
+    row["propensity_us"] = measure(propensity, max(1, number // 20))["median_us"]
+    return row
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="ThompsonBandit choose/update micro-benchmarks")
+    ap.add_argument("--arms", default="2,10,100")
+    ap.add_argument("--discounts", default="1.0,0.999")
+    ap.add_argument("--number", type=int, default=5000, help="측정 구간당 호출 수")
+    ap.add_argument("--batch", type=int, default=10000)
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    rows = [bench(int(k), float(d), args.number, args.batch)
+            for k in args.arms.split(",") for d in args.discounts.split(",")]
+    print_table(rows, ["arms", "discount", "choose_us", "update_us", "update_batch_us", "propensity_us"])
+    if args.json:
+        save_json(args.json, {"benchmark": "bandit", "meta": meta(), "rows": rows})
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# bench_mlflow_export.py
+# analysis/export_mlflow.py 측정: MLflow SQLite 백엔드와 같은 테이블 구성의 합성 DB를 만들고
+#   - 전체 내보내기(SQL 스트리밍 → 날짜/arm 파티션 Parquet)
+#   - 증분 내보내기(워터마크 이후 delta 이벤트만)
+#   - load_events 스캔(대시보드/분석 스크립트가 매번 하는 일)
+# 시간과 DB/Parquet 크기를 잰다. 이벤트 하나 = reward + sample_A + sample_B metric 3행(이벤트 싱크 기록 방식).
+#
+# 사용 예:
+#   python benchmarks/bench_mlflow_export.py --events 200000 --json benchmarks/results/mlflow_export.json
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+
+from common import meta, print_table, save_json
+
+from analysis.export_mlflow import export, load_events
+
+_SCHEMA = """
+CREATE TABLE experiments (experiment_id INTEGER PRIMARY KEY, name VARCHAR(256) NOT NULL UNIQUE,
+                          artifact_location VARCHAR(256), lifecycle_stage VARCHAR(32),
+                          creation_time BIGINT, last_update_time BIGINT);
+CREATE TABLE runs (run_uuid VARCHAR(32) PRIMARY KEY, experiment_id INTEGER, lifecycle_stage VARCHAR(20),
+                   status VARCHAR(9), start_time BIGINT);
+CREATE TABLE params ("key" VARCHAR(250) NOT NULL, value VARCHAR(8000) NOT NULL, run_uuid VARCHAR(32) NOT NULL,
+                     PRIMARY KEY ("key", run_uuid));
+CREATE TABLE metrics ("key" VARCHAR(250) NOT NULL, value FLOAT NOT NULL, timestamp BIGINT NOT NULL,
+                      run_uuid VARCHAR(32) NOT NULL, step BIGINT DEFAULT '0' NOT NULL,
+                      is_nan BOOLEAN DEFAULT '0' NOT NULL,
+                      PRIMARY KEY ("key", timestamp, step, run_uuid, value, is_nan));
+CREATE INDEX index_metrics_run_uuid ON metrics (run_uuid);
+"""
+
+
+def _append_events(conn: sqlite3.Connection, n: int, t0_ms: int, rng: np.random.Generator,
+                   run_events: int = 1000):
+    """arm별 run에 run_events개씩 step을 쌓는다(app/mlflow_utils.py MlflowEventWriter와 같은 모양)."""
+    arms = np.array(["A", "B"])
+    arm_of = arms[rng.integers(0, 2, n)]
+    ts = t0_ms + np.sort(rng.integers(0, 3 * 86_400_000, n))
+    reward = (rng.random(n) < np.where(arm_of == "A", 0.10, 0.13)).astype(float)
+    samples = rng.random((n, 2))
+    rows = []
+    for arm in arms:
+        idx = np.flatnonzero(arm_of == arm)
+        for start in range(0, len(idx), run_events):
+            run = uuid.uuid4().hex
+            conn.execute("INSERT INTO runs VALUES (?, 1, 'active', 'RUNNING', 0)", (run,))
+            conn.execute("INSERT INTO params VALUES ('arm', ?, ?)", (arm, run))
+            for step, i in enumerate(idx[start:start + run_events]):
+                t = int(ts[i])
+                rows += [("reward", reward[i], t, run, step), ("sample_A", samples[i, 0], t, run, step),
+                         ("sample_B", samples[i, 1], t, run, step)]
+    conn.executemany("INSERT INTO metrics (key, value, timestamp, run_uuid, step) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+
+
+def run(events: int, delta: int) -> Dict:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix="abtest-mlexport-") as tmp:
+        db, out = os.path.join(tmp, "mlflow.db"), os.path.join(tmp, "export")
+        conn = sqlite3.connect(db)
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO experiments VALUES (1, 'MAB_Online', '', 'active', 0, 0)")
+        t0_ms = int(time.time() * 1000) - 3 * 86_400_000
+        _append_events(conn, events, t0_ms, rng)
+
+        full = export(db, out, "MAB_Online")
+        _append_events(conn, delta, t0_ms, rng)
+        conn.close()
+        incr = export(db, out, "MAB_Online")
+
+        t = time.perf_counter()
+        df = load_events(out)
+        load_s = time.perf_counter() - t
+        assert len(df) == events + delta, (len(df), events + delta)
+        parquet_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(out) for f in fs)
+        return {
+            "events": events,
+            "delta": delta,
+            "full_export_s": full["secs"],
+            "incremental_export_s": incr["secs"],
+            "load_events_s": load_s,
+            "db_mb": os.path.getsize(db) / 2**20,
+            "parquet_mb": parquet_bytes / 2**20,
+        }
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="MLflow SQLite → Parquet export/scan benchmark")
+    ap.add_argument("--events", type=int, default=200_000, help="초기 이벤트 수(metric 행은 3배)")
+    ap.add_argument("--delta", type=int, default=2_000, help="증분 내보내기 전에 추가할 이벤트 수")
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    res = run(args.events, args.delta)
+    print_table([res], list(res.keys()))
+    if args.json:
+        save_json(args.json, {"benchmark": "mlflow_export", "meta": meta(), "result": res})
+    return res
+
+
+if __name__ == "__main__":
+    main()
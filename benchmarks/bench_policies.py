@@ -0,0 +1,72 @@
+# bench_policies.py
+# mab 정책별 결정 1건당 지연 시간 마이크로벤치마크
+# - choose      : /choose 경로의 단건 선택(record=False + record_exposure), 파라미터 고정
+# - propensity  : 선택 확률 캐시를 비운 뒤의 계산
+# - update      : 단건 보상 갱신
+# - cycle       : update → choose → propensities → record_exposure (매번 파라미터가 바뀌는 실제 요청 흐름)
+# - batch       : choose_batch 의 건당 비용
+#
+# 사용 예:
+#   python benchmarks/bench_policies.py --arms 2,10,100 --json benchmarks/results/policies.json
+
+import argparse
+from typing import List
+
+import numpy as np
+
+from common import measure, meta, print_table, save_json
+
+from app.policies import POLICIES, Guardrails, make_policy
+
+
+def bench(policy: str, k: int, number: int, batch: int, guardrails: bool) -> dict:
+    arms = [f"arm{i}" for i in range(k)]
+    pol = make_policy(policy, arms, seed=0, guardrails=Guardrails(5, 0.9) if guardrails else None)
+    rng = np.random.default_rng(0)
+    # 적당히 학습된 상태에서 측정(가드레일 강제 탐색 구간은 지난 뒤)
+    idx, _ = pol.choose_batch(200 * k)
+    pol.update_batch(idx, rng.random(len(idx)) < np.linspace(0.05, 0.2, k)[idx])
+
+    def choose():
+        arm, _ = pol.choose(record=False)
+        pol.record_exposure(arm)
+
+    def cycle():
+        pol.update(arms[0], 0.0)
+        arm, _ = pol.choose(record=False)
+        pol.propensities()
+        pol.record_exposure(arm)
+
+    def propensity():
+        pol._prop_cache = None
+        pol.propensities()
+
+    row = {"policy": policy, "arms": k}
+    row["choose_us"] = measure(choose, number)["median_us"]
+    row["propensity_us"] = measure(propensity, max(1, number // 20))["median_us"]
+    row["update_us"] = measure(lambda: pol.update(arms[0], 1.0), number)["median_us"]
+    row["cycle_us"] = measure(cycle, max(1, number // 20))["median_us"]
+    row["batch_us"] = measure(lambda: pol.choose_batch(batch), 20, per=batch)["median_us"]
+    return row
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Per-decision latency of each bandit policy")
+    ap.add_argument("--policies", default=",".join(POLICIES), help="쉼표 구분")
+    ap.add_argument("--arms", default="2,10,100", help="arm 수 목록(쉼표)")
+    ap.add_argument("--number", type=int, default=2000, help="측정 구간당 호출 수")
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--no-guardrails", action="store_true")
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    rows = [bench(p, int(k), args.number, args.batch, not args.no_guardrails)
+            for p in args.policies.split(",") for k in args.arms.split(",")]
+    print_table(rows, ["policy", "arms", "choose_us", "propensity_us", "update_us", "cycle_us", "batch_us"])
+    if args.json:
+        save_json(args.json, {"benchmark": "policies", "meta": meta(), "rows": rows})
+    return rows
+
+
+if __name__ == "__main__":
+    main()
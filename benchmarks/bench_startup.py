@@ -0,0 +1,124 @@
+# bench_startup.py
+# 워커 콜드 스타트 측정: 새 파이썬 프로세스에서
+#   - import app.main 에 걸리는 시간
+#   - lifespan 시작 → 첫 /health 응답까지 시간(ASGI 직접 호출)
+#   - import app.main 만으로 mlflow가 import 되는지(지연 초기화 확인)
+# 를 반복 측정하고, 비교용으로 `import mlflow` 단독 비용도 잰다(설치되어 있을 때).
+# MLflow는 기본적으로 임시 디렉터리의 로컬 파일 저장소(file:...)를 쓴다. --tracking-uri 로 닿지 않는 서버를
+# 주면 서버 상태와 무관하게 API가 뜨는지 확인할 수 있다(종료 시 싱크의 마지막 연결 시도만큼 느려짐, 측정 제외).
+#
+# 사용 예:
+#   python benchmarks/bench_startup.py --repeat 5 --json benchmarks/results/startup.json
+#   python benchmarks/bench_startup.py --tracking-uri http://127.0.0.1:9
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from common import ROOT, meta, print_table, save_json
+
+_CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import app.main as api
+t_import = time.perf_counter() - t0
+mlflow_loaded = "mlflow" in sys.modules
+
+async def first_health():
+    import httpx
+    t1 = time.perf_counter()
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            r = await client.get("/health")
+            r.raise_for_status()
+            return time.perf_counter() - t1
+        # lifespan 종료(싱크 close)는 측정에서 제외
+
+t_health = asyncio.run(first_health())
+print(json.dumps({"import_s": t_import, "first_health_s": t_health, "total_s": t_import + t_health,
+                  "mlflow_loaded": mlflow_loaded}))
+"""
+
+_MLFLOW_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+try:
+    import mlflow
+except ImportError:
+    print(json.dumps(None))
+else:
+    print(json.dumps(time.perf_counter() - t0))
+"""
+
+
+def _env(tmp: str, tracking_uri: Optional[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "MLFLOW_TRACKING_URI": tracking_uri or "file:" + os.path.join(tmp, "mlruns"),
+        "EVENT_STORE_DIR": os.path.join(tmp, "events"),
+        "AGG_DB_PATH": os.path.join(tmp, "aggregates.sqlite"),
+        "SNAPSHOT_PATH": os.path.join(tmp, "snapshot.json"),
+        "BANDIT_STATE_PATH": os.path.join(tmp, "bandit_state.bin"),
+        "PYTHONPATH": os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p),
+    })
+    return env
+
+
+def _child(code: str, env: Dict[str, str], timeout: float):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True,
+                         timeout=timeout)
+    if out.returncode != 0:
+        raise RuntimeError(f"child failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int, tracking_uri: Optional[str] = None, timeout: float = 120.0) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="abtest-startup-") as tmp:
+        env = _env(tmp, tracking_uri)
+        samples = [_child(_CHILD, env, timeout) for _ in range(repeat)]
+        mlflow_s: List[Optional[float]] = [_child(_MLFLOW_CHILD, env, timeout) for _ in range(repeat)]
+
+    def stat(key: str) -> Dict[str, float]:
+        arr = np.array([s[key] for s in samples]) * 1e3
+        return {"median_ms": float(np.median(arr)), "best_ms": float(arr.min())}
+
+    res = {
+        "repeat": repeat,
+        "import": stat("import_s"),
+        "first_health": stat("first_health_s"),
+        "total": stat("total_s"),
+        "mlflow_imported_by_app_main": any(s["mlflow_loaded"] for s in samples),
+    }
+    if all(v is not None for v in mlflow_s):
+        arr = np.array(mlflow_s) * 1e3
+        res["import_mlflow"] = {"median_ms": float(np.median(arr)), "best_ms": float(arr.min())}
+    return res
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Cold-start time of the policy API worker")
+    ap.add_argument("--repeat", type=int, default=5, help="새 프로세스 실행 횟수")
+    ap.add_argument("--tracking-uri", default=None, help="기본: 임시 디렉터리의 file: 저장소")
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    res = run(args.repeat, args.tracking_uri)
+    rows = [{"phase": k, **res[k]} for k in ("import", "first_health", "total", "import_mlflow") if k in res]
+    print_table(rows, ["phase", "median_ms", "best_ms"])
+    print(f"[INFO] mlflow imported by `import app.main`: {res['mlflow_imported_by_app_main']}")
+    if "import_mlflow" not in res:
+        print("[INFO] mlflow not installed: eager-import baseline skipped")
+    if args.json:
+        save_json(args.json, {"benchmark": "startup", "meta": meta(), "result": res})
+    return res
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# bench_variants.py
+# 변형(variant)별 serve() 지연: 알려진 유저 / 모르는 유저(인기순 대체) / 카탈로그 조회
+# + 응답 캐시(app/response_cache.py)를 거친 조회(적중) 비용
+#
+# 사용 예:
+#   python benchmarks/bench_variants.py --json benchmarks/results/variants.json
+
+import argparse
+from typing import List
+
+from common import measure, meta, print_table, save_json
+
+import variants.variant_a as A
+import variants.variant_b as B
+from variants.catalog import get_catalog
+from app.response_cache import ResponseCache, make_key
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Variant serve() micro-benchmarks")
+    ap.add_argument("--number", type=int, default=20000, help="측정 구간당 호출 수")
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    catalog = get_catalog()
+    users = [f"user_{i}" for i in range(1, 944)]
+    it = iter(range(1 << 62))
+
+    def known():
+        B.serve(users[next(it) % len(users)])
+
+    cache = ResponseCache(maxsize=len(users) + 1, ttl=3600)
+
+    def cached(v, arm, user_id, context=None):
+        key = make_key(arm, user_id, context, v.CACHE_SCOPE)
+        return cache.get(key, v.version(), lambda: v.serve(user_id, context))
+
+    def known_cached():
+        cached(B, "B", users[next(it) % len(users)])
+
+    for u in users:   # 워밍업: 이후 측정은 전부 적중
+        cached(B, "B", u)
+
+    cases = [
+        ("A.serve", lambda: A.serve("user_1")),
+        ("B.serve known user", known),
+        ("B.serve unknown user", lambda: B.serve("guest")),
+        ("catalog.item", lambda: catalog.item(0)),
+        ("A cached", lambda: cached(A, "A", "user_1", {"device": "mobile"})),
+        ("B cached known user", known_cached),
+    ]
+    rows = [{"case": name, "us": measure(fn, args.number)["median_us"]} for name, fn in cases]
+    print_table(rows, ["case", "us"])
+    if args.json:
+        save_json(args.json, {"benchmark": "variants", "meta": meta(), "rows": rows})
+    return rows
+
+
+if __name__ == "__main__":
+    main()
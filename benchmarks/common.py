@@ -0,0 +1,71 @@
+# 벤치마크 공용 유틸: 반복 측정, 결과 표 출력/JSON 저장
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int = 5, per: int = 1) -> Dict[str, float]:
+    """
+    fn을 number번 호출하는 구간을 repeat번 재서 '건당' 시간(us)을 반환.
+    per: fn 한 번이 처리하는 건수(배치 함수면 배치 크기).
+    """
+    fn()   # 워밍업(캐시/지연 초기화)
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - t0) / (number * per) * 1e6)
+    runs.sort()
+    return {"best_us": runs[0], "median_us": runs[len(runs) // 2]}
+
+
+def percentiles(samples_s: List[float]) -> Dict[str, float]:
+    """지연 시간 샘플(초) → p50/p95/p99/최대(ms)."""
+    arr = np.asarray(samples_s) * 1e3
+    if not len(arr):
+        return {}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(arr.max())}
+
+
+def meta() -> Dict[str, str]:
+    """커밋 간 비교용 실행 정보."""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {"git_rev": rev, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def print_table(rows: List[Dict[str, object]], columns: List[str]):
+    widths = [max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(_fmt(r.get(c)).ljust(w) for c, w in zip(columns, widths)))
+
+
+def _fmt(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.1f}" if abs(v) >= 100 else f"{v:.4g}"
+    return str(v)
+
+
+def save_json(path: str, payload):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"[OK] results saved → {path}")
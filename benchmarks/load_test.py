@@ -0,0 +1,140 @@
+# load_test.py
+# 프로세스 안에서 ASGI 앱(app.main)을 직접 호출하는 /choose → /update 부하 생성기
+# - 네트워크/uvicorn 없이 FastAPI 경로(검증, 밴딧, 변형 serve, 이벤트 기록, 싱크)만 측정
+# - 상태/이벤트/집계/MLflow는 임시 디렉터리로 격리(MLflow는 로컬 파일 저장소 file:...)
+# - 가상 유저 N명이 동시에 /choose 후 arm별 클릭 확률로 /update(클릭만 전송, 실제 클라이언트와 동일)
+# - 결과: RPS, 엔드포인트별 p50/p95/p99, tracemalloc 할당(별도 패스, 측정 오버헤드가 지연에 섞이지 않도록)
+#
+# 사용 예:
+#   python benchmarks/load_test.py --decisions 20000 --concurrency 32 --ctr A=0.05,B=0.08 --json benchmarks/results/load.json
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+
+from common import ROOT, meta, percentiles, save_json
+
+
+def _isolate(tmp: str):
+    # app.main import 전에 설정해야 한다(app.config가 import 시점에 환경변수를 읽음)
+    os.environ.setdefault("MLFLOW_TRACKING_URI", "file:" + os.path.join(tmp, "mlruns"))
+    os.environ.setdefault("EVENT_STORE_DIR", os.path.join(tmp, "events"))
+    os.environ.setdefault("AGG_DB_PATH", os.path.join(tmp, "aggregates.sqlite"))
+    os.environ.setdefault("SNAPSHOT_PATH", os.path.join(tmp, "snapshot.json"))
+    os.environ.setdefault("BANDIT_STATE_PATH", os.path.join(tmp, "bandit_state.bin"))
+    os.chdir(ROOT)   # 변형이 상대 경로로 데이터/산출물을 읽는다
+
+
+def _parse_ctr(spec: str) -> Dict[str, float]:
+    return {arm: float(p) for arm, p in (part.split("=") for part in spec.split(","))}
+
+
+async def _drive(client, decisions: int, concurrency: int, ctr: Dict[str, float], seed: int,
+                 lat: Dict[str, List[float]]):
+    counter = iter(range(decisions))
+    rng = np.random.default_rng(seed)
+
+    async def user(u: int):
+        uid = f"user_{u + 1}"
+        for _ in counter:   # 모든 가상 유저가 같은 이터레이터에서 결정 수를 나눠 가진다
+            t0 = time.perf_counter()
+            r = await client.post("/choose", json={"user_id": uid, "debug": False})
+            lat["choose"].append(time.perf_counter() - t0)
+            d = r.json()
+            if rng.random() < ctr.get(d["arm"], 0.0):
+                t0 = time.perf_counter()
+                await client.post("/update", json={"user_id": uid, "arm": d["arm"], "reward": 1.0,
+                                                   "item_id": d["items"][0]["item_id"] if d["items"] else None,
+                                                   "decision_id": d["decision_id"]})
+                lat["update"].append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(user(u) for u in range(concurrency)))
+
+
+async def run(decisions: int, concurrency: int, ctr: Dict[str, float], alloc_decisions: int,
+              seed: int = 0) -> Dict:
+    import httpx
+    import app.main as api
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.lifespan(api.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _drive(client, min(200, decisions), concurrency, ctr, seed, {"choose": [], "update": []})  # 워밍업
+
+            lat: Dict[str, List[float]] = {"choose": [], "update": []}
+            t0 = time.perf_counter()
+            await _drive(client, decisions, concurrency, ctr, seed + 1, lat)
+            wall = time.perf_counter() - t0
+
+            alloc = {}
+            if alloc_decisions > 0:
+                tracemalloc.start(10)
+                before = tracemalloc.take_snapshot()
+                cur0, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await _drive(client, alloc_decisions, concurrency, ctr, seed + 2, {"choose": [], "update": []})
+                cur1, peak = tracemalloc.get_traced_memory()
+                stats = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                tracemalloc.stop()
+                alloc = {
+                    "decisions": alloc_decisions,
+                    "peak_kb": (peak - cur0) / 1024,
+                    "retained_b_per_decision": (cur1 - cur0) / alloc_decisions,
+                    "allocs_per_decision": sum(max(s.count_diff, 0) for s in stats) / alloc_decisions,
+                    "top_retained": [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size_diff}B"
+                                     for s in stats[:5] if s.size_diff > 0],
+                }
+    n_req = len(lat["choose"]) + len(lat["update"])
+    return {
+        "decisions": decisions,
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "rps": n_req / wall,
+        "decisions_per_s": len(lat["choose"]) / wall,
+        "clicks": len(lat["update"]),
+        "choose": percentiles(lat["choose"]),
+        "update": percentiles(lat["update"]),
+        "alloc": alloc,
+        "events": api.sink.stats(),
+    }
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="In-process ASGI load test for /choose → /update")
+    ap.add_argument("--decisions", type=int, default=20000)
+    ap.add_argument("--concurrency", type=int, default=32, help="동시 가상 유저 수")
+    ap.add_argument("--ctr", default="A=0.05,B=0.08", help="arm별 클릭 확률")
+    ap.add_argument("--alloc-decisions", type=int, default=2000, help="tracemalloc 패스의 결정 수(0이면 생략)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    with tempfile.TemporaryDirectory(prefix="abtest-load-") as tmp:
+        _isolate(tmp)
+        res = asyncio.run(run(args.decisions, args.concurrency, _parse_ctr(args.ctr), args.alloc_decisions,
+                              args.seed))
+
+    print(f"[INFO] {res['decisions']} decisions, {res['clicks']} clicks, concurrency={res['concurrency']}")
+    print(f"[INFO] {res['rps']:.0f} req/s ({res['decisions_per_s']:.0f} decisions/s)")
+    for ep in ("choose", "update"):
+        p = res[ep]
+        if p:
+            print(f"[INFO] {ep:<6} p50={p['p50_ms']:.3f}ms p95={p['p95_ms']:.3f}ms p99={p['p99_ms']:.3f}ms")
+    if res["alloc"]:
+        a = res["alloc"]
+        print(f"[INFO] alloc: peak {a['peak_kb']:.0f}KB, retained {a['retained_b_per_decision']:.0f}B/decision, "
+              f"{a['allocs_per_decision']:.1f} live blocks/decision")
+    if json_path:
+        save_json(json_path, {"benchmark": "load", "meta": meta(), "result": res})
+    return res
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# run_all.py
+# 벤치마크 전체 실행 → benchmarks/results/<git rev>.json 하나로 저장, --baseline 으로 이전 결과와 비교
+#
+# 사용 예:
+#   python benchmarks/run_all.py                       # 현재 커밋 측정
+#   python benchmarks/run_all.py --quick --baseline benchmarks/results/abc1234.json
+
+import argparse
+import json
+import os
+from typing import Dict, List
+
+from common import ROOT, meta, save_json
+
+import bench_bandit
+import bench_mlflow_export
+import bench_policies
+import bench_startup
+import bench_variants
+import load_test
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _flatten(obj, prefix: str = "") -> Dict[str, float]:
+    """중첩 결과 → {'load.choose.p99_ms': 값, 'bandit[arms=2,discount=1.0].choose_us': 값, ...}"""
+    out: Dict[str, float] = {}
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            out.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+    elif isinstance(obj, list) and obj and isinstance(obj[0], dict):
+        for row in obj:
+            keys = {k: v for k, v in row.items() if not isinstance(v, float) or k in ("discount",)}
+            tag = ",".join(f"{k}={v}" for k, v in keys.items())
+            metrics = {k: v for k, v in row.items() if k not in keys}
+            out.update(_flatten(metrics, f"{prefix}[{tag}]"))
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        out[prefix] = float(obj)
+    return out
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    cur, base = _flatten(current["results"]), _flatten(baseline["results"])
+    lines = [f"baseline {baseline['meta'].get('git_rev')} → current {current['meta'].get('git_rev')}"]
+    for key in sorted(cur.keys() & base.keys()):
+        if base[key]:
+            lines.append(f"{key:<70} {base[key]:>12.4g} → {cur[key]:>12.4g}  ({cur[key] / base[key] - 1:+.1%})")
+    return lines
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Run all benchmarks and save one JSON per commit")
+    ap.add_argument("--quick", action="store_true", help="반복 수를 줄여 빠르게(추세 확인용)")
+    ap.add_argument("--out", default=None, help="기본: benchmarks/results/<git rev>.json")
+    ap.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    args = ap.parse_args(argv)
+
+    n = ["--number", "500"] if args.quick else []
+    results = {
+        "bandit": bench_bandit.main(n),
+        "policies": bench_policies.main(n),
+        "variants": bench_variants.main(["--number", "2000"] if args.quick else []),
+        "startup": bench_startup.main(["--repeat", "2"] if args.quick else []),
+        "mlflow_export": bench_mlflow_export.main(["--events", "20000"] if args.quick else []),
+    }
+    info = meta()
+    out = os.path.abspath(args.out or os.path.join(RESULTS_DIR, f"{info['git_rev'] or 'unknown'}.json"))
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    # 부하 테스트는 임시 디렉터리로 격리하고 작업 디렉터리를 바꾸므로 마지막에
+    results["load"] = load_test.main(["--decisions", "3000", "--alloc-decisions", "500"] if args.quick else [])
+
+    payload = {"benchmark": "all", "meta": info, "results": results}
+    save_json(out, payload)
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            print("\n".join(compare(payload, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# Streamlit 프론트엔드용 Policy API 클라이언트.
+# - 연결 재사용: requests.Session 하나(keep-alive, 커넥션 풀)를 프로세스에서 공유 → 클릭마다 TCP/TLS 핸드셰이크 없음
+# - 모든 호출에 (connect, read) 타임아웃, 일시적 오류(연결 실패, 429/502/503/504)는 지터를 넣은 지수 백오프로 재시도
+#   읽기 타임아웃은 서버가 이미 처리했을 수 있어 재시도하지 않는다(/choose 노출, /update 클릭이 중복 기록되지 않도록)
+# - 클릭 보고(report_click)는 fire-and-forget: 로컬 버퍼(bounded)에 넣고 즉시 반환, 백그라운드 스레드가
+#   /update/batch 로 모아 보낸다. 실패하면 버퍼 앞에 되돌려 두었다가 다시 보낸다(가득 차면 가장 오래된 것부터 버림).
+#   응답을 못 받은 배치도 다시 보내므로 버퍼 경유 클릭은 at-least-once
+#   서버는 배치 중 하나라도 잘못되면(400/422) 전체를 거부하므로, 그때는 배치를 반으로 나눠 다시 보낸다
+#   → 다른 세션의 오래된/잘못된 클릭 하나 때문에 정상 클릭이 함께 버려지지 않고, 잘못된 이벤트만 버린다
+# - 프리페치: choose 직후 같은 세션/유저의 다음 추천을 백그라운드로 미리 받아 둔다 → 다음 "추천 가져오기"는 대기 없음
+#   프리페치는 /choose 에 record=false 로 요청해 서버가 노출로 세지 않고, 실제로 꺼내 보여 줄 때만 /expose 로
+#   노출을 기록한다(백그라운드). 보여 주지 못한 프리페치(prefetch_ttl 만료, 세션 종료, 컨텍스트 변경)는
+#   CTR 분모/순차 검정/IPS 로그에 남지 않는다
+#   키는 (session, user_id, 컨텍스트): 프로세스에서 공유하는 클라이언트라도 다른 세션의 프리페치를 가져가지 않는다
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiClient:
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 1.0,
+        read_timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        pool_size: int = 8,
+        buffer_size: int = 1000,
+        retry_secs: float = 0.5,
+        batch_size: int = 100,
+        prefetch: bool = True,
+        prefetch_ttl: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = self._session(pool_size)
+        # 클릭 버퍼
+        self.buffer_size = buffer_size
+        self.retry_secs = retry_secs
+        self.batch_size = batch_size
+        self._clicks: Deque[dict] = deque()
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._sender = threading.Thread(target=self._send_loop, name="click-sender", daemon=True)
+        self._sender.start()
+        self.sent = 0
+        self.dropped = 0
+        self.failed_attempts = 0
+        self.split_batches = 0
+        self._sizes: Deque[int] = deque()   # 거부된 배치를 나눠 보내는 중이면 다음 배치 크기들
+        # 프리페치
+        self.prefetch = prefetch
+        self.prefetch_ttl = prefetch_ttl
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+        self._prefetched: Dict[Tuple[Optional[str], str, str], Tuple[float, Future]] = {}
+        self._prefetch_lock = threading.Lock()
+        self.exposed = 0
+        self.expose_failed = 0
+
+    @staticmethod
+    def _session(pool_size: int) -> requests.Session:
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)   # 재시도는 _post에서 직접
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        return s
+
+    # ---- 공통 요청 ----
+    def _post(self, path: str, payload: dict, retries: Optional[int] = None) -> dict:
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                r = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.ConnectTimeout) as e:
+                # ReadTimeout은 ConnectionError가 아니라 여기서 잡히지 않는다(재시도 안 함)
+                err: Exception = e
+            else:
+                if r.status_code not in RETRY_STATUS:
+                    if r.status_code >= 400:
+                        raise ApiError(f"{path} → {r.status_code}: {r.text[:200]}", r.status_code)
+                    return r.json()
+                err = ApiError(f"{path} → {r.status_code}", r.status_code)
+            if attempt == retries:
+                raise err
+            # full jitter: [0, backoff * 2^attempt) → 여러 클라이언트가 동시에 재시도하지 않도록
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+        raise AssertionError("unreachable")
+
+    # ---- 추천 ----
+    @staticmethod
+    def _key(session: Optional[str], user_id: str,
+             context: Optional[Dict[str, Any]]) -> Tuple[Optional[str], str, str]:
+        return session, user_id, json.dumps(context or {}, sort_keys=True)
+
+    def _fetch(self, user_id: str, context: Optional[Dict[str, Any]], record: bool = True) -> dict:
+        payload: Dict[str, Any] = {"user_id": user_id, "debug": False}
+        if context:
+            payload["context"] = context
+        if not record:
+            payload["record"] = False
+        return self._post("/choose", payload)
+
+    def _expose(self, user_id: str, context: Optional[Dict[str, Any]], data: dict):
+        payload: Dict[str, Any] = {"user_id": user_id, "arm": data["arm"], "decision_id": data["decision_id"],
+                                   "propensity": data["propensity"]}
+        if data.get("items"):
+            payload["item_id"] = data["items"][0]["item_id"]
+        if context:
+            payload["context"] = context
+        try:
+            self._post("/expose", payload)
+            self.exposed += 1
+        except Exception:
+            self.expose_failed += 1   # 노출 한 건을 잃을 뿐 화면은 이미 떴다
+
+    def choose(self, user_id: str, context: Optional[Dict[str, Any]] = None, session: Optional[str] = None) -> dict:
+        """
+        프리페치된 결과가 있으면 그것을(진행 중이면 완료를 기다려서), 없으면 바로 요청. 이어서 다음 것을 프리페치.
+        session: 호출자 세션 식별자(Streamlit 세션마다 다르게). 프리페치는 같은 세션 안에서만 재사용된다.
+        """
+        key = self._key(session, user_id, context)
+        with self._prefetch_lock:
+            entry = self._prefetched.pop(key, None)
+        data = None
+        if entry is not None and time.monotonic() - entry[0] < self.prefetch_ttl:
+            try:
+                data = entry[1].result(timeout=self.timeout[0] + self.timeout[1])
+            except Exception:
+                data = None   # 프리페치 실패는 조용히 무시하고 직접 요청
+            if data is not None:
+                self._pool.submit(self._expose, user_id, context, data)   # 이제 보여 주므로 노출로 기록
+        if data is None:
+            data = self._fetch(user_id, context)
+        if self.prefetch:
+            self._start_prefetch(key, user_id, context)
+        return data
+
+    def _start_prefetch(self, key, user_id: str, context: Optional[Dict[str, Any]]):
+        now = time.monotonic()
+        with self._prefetch_lock:
+            # 끝난 세션/바뀐 컨텍스트의 프리페치가 쌓이지 않도록 만료된 것은 버린다(서버에는 기록된 게 없음)
+            for k in [k for k, (t0, _) in self._prefetched.items() if now - t0 >= self.prefetch_ttl]:
+                del self._prefetched[k]
+            if key not in self._prefetched:
+                self._prefetched[key] = (now, self._pool.submit(self._fetch, user_id, context, False))
+
+    # ---- 클릭 보고 ----
+    def report_click(self, event: dict):
+        """/update 이벤트 하나를 버퍼에 넣고 즉시 반환."""
+        with self._cond:
+            if len(self._clicks) + self._inflight >= self.buffer_size:
+                if not self._clicks:
+                    self.dropped += 1   # 전부 전송 중: 새 이벤트를 버린다
+                    return
+                self._clicks.popleft()
+                self.dropped += 1
+            self._clicks.append(event)
+            self._cond.notify()
+
+    @property
+    def pending(self) -> int:
+        return len(self._clicks) + self._inflight
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """버퍼(전송 중 포함)가 빌 때까지 기다린다(테스트/종료용). 비었으면 True."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self.pending
+
+    def _send_loop(self):
+        delay = self.retry_secs
+        while True:
+            with self._cond:
+                while not self._clicks and not self._stop:
+                    self._cond.wait()
+                if not self._clicks:
+                    return
+                size = self._sizes.popleft() if self._sizes else self.batch_size
+                batch = [self._clicks.popleft() for _ in range(min(size, len(self._clicks)))]
+                self._inflight = len(batch)
+            try:
+                self._post("/update/batch", {"events": batch}, retries=0)
+            except ApiError as e:
+                if e.status is not None and 400 <= e.status < 500 and e.status != 429:
+                    if len(batch) > 1:
+                        # 어느 이벤트가 잘못됐는지 모르므로 반씩 나눠 버퍼 앞에 되돌린다(이분 탐색)
+                        with self._cond:
+                            self._inflight = 0
+                            self._clicks.extendleft(reversed(batch))
+                            self.split_batches += 1
+                            half = len(batch) // 2
+                            self._sizes.extendleft([len(batch) - half, half])   # 앞 절반, 뒤 절반 순서
+                        continue
+                    # 한 건짜리(예: 알 수 없는 arm)는 다시 보내도 실패 → 버리고 다음으로
+                    print(f"[WARN] dropping click event: {e}")
+                    self._done(1, sent=False)
+                    continue
+                ok = False
+            except requests.RequestException:
+                ok = False
+            else:
+                ok = True
+            if ok:
+                self._done(len(batch), sent=True)
+                delay = self.retry_secs
+                continue
+            # 서버가 안 받으면 버퍼 앞에 되돌려 두고 지터 백오프 후 재시도(상한 30초)
+            with self._cond:
+                self.failed_attempts += 1
+                self._inflight = 0
+                room = self.buffer_size - len(self._clicks)
+                keep = batch[max(0, len(batch) - room):]
+                self.dropped += len(batch) - len(keep)
+                self._clicks.extendleft(reversed(keep))
+                if self._stop:
+                    return
+                self._cond.wait(timeout=random.uniform(0, delay))
+                if self._stop:
+                    return
+            delay = min(delay * 2, 30.0)
+
+    def _done(self, n: int, sent: bool):
+        with self._cond:
+            self._inflight = 0
+            if sent:
+                self.sent += n
+            else:
+                self.dropped += n
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._sender.join(timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self.pending, "sent": self.sent, "dropped": self.dropped,
+                "failed_attempts": self.failed_attempts, "split_batches": self.split_batches,
+                "exposed": self.exposed, "expose_failed": self.expose_failed}
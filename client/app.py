@@ -1,7 +1,10 @@
 import os
-import requests
+import uuid
+
 import streamlit as st
 
+from api_client import ApiClient
+
 # -----------------------
 # 안전한 API 엔드포인트 설정 (환경변수 > secrets > 기본값)
 # -----------------------
@@ -12,6 +15,24 @@ try:
 except Exception:
     pass
 
+
+@st.cache_resource
+def get_client(base_url: str) -> ApiClient:
+    # 프로세스당 하나: 모든 세션/리런이 같은 커넥션 풀과 클릭 버퍼를 공유
+    return ApiClient(
+        base_url,
+        connect_timeout=float(os.getenv("API_CONNECT_TIMEOUT", "1.0")),
+        read_timeout=float(os.getenv("API_READ_TIMEOUT", "5.0")),
+        retries=int(os.getenv("API_RETRIES", "2")),
+        prefetch=os.getenv("API_PREFETCH", "1") == "1",
+    )
+
+
+client = get_client(API)
+# 클라이언트는 프로세스 공유(cache_resource) → 프리페치는 세션 id로 구분해 다른 세션 것을 가져가지 않게 한다
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+
 # -----------------------
 # 페이지 & 테마 설정
 # -----------------------
@@ -95,10 +116,9 @@ with st.container():
 # -----------------------
 if fetch:
     try:
-        r = requests.post(f"{API}/choose", json={"user_id": user_id})
-        r.raise_for_status()
-        data = r.json()
+        data = client.choose(user_id, session=st.session_state["session_id"])
         st.session_state["arm"] = data.get("arm", "A")
+        st.session_state["decision_id"] = data.get("decision_id")
         st.session_state["candidates"] = data.get("items", [])
         st.success(f"추천이 도착했어요! (전략: {st.session_state['arm']})")
     except Exception as e:
@@ -115,28 +135,26 @@ if "candidates" in st.session_state and st.session_state["candidates"]:
             st.markdown(
                 f"""
                 <div class="card">
-                  <div class="product-title">💡 {item}<span class="pill">추천</span></div>
-                  <div class="subtle">맞춤형 혜택을 확인해 보세요.</div>
+                  <div class="product-title">💡 {item['title']}<span class="pill">추천</span></div>
+                  <div class="subtle">{item.get('genre') or '맞춤형 혜택을 확인해 보세요.'}</div>
                 </div>
                 """,
                 unsafe_allow_html=True,
             )
-            # 선택 즉시 업데이트 (버튼형)
+            # 선택 즉시 반영: 클릭은 백그라운드 버퍼로 보내고 화면은 기다리지 않는다
             key = f"choose_{i}"
             if st.button("이 상품 선택", key=key, use_container_width=True):
                 payload = {
                     "user_id": user_id,
                     "arm": st.session_state.get("arm", "A"),
                     "reward": 1.0,
-                    "meta": {"choice": item},
+                    "item_id": item["item_id"],
+                    "decision_id": st.session_state.get("decision_id"),
+                    "meta": {"choice": item["title"]},
                 }
-                try:
-                    resp = requests.post(f"{API}/update", json=payload, timeout=10)
-                    resp.raise_for_status()
-                    st.session_state["last_choice"] = item
-                    st.success(f"선택이 기록됐어요. 감사합니다 🙏")
-                except Exception as e:
-                    st.error(f"업데이트 실패: {e}")
+                client.report_click(payload)
+                st.session_state["last_choice"] = item["title"]
+                st.success("선택이 기록됐어요. 감사합니다 🙏")
 
 # -----------------------
 # 최근 선택 알림
@@ -1,15 +1,32 @@
 # preprocess.py
-# MovieLens 100K에서 아이템 타이틀을 뽑아 data/sample_items.csv 생성
+# MovieLens 100K 전처리 파이프라인: 원본 텍스트를 한 번씩만 줄 단위로 읽어 바이너리 산출물(.npy)을 만든다
+# - u.item  → data/sample_items.csv (item_id, title) + data/artifacts/catalog/ (장르 비트마스크, 제목 blob)
+# - u.user  → data/artifacts/users/   (나이, 성별, 직업 인덱스)
+# - u.data  → data/artifacts/ratings/ (유저 행 CSR: indptr/indices/ratings/ts)
+#             data/artifacts/popularity/ (아이템별 평점/선호 수, 선호 수 기준 순위)
+# - ratings/ → data/artifacts/variant_b/ (Variant B item-KNN 모델, variants/item_knn.py로 학습)
+#   서빙 프로세스는 학습하지 않고 이 산출물만 읽는다(앱 시작/벤치마크 import가 학습에 막히지 않게)
+# - data/artifacts/manifest.json : 단계별 입력/출력 sha256. 입력 해시가 같고 출력이 모두 있으면 그 단계는 건너뛴다
+#   (--force 로 강제 재생성). 다운스트림(variants/catalog.py, variants/item_knn.py)은 산출물을 mmap으로 읽고,
+#   출력 해시를 버전으로 써서 파생 모델이 오래됐는지 판단한다
 # - 가능한 경로를 자동으로 탐색하고, zip이 있으면 풀어서 사용
-# - 사용처: variants/variant_*.py 가 이 CSV를 읽어 Streamlit UI에 아이템 노출
+#
+# 사용 예:
+#   python data/preprocess.py            # 바뀐 입력만 다시 처리
+#   python data/preprocess.py --force    # 전부 재생성
 
 from __future__ import annotations
+import argparse
 import csv
-import os
+import hashlib
+import json
 import sys
 import zipfile
+from array import array
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
 
 # ----- 설정 -----
 DATA_DIR = Path(__file__).resolve().parent          # .../data
@@ -23,6 +40,17 @@ EXTRACT_DIR_CANDIDATES = [
     DATA_DIR / "movielens_100k",                    # 혹시 바로 여기 풀렸다면: data/movielens_100k/u.item
 ]
 OUTPUT_CSV = DATA_DIR / "sample_items.csv"
+ARTIFACTS_DIR = DATA_DIR / "artifacts"
+CATALOG_DIR = ARTIFACTS_DIR / "catalog"
+USERS_DIR = ARTIFACTS_DIR / "users"
+RATINGS_DIR = ARTIFACTS_DIR / "ratings"
+POPULARITY_DIR = ARTIFACTS_DIR / "popularity"
+VARIANT_B_DIR = ARTIFACTS_DIR / "variant_b"
+MANIFEST_PATH = ARTIFACTS_DIR / "manifest.json"
+N_GENRES = 19   # u.item 마지막 19개 컬럼(0/1)
+LIKE_RATING = 4   # 인기도 집계에서 '선호'로 보는 최소 평점(variants/item_knn.MIN_RATING과 동일)
+PIPELINE_VERSION = 1   # 산출물 형식이 바뀌면 올린다 → 기존 manifest 무효화
+_CHUNK = 1 << 20
 
 
 def find_u_item_path() -> Optional[Path]:
@@ -81,38 +109,255 @@ def extract_zip_if_needed() -> Optional[Path]:
     return find_u_item_path()
 
 
-def generate_sample_items_csv(u_item_path: Path, out_csv: Path, max_rows: int | None = None) -> None:
+def read_genre_names(u_genre_path: Path) -> list[str]:
+    """u.genre (name|index) → index 순서의 장르 이름 목록."""
+    names = [""] * N_GENRES
+    with u_genre_path.open("r", encoding="latin-1") as f:
+        for line in f:
+            parts = line.strip().split("|")
+            if len(parts) == 2 and parts[1].isdigit():
+                names[int(parts[1])] = parts[0]
+    return names
+
+
+# ===== 해시/manifest =====
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _hash_outputs(out_dir: Path, files: List[str]) -> str:
+    """출력 파일 내용 해시(파일 이름 순서 고정). 다운스트림은 이 값을 버전으로 쓴다."""
+    h = hashlib.sha256()
+    for name in files:
+        h.update(name.encode("utf-8"))
+        h.update(sha256_file(out_dir / name).encode("ascii"))
+    return h.hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict:
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == PIPELINE_VERSION:
+            return manifest
+    return {"version": PIPELINE_VERSION, "stages": {}}
+
+
+def _save_json(path: Path, obj: Dict):
+    # 쓰는 도중 읽는 쪽이 깨진 JSON을 보지 않도록 임시 파일에 쓰고 교체
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+
+
+# ===== 단계별 빌더: 입력 파일을 한 번씩만 스트리밍 =====
+def build_items(u_item_path: Path, out_dir: Path = CATALOG_DIR, out_csv: Path = OUTPUT_CSV) -> Dict:
     """
-    u.item에서 (item_id, title)를 추출해 CSV로 저장.
-    인코딩은 원본 특성상 'latin-1'이 안전.
+    u.item 한 번 읽기로 sample_items.csv 와 컬럼형 바이너리 카탈로그를 함께 만든다.
+    item_ids.npy(int32), genre_mask.npy(uint32, bit i = 장르 i),
+    title_offsets.npy(int64, N+1) + title_blob.npy(uint8, utf-8 이어붙임), meta.json(장르 이름, 버전 해시)
     """
+    out_dir.mkdir(parents=True, exist_ok=True)
     out_csv.parent.mkdir(parents=True, exist_ok=True)
-    seen = set()
-    rows = 0
-
+    ids, masks = array("i"), array("I")
+    offsets = array("q", [0])
+    blob = bytearray()
     with u_item_path.open("r", encoding="latin-1") as fin, \
          out_csv.open("w", newline="", encoding="utf-8") as fout:
-        writer = csv.DictWriter(fout, fieldnames=["item_id", "title"])
-        writer.writeheader()
+        writer = csv.writer(fout, lineterminator="\n")
+        writer.writerow(["item_id", "title"])
         for line in fin:
-            parts = line.strip().split("|")
-            if not parts or len(parts) < 2:
+            parts = line.rstrip("\n").split("|")
+            if len(parts) < 5 + N_GENRES:
                 continue
-            item_id, title = parts[0], parts[1]
-            # 중복 타이틀 제거(간단한 안전장치)
-            key = (item_id, title)
-            if key in seen:
+            mask = 0
+            for bit, flag in enumerate(parts[-N_GENRES:]):
+                if flag == "1":
+                    mask |= 1 << bit
+            ids.append(int(parts[0]))
+            masks.append(mask)
+            blob += parts[1].encode("utf-8")
+            offsets.append(len(blob))
+            writer.writerow([parts[0], parts[1]])
+
+    files = ["item_ids.npy", "genre_mask.npy", "title_offsets.npy", "title_blob.npy"]
+    np.save(out_dir / files[0], np.frombuffer(ids, dtype=np.int32))
+    np.save(out_dir / files[1], np.frombuffer(masks, dtype=np.uint32))
+    np.save(out_dir / files[2], np.frombuffer(offsets, dtype=np.int64))
+    np.save(out_dir / files[3], np.frombuffer(bytes(blob), dtype=np.uint8))
+
+    u_genre = u_item_path.parent / "u.genre"
+    genres = read_genre_names(u_genre) if u_genre.exists() else [f"genre_{i}" for i in range(N_GENRES)]
+    digest = _hash_outputs(out_dir, files)
+    _save_json(out_dir / "meta.json", {"n_items": len(ids), "genres": genres, "hash": digest})
+    print(f"[OK] Wrote {len(ids)} items → {out_csv}, {out_dir}")
+    return {"outputs": {out_dir.name: {"hash": digest, "files": files + ["meta.json"]}}, "n_items": len(ids)}
+
+
+def read_occupations(path: Path) -> List[str]:
+    with path.open("r", encoding="latin-1") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def build_users(u_user_path: Path, out_dir: Path = USERS_DIR) -> Dict:
+    """
+    u.user (id|age|gender|occupation|zip) → user_id로 바로 인덱싱하는 배열(행 0은 비어 있음).
+    age.npy(uint8, 0=없음), gender.npy(int8: 0=M, 1=F, -1=없음), occupation.npy(int16, -1=없음)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    u_occ = u_user_path.parent / "u.occupation"
+    occupations = read_occupations(u_occ) if u_occ.exists() else []
+    occ_index = {o: i for i, o in enumerate(occupations)}
+    uids, ages, genders, occs = array("i"), array("B"), array("b"), array("h")
+    with u_user_path.open("r", encoding="latin-1") as fin:
+        for line in fin:
+            parts = line.rstrip("\n").split("|")
+            if len(parts) < 4 or not parts[0].isdigit():
                 continue
-            seen.add(key)
-            writer.writerow({"item_id": item_id, "title": title})
-            rows += 1
-            if max_rows is not None and rows >= max_rows:
-                break
+            occ = occ_index.get(parts[3])
+            if occ is None:   # u.occupation 에 없는 값은 뒤에 추가
+                occ = occ_index[parts[3]] = len(occupations)
+                occupations.append(parts[3])
+            uids.append(int(parts[0]))
+            ages.append(min(int(parts[1]), 255) if parts[1].isdigit() else 0)
+            genders.append({"M": 0, "F": 1}.get(parts[2], -1))
+            occs.append(occ)
 
-    print(f"[OK] Wrote {rows} items → {out_csv}")
+    uid = np.frombuffer(uids, dtype=np.int32)
+    n = int(uid.max()) + 1 if len(uid) else 1
+    age = np.zeros(n, dtype=np.uint8)
+    gender = np.full(n, -1, dtype=np.int8)
+    occupation = np.full(n, -1, dtype=np.int16)
+    age[uid] = np.frombuffer(ages, dtype=np.uint8)
+    gender[uid] = np.frombuffer(genders, dtype=np.int8)
+    occupation[uid] = np.frombuffer(occs, dtype=np.int16)
 
+    files = ["age.npy", "gender.npy", "occupation.npy"]
+    for name, arr in zip(files, (age, gender, occupation)):
+        np.save(out_dir / name, arr)
+    digest = _hash_outputs(out_dir, files)
+    _save_json(out_dir / "meta.json", {"n_users": len(uid), "genders": ["M", "F"],
+                                       "occupations": occupations, "hash": digest})
+    print(f"[OK] Wrote {len(uid)} users → {out_dir}")
+    return {"outputs": {out_dir.name: {"hash": digest, "files": files + ["meta.json"]}}, "n_users": len(uid)}
 
-def main():
+
+def build_ratings(u_data_path: Path, out_dir: Path = RATINGS_DIR, pop_dir: Path = POPULARITY_DIR) -> Dict:
+    """
+    u.data (user\titem\trating\tts) 한 번 읽기로 두 산출물을 만든다.
+    - ratings/: 유저 행 CSR. indptr(int64, max_user+2), indices(int32 item_id, 행 안에서 오름차순),
+      ratings(int8), ts(int32). 유저 u의 평점은 [indptr[u], indptr[u+1]) 구간
+    - popularity/: item_id로 인덱싱하는 n_ratings(int32), n_likes(int32, 평점 >= LIKE_RATING),
+      rank(int32, 선호 수 기준 0부터, 동점은 item_id 순), popular(int32, 선호 수 내림차순 item_id)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    pop_dir.mkdir(parents=True, exist_ok=True)
+    users, items, ts = array("i"), array("i"), array("i")
+    ratings = array("b")
+    with u_data_path.open("rb") as fin:
+        for line in fin:
+            parts = line.split()
+            if len(parts) < 4:
+                continue
+            users.append(int(parts[0]))
+            items.append(int(parts[1]))
+            ratings.append(int(parts[2]))
+            ts.append(int(parts[3]))
+
+    u = np.frombuffer(users, dtype=np.int32)
+    i = np.frombuffer(items, dtype=np.int32)
+    r = np.frombuffer(ratings, dtype=np.int8)
+    t = np.frombuffer(ts, dtype=np.int32)
+    order = np.lexsort((i, u))
+    n_rows = int(u.max()) + 1 if len(u) else 1
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(u, minlength=n_rows), out=indptr[1:])
+
+    files = ["indptr.npy", "indices.npy", "ratings.npy", "ts.npy"]
+    for name, arr in zip(files, (indptr, i[order], r[order], t[order])):
+        np.save(out_dir / name, arr)
+    n_items = int(i.max()) + 1 if len(i) else 1
+    digest = _hash_outputs(out_dir, files)
+    _save_json(out_dir / "meta.json", {"n_ratings": len(u), "n_rows": n_rows, "n_cols": n_items,
+                                       "hash": digest})
+
+    n_ratings = np.bincount(i, minlength=n_items).astype(np.int32)
+    n_likes = np.bincount(i[r >= LIKE_RATING], minlength=n_items).astype(np.int32)
+    n_likes_ranked = n_likes.copy()
+    n_likes_ranked[0] = -1   # item_id 0 은 없음 → 맨 뒤
+    popular = np.argsort(-n_likes_ranked, kind="stable").astype(np.int32)
+    rank = np.empty(n_items, dtype=np.int32)
+    rank[popular] = np.arange(n_items, dtype=np.int32)
+    pop_files = ["n_ratings.npy", "n_likes.npy", "rank.npy", "popular.npy"]
+    for name, arr in zip(pop_files, (n_ratings, n_likes, rank, popular[:-1])):
+        np.save(pop_dir / name, arr)
+    pop_digest = _hash_outputs(pop_dir, pop_files)
+    _save_json(pop_dir / "meta.json", {"like_rating": LIKE_RATING, "hash": pop_digest})
+
+    print(f"[OK] Wrote {len(u)} ratings ({n_rows - 1} users x {n_items - 1} items) → {out_dir}, {pop_dir}")
+    return {"outputs": {out_dir.name: {"hash": digest, "files": files + ["meta.json"]},
+                        pop_dir.name: {"hash": pop_digest, "files": pop_files + ["meta.json"]}},
+            "n_ratings": len(u)}
+
+
+def build_variant_b(ratings_dir: Path = RATINGS_DIR, out_dir: Path = VARIANT_B_DIR) -> Dict:
+    """ratings/ CSR 산출물로 Variant B item-KNN 모델을 학습해 저장(meta.json에 평점 해시를 남긴다)."""
+    if str(DATA_DIR.parent) not in sys.path:
+        sys.path.insert(0, str(DATA_DIR.parent))   # python data/preprocess.py 로 실행해도 variants 를 찾도록
+    from variants import item_knn
+
+    ratings_hash = item_knn.ratings_version(str(ratings_dir))
+    model = item_knn.train(item_knn.load_ratings(ratings_dir=str(ratings_dir)))
+    item_knn.save(model, str(out_dir), ratings_hash=ratings_hash)
+    files = ["topk.npy", "popular.npy", "meta.json"]
+    print(f"[OK] Trained variant B model {model['version']} {model['topk'].shape} → {out_dir}")
+    return {"outputs": {out_dir.name: {"hash": _hash_outputs(out_dir, files[:2]), "files": files}}}
+
+
+# ===== 실행 =====
+# manifest.json:
+#   {"version": 1, "stages": {"ratings": {"inputs": {"u.data": sha256},
+#                                          "outputs": {"ratings": {"hash": ..., "files": [...]},
+#                                                      "popularity": {...}}, ...}}}
+# outputs 의 키는 ARTIFACTS_DIR 아래 폴더 이름
+def _outputs_exist(stage: Dict) -> bool:
+    outputs = stage.get("outputs") or {}
+    return bool(outputs) and all((ARTIFACTS_DIR / d / f).exists() for d, o in outputs.items() for f in o["files"])
+
+
+def output_hash(manifest: Dict, out_name: str) -> Optional[str]:
+    """산출물 폴더(catalog, users, ratings, popularity)의 현재 내용 해시."""
+    for stage in manifest["stages"].values():
+        out = (stage.get("outputs") or {}).get(out_name)
+        if out is not None:
+            return out["hash"]
+    return None
+
+
+def run_stage(manifest: Dict, name: str, inputs: List[Path], build: Callable[[], Dict],
+              force: bool = False, extra_outputs: List[Path] = ()) -> bool:
+    """입력 해시가 manifest와 같고 출력이 모두 있으면 건너뛴다. 다시 만들었으면 True."""
+    hashes = {p.name: sha256_file(p) for p in inputs if p.exists()}
+    prev = manifest["stages"].get(name)
+    if (not force and prev and prev.get("inputs") == hashes and _outputs_exist(prev)
+            and all(p.exists() for p in extra_outputs)):
+        print(f"[SKIP] {name}: inputs unchanged")
+        return False
+    result = build()
+    result["inputs"] = hashes
+    manifest["stages"][name] = result
+    return True
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Preprocess MovieLens 100K into binary artifacts")
+    ap.add_argument("--force", action="store_true", help="입력 해시와 무관하게 전부 다시 생성")
+    args = ap.parse_args(argv)
     print(f"[INFO] DATA_DIR = {DATA_DIR}")
 
     # 1) u.item 경로를 먼저 찾아본다
@@ -130,9 +375,31 @@ def main():
         sys.exit(1)
 
     print(f"[INFO] Using u.item at: {u_item}")
+    src = u_item.parent
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest()
+    changed = False
+
+    # 3) 단계별 실행(같은 폴더의 u.user/u.data 는 없으면 건너뜀)
+    changed |= run_stage(manifest, "items", [u_item, src / "u.genre"],
+                         lambda: build_items(u_item), args.force, extra_outputs=[OUTPUT_CSV])
+    if (src / "u.user").exists():
+        changed |= run_stage(manifest, "users", [src / "u.user", src / "u.occupation"],
+                             lambda: build_users(src / "u.user"), args.force)
+    else:
+        print(f"[WARN] {src / 'u.user'} not found — skipping user features")
+    if (src / "u.data").exists():
+        changed |= run_stage(manifest, "ratings", [src / "u.data"],
+                             lambda: build_ratings(src / "u.data"), args.force)
+        # 평점 산출물 meta.json(내용 해시)을 입력으로 → 평점이 바뀌었을 때만 다시 학습
+        changed |= run_stage(manifest, "variant_b", [RATINGS_DIR / "meta.json"],
+                             build_variant_b, args.force)
+    else:
+        print(f"[WARN] {src / 'u.data'} not found — skipping ratings/popularity/variant B model")
 
-    # 3) sample_items.csv 생성
-    generate_sample_items_csv(u_item_path=u_item, out_csv=OUTPUT_CSV, max_rows=None)
+    if changed:
+        _save_json(MANIFEST_PATH, manifest)
+        print(f"[OK] manifest → {MANIFEST_PATH}")
 
 
 if __name__ == "__main__":
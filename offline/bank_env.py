@@ -0,0 +1,257 @@
+# bank_env.py
+# data/bank.csv(은행 정기예금 마케팅)를 컨텍스트 밴딧 시뮬레이션 환경으로 사용
+# - 로더: CSV를 한 번만 읽어 범주형 컬럼은 정수 코드(int8), 수치형은 float32로 인코딩해 .npy로 캐시
+#   (data/artifacts/bank/, 원본 sha256이 같으면 CSV를 다시 파싱하지 않고 mmap으로 읽는다)
+# - 특성 행렬: [bias, 수치형 z-score, 범주형 원-핫] (n, d). duration(통화 시간)은 결과를 알고 나서야
+#   정해지는 값이라 컨텍스트에서 뺀다
+# - 환경: arm = {skip, offer}, 보상 = 고객의 실제 deposit 여부와 행동이 맞으면 1
+#   (offer & deposit=yes, skip & deposit=no). 분류 문제를 밴딧으로 바꾸는 표준 방식이며 오라클 보상은 항상 1
+# - 매 라운드: 고객 행을 균등 복원추출 → 정책이 arm 선택 → 보상. 배치 단위 벡터화
+#   (LinUCB/LinearThompson은 choose_features/update_features, 비컨텍스트 정책은 choose_batch/update_batch)
+#
+# 사용 예:
+#   python offline/bank_env.py --policies linucb,lints,thompson,uniform --seeds 3 --rounds 1000000
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.contextual import make_contextual  # noqa: E402
+from app.policies import make_policy  # noqa: E402
+from offline.simulate import UniformPolicy, _parse_seeds, run_many  # noqa: E402
+
+BANK_CSV = os.path.join(ROOT, "data", "bank.csv")
+CACHE_DIR = os.path.join(ROOT, "data", "artifacts", "bank")
+TARGET = "deposit"
+NUMERIC = ["age", "balance", "day", "campaign", "pdays", "previous"]
+CATEGORICAL = ["job", "marital", "education", "default", "housing", "loan", "contact", "month", "poutcome"]
+LEAKY = ["duration"]   # 결과 이후에 알 수 있는 값
+ARMS = ["skip", "offer"]
+ENCODING_VERSION = 1
+
+
+# ===== 로더 =====
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def encode_bank(path: str = BANK_CSV, out_dir: str = CACHE_DIR, digest: str | None = None) -> Dict:
+    """
+    CSV 한 번 읽기 → codes.npy(int8, (n, 범주형 수)), numeric.npy(float32, (n, 수치형 수)),
+    target.npy(bool), meta.json(컬럼, 범주 목록, 원본 해시). 범주 코드는 값의 정렬 순서.
+    """
+    cats: Dict[str, Dict[str, int]] = {c: {} for c in CATEGORICAL}
+    raw_codes: List[List[int]] = []
+    numeric: List[List[float]] = []
+    target: List[bool] = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            codes = []
+            for c in CATEGORICAL:
+                vocab = cats[c]
+                codes.append(vocab.setdefault(row[c], len(vocab)))
+            raw_codes.append(codes)
+            numeric.append([float(row[c]) for c in NUMERIC])
+            target.append(row[TARGET] == "yes")
+
+    # 등장 순서 코드 → 정렬 순서 코드(입력 행 순서와 무관하게 같은 인코딩)
+    codes = np.asarray(raw_codes, dtype=np.int8).reshape(-1, len(CATEGORICAL))
+    categories = {}
+    for j, c in enumerate(CATEGORICAL):
+        values = sorted(cats[c])
+        remap = np.empty(len(values), dtype=np.int8)
+        for new, v in enumerate(values):
+            remap[cats[c][v]] = new
+        codes[:, j] = remap[codes[:, j]]
+        categories[c] = values
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "codes.npy"), codes)
+    np.save(os.path.join(out_dir, "numeric.npy"), np.asarray(numeric, dtype=np.float32).reshape(-1, len(NUMERIC)))
+    np.save(os.path.join(out_dir, "target.npy"), np.asarray(target, dtype=bool))
+    meta = {"version": ENCODING_VERSION, "source_hash": digest or _sha256(path), "rows": len(target),
+            "numeric": NUMERIC, "categorical": CATEGORICAL, "categories": categories, "target": TARGET}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    print(f"[OK] encoded {len(target)} rows → {out_dir}")
+    return meta
+
+
+class BankData:
+    def __init__(self, codes: np.ndarray, numeric: np.ndarray, target: np.ndarray, meta: Dict):
+        self.codes = codes
+        self.numeric = numeric
+        self.target = target
+        self.meta = meta
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+    def feature_names(self) -> List[str]:
+        names = ["bias"] + list(self.meta["numeric"])
+        for c in self.meta["categorical"]:
+            names += [f"{c}={v}" for v in self.meta["categories"][c]]
+        return names
+
+    def features(self) -> np.ndarray:
+        """(n, d) float64 설계 행렬: bias, 수치형 z-score, 범주형 원-핫."""
+        num = np.asarray(self.numeric, dtype=np.float64)
+        std = num.std(axis=0)
+        std[std == 0] = 1.0
+        sizes = [len(self.meta["categories"][c]) for c in self.meta["categorical"]]
+        offsets = 1 + num.shape[1] + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        X = np.zeros((len(self), 1 + num.shape[1] + sum(sizes)))
+        X[:, 0] = 1.0
+        X[:, 1:1 + num.shape[1]] = (num - num.mean(axis=0)) / std
+        X[np.arange(len(self))[:, None], offsets + self.codes] = 1.0
+        return X
+
+
+def load_bank(path: str = BANK_CSV, cache_dir: str = CACHE_DIR) -> BankData:
+    """캐시가 원본과 같으면 mmap으로 읽고, 없거나 원본이 바뀌었으면 다시 인코딩."""
+    digest = _sha256(path)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != ENCODING_VERSION or meta.get("source_hash") != digest:
+            meta = None
+    if meta is None:
+        meta = encode_bank(path, cache_dir, digest)
+
+    def npy(name):
+        return np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+
+    return BankData(npy("codes"), npy("numeric"), npy("target"), meta)
+
+
+# ===== 환경 =====
+class BankEnv:
+    def __init__(self, path: str = BANK_CSV, cache_dir: str = CACHE_DIR):
+        data = load_bank(path, cache_dir)
+        self.name = "bank"
+        self.arms = list(ARMS)
+        self.X = data.features()
+        self.feature_names = data.feature_names()
+        self.y = np.asarray(data.target, dtype=np.int64)   # 정답 arm 인덱스(1 = offer)
+        self.base_rate = float(self.y.mean())
+        self.best_fixed = max(self.base_rate, 1 - self.base_rate)   # 항상 같은 arm을 고를 때의 정확도
+
+    @property
+    def dim(self) -> int:
+        return self.X.shape[1]
+
+    @property
+    def n_arms(self) -> int:
+        return len(self.arms)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(0, len(self.y), size=n)
+
+    def reward(self, rows: np.ndarray, arms: np.ndarray) -> np.ndarray:
+        return (arms == self.y[rows]).astype(np.float64)
+
+
+@lru_cache(maxsize=None)
+def load_env() -> BankEnv:
+    # 워커 프로세스마다 한 번만 적재
+    return BankEnv()
+
+
+# ===== 정책 =====
+POLICIES: Dict[str, Callable] = {
+    "linucb": lambda env, seed: make_contextual("linucb", env.arms, dim=env.dim, seed=seed),
+    "lints": lambda env, seed: make_contextual("lints", env.arms, dim=env.dim, seed=seed),
+    "thompson": lambda env, seed: make_policy("thompson", env.arms, seed=seed),
+    "egreedy": lambda env, seed: make_policy("egreedy", env.arms, seed=seed),
+    "uniform": lambda env, seed: UniformPolicy(env.arms, seed=seed),
+}
+
+
+# ===== 실행 =====
+def run(policy: str, seed: int, rounds: int, batch: int, record_every: int) -> Dict[str, np.ndarray]:
+    env = load_env()
+    pol = POLICIES[policy](env, seed)
+    contextual = hasattr(pol, "choose_features")
+    rng = np.random.default_rng(seed + 1_000_003)
+
+    n_rec = -(-rounds // record_every)
+    t_out = np.zeros(n_rec, dtype=np.int64)
+    reward_out = np.zeros(n_rec)
+
+    cum_reward = 0.0
+    t = rec = 0
+    next_rec = record_every
+    while t < rounds:
+        n = min(batch, rounds - t, next_rec - t)
+        rows = env.sample(n, rng)
+        if contextual:
+            X = env.X[rows]
+            arms = pol.choose_features(X)
+            rewards = env.reward(rows, arms)
+            pol.update_features(arms, X, rewards)
+        else:
+            arms, _ = pol.choose_batch(n)
+            rewards = env.reward(rows, arms)
+            pol.update_batch(arms, rewards)
+        cum_reward += rewards.sum()
+        t += n
+        if t == next_rec or t == rounds:
+            t_out[rec], reward_out[rec] = t, cum_reward
+            rec += 1
+            next_rec += record_every
+    t_out, reward_out = t_out[:rec], reward_out[:rec]
+    # 오라클(정답 행동) 대비 regret = 틀린 결정 수
+    return {"t": t_out, "cum_regret": t_out - reward_out, "cum_reward": reward_out}
+
+
+def _job(args):
+    # offline/simulate.py run_many 의 job 형식(fold/split 자리는 쓰지 않는다)
+    fold, policy, seed, rounds, batch, record_every, _ = args
+    t0 = time.perf_counter()
+    out = run(policy, seed, rounds, batch, record_every)
+    return fold, policy, seed, out, time.perf_counter() - t0
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Bank-marketing contextual bandit simulator")
+    ap.add_argument("--policies", default="linucb,lints,uniform", help=f"쉼표 구분 {sorted(POLICIES)}")
+    ap.add_argument("--seeds", default="3", help="개수 N, 범위 0-4, 또는 목록 1,2,3")
+    ap.add_argument("--rounds", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=1000, help="파라미터를 고정하고 한 번에 고르는 결정 수")
+    ap.add_argument("--record-every", type=int, default=10_000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default=os.path.join(ROOT, "offline", "bank_results.npz"))
+    args = ap.parse_args(argv)
+
+    env = load_env()   # 캐시 인코딩은 워커를 띄우기 전에 한 번만(동시에 같은 파일을 쓰지 않도록)
+    print(f"[INFO] bank: {len(env.y)} rows, d={env.dim}, deposit rate={env.base_rate:.3f}, "
+          f"best fixed arm={env.best_fixed:.3f}")
+    # 실행/집계는 simulate.py 와 공유(fold = 'bank', ctr 컬럼 = 정확도, regret = 틀린 결정 수)
+    cols = run_many([env.name], args.policies.split(","), _parse_seeds(args.seeds), args.rounds, args.batch,
+                    args.record_every, workers=args.workers, job=_job)
+    np.savez_compressed(args.out, **cols)
+    print(f"[OK] {len(cols['t'])} rows → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# ips_report.py
+# 로깅된 (arm, reward, propensity) 이벤트로 후보 정책의 가치를 오프라인 추정(off-policy evaluation)
+# - 추정량: IPS, SNIPS, DR(doubly robust, 보상 모델 = arm별 평균 보상)
+# - 이벤트 저장소(data/events)를 청크 단위로 스트리밍, 행 단위 파이썬 루프 없이 NumPy로 집계
+# - 신뢰구간: 이벤트를 G개 그룹으로 나눠 그룹별 충분통계만 들고 있다가 그룹을 복원추출(부트스트랩)
+#
+# 사용 예:
+#   python offline/ips_report.py --policy A --policy B --policy uniform --policy A=0.7,B=0.3
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.storage import KIND_CLICK, KIND_EXPOSURE, iter_events  # noqa: E402
+
+DEFAULT_EVENTS = os.getenv("EVENT_STORE_DIR", os.path.join(ROOT, "data", "events"))
+DEFAULT_ARMS = ["A", "B"]
+CHUNK_ROWS = 1 << 20
+N_GROUPS = 1024
+
+Chunk = Tuple[np.ndarray, np.ndarray, np.ndarray]   # (arm idx, reward, propensity)
+
+
+# ===== 입력 =====
+def _click_rewards(root: str) -> Tuple[np.ndarray, np.ndarray]:
+    """1차 패스: decision_id별 최대 클릭 보상 (정렬된 id, 보상). 클릭은 노출보다 훨씬 적다."""
+    ids, rewards = [], []
+    for rec in iter_events(root):
+        rec = rec[(rec["kind"] == KIND_CLICK) & (rec["decision_id"] != 0)]
+        if len(rec):
+            ids.append(rec["decision_id"])
+            rewards.append(rec["reward"].astype(np.float64))
+    if not ids:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0)
+    ids, rewards = np.concatenate(ids), np.concatenate(rewards)
+    order = np.lexsort((rewards, ids))                 # id 오름차순, 같은 id면 보상 오름차순
+    ids, rewards = ids[order], rewards[order]
+    last = np.r_[ids[1:] != ids[:-1], True]           # id별 마지막 = 최대 보상
+    return ids[last], rewards[last]
+
+
+def iter_logged(root: str, arms: Sequence[str], chunk_rows: int = CHUNK_ROWS) -> Iterator[Chunk]:
+    """
+    노출(결정) 이벤트를 decision_id로 클릭과 조인해 (arm, reward, propensity) 청크로 yield.
+    클릭이 없는 노출은 reward 0 → CTR 분모와 IPS 가중치가 추정이 아니라 실제 노출 기준이 된다.
+    """
+    click_ids, click_rewards = _click_rewards(root)
+    buf: List[np.ndarray] = []
+    size = 0
+    for rec in iter_events(root, arms=arms):
+        p = rec["propensity"]
+        rec = rec[(rec["kind"] == KIND_EXPOSURE) & np.isfinite(p) & (p > 0) & (rec["arm"] < len(arms))]
+        if len(rec):
+            buf.append(rec)
+            size += len(rec)
+        if size >= chunk_rows:
+            yield _join(np.concatenate(buf), click_ids, click_rewards)
+            buf, size = [], 0
+    if buf:
+        yield _join(np.concatenate(buf), click_ids, click_rewards)
+
+
+def _join(rec: np.ndarray, click_ids: np.ndarray, click_rewards: np.ndarray) -> Chunk:
+    reward = np.zeros(len(rec))
+    if len(click_ids):
+        pos = np.searchsorted(click_ids, rec["decision_id"])
+        pos = np.minimum(pos, len(click_ids) - 1)
+        hit = click_ids[pos] == rec["decision_id"]
+        reward[hit] = click_rewards[pos[hit]]
+    return (rec["arm"].astype(np.intp), reward, rec["propensity"].astype(np.float64))
+
+
+# ===== 충분통계 =====
+class OPEAccumulator:
+    """
+    (그룹, arm)별 네 가지 합만 누적: n, Σr, Σ1/p, Σr/p.
+    목표 정책이 arm별 고정 확률이면 IPS/SNIPS/DR 모두 이 합들로 계산된다.
+    """
+
+    def __init__(self, n_arms: int, n_groups: int = N_GROUPS, min_propensity: float = 0.0):
+        self.k = n_arms
+        self.g = n_groups
+        self.min_propensity = min_propensity
+        self.stats = np.zeros((4, n_groups, n_arms))
+        self.rows = 0
+
+    def add(self, arm: np.ndarray, reward: np.ndarray, propensity: np.ndarray):
+        if self.min_propensity > 0:
+            propensity = np.maximum(propensity, self.min_propensity)
+        inv = 1.0 / propensity
+        # 이벤트 i → 그룹 (누적 행 번호 % G), 그룹·arm 평탄화 인덱스
+        group = (self.rows + np.arange(len(arm))) % self.g
+        flat = group * self.k + arm
+        size = self.g * self.k
+        for j, w in enumerate((None, reward, inv, reward * inv)):
+            self.stats[j] += np.bincount(flat, weights=w, minlength=size).reshape(self.g, self.k)
+        self.rows += len(arm)
+
+    def totals(self) -> np.ndarray:
+        return self.stats.sum(axis=1)   # (4, k)
+
+
+def estimate(totals: np.ndarray, pi: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    totals: (..., 4, k) 충분통계, pi: (k,) 목표 정책 확률.
+    앞쪽 축(부트스트랩 복제 등)은 그대로 브로드캐스트된다.
+    """
+    n, R, V, U = (totals[..., j, :] for j in range(4))
+    N = n.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qhat = np.where(n > 0, R / n, 0.0)
+        ips = (pi * U).sum(axis=-1) / N
+        snips = (pi * U).sum(axis=-1) / (pi * V).sum(axis=-1)
+        dm = (pi * qhat).sum(axis=-1)
+        dr = dm + (pi * (U - qhat * V)).sum(axis=-1) / N
+    return {"ips": ips, "snips": snips, "dr": dr, "dm": dm}
+
+
+@dataclass
+class Report:
+    policy: str
+    n: int
+    estimates: Dict[str, float]
+    ci: Dict[str, Tuple[float, float]]
+
+
+def evaluate(
+    chunks: Iterable[Chunk],
+    arms: Sequence[str],
+    policies: Dict[str, np.ndarray],
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    min_propensity: float = 0.0,
+    seed: int = 0,
+) -> Tuple[List[Report], Dict[str, float]]:
+    acc = OPEAccumulator(len(arms), min_propensity=min_propensity)
+    for arm, reward, prop in chunks:
+        acc.add(arm, reward, prop)
+
+    totals = acc.totals()
+    logging = {
+        "n": int(acc.rows),
+        "ctr": float(totals[1].sum() / max(totals[0].sum(), 1)),
+        **{f"share_{a}": float(totals[0, i] / max(totals[0].sum(), 1)) for i, a in enumerate(arms)},
+    }
+
+    # 부트스트랩: 그룹을 복원추출 → 복제별 충분통계 = (B, G) 가중치 @ (G, 4k)
+    boot = None
+    if n_boot > 0 and acc.rows > 0:
+        rng = np.random.default_rng(seed)
+        counts = rng.multinomial(acc.g, np.full(acc.g, 1.0 / acc.g), size=n_boot).astype(np.float64)
+        flat = acc.stats.transpose(1, 0, 2).reshape(acc.g, -1)
+        boot = (counts @ flat).reshape(n_boot, 4, acc.k)
+
+    reports = []
+    for name, pi in policies.items():
+        point = estimate(totals, pi)
+        ci = {}
+        if boot is not None:
+            reps = estimate(boot, pi)
+            for key, vals in reps.items():
+                vals = vals[np.isfinite(vals)]
+                if len(vals):
+                    lo, hi = np.quantile(vals, [alpha / 2, 1 - alpha / 2])
+                    ci[key] = (float(lo), float(hi))
+        reports.append(Report(name, int(acc.rows), {k: float(v) for k, v in point.items()}, ci))
+    return reports, logging
+
+
+# ===== CLI =====
+def parse_policy(spec: str, arms: Sequence[str]) -> np.ndarray:
+    """'A' → A 고정, 'uniform' → 균등, 'A=0.7,B=0.3' → 지정 확률(정규화)."""
+    k = len(arms)
+    if spec == "uniform":
+        return np.full(k, 1.0 / k)
+    pi = np.zeros(k)
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        if name not in arms:
+            raise ValueError(f"unknown arm in policy '{spec}': {name}")
+        pi[arms.index(name)] = float(w) if w else 1.0
+    if pi.sum() <= 0:
+        raise ValueError(f"policy '{spec}' has no mass")
+    return pi / pi.sum()
+
+
+def format_reports(reports: List[Report], logging: Dict[str, float]) -> str:
+    lines = [f"logged decisions: {logging['n']}  (logging CTR {logging['ctr']:.4f})",
+             f"{'policy':<20}{'IPS':>22}{'SNIPS':>22}{'DR':>22}"]
+    for r in reports:
+        cells = []
+        for key in ("ips", "snips", "dr"):
+            v = r.estimates[key]
+            lo, hi = r.ci.get(key, (float("nan"), float("nan")))
+            cells.append(f"{v:7.4f} [{lo:.4f},{hi:.4f}]")
+        lines.append(f"{r.policy:<20}" + "".join(f"{c:>22}" for c in cells))
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="Off-policy evaluation (IPS/SNIPS/DR) over the event store")
+    ap.add_argument("--events", default=DEFAULT_EVENTS, help="이벤트 저장소 디렉터리")
+    ap.add_argument("--arms", default=",".join(DEFAULT_ARMS), help="arm 목록(쉼표)")
+    ap.add_argument("--policy", action="append", default=[], help="후보 정책(여러 번 지정)")
+    ap.add_argument("--boot", type=int, default=1000, help="부트스트랩 복제 수(0이면 CI 생략)")
+    ap.add_argument("--alpha", type=float, default=0.05)
+    ap.add_argument("--clip", type=float, default=0.0, help="propensity 하한(가중치 상한 = 1/clip)")
+    ap.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    arms = args.arms.split(",")
+    specs = args.policy or arms + ["uniform"]
+    policies = {s: parse_policy(s, arms) for s in specs}
+
+    reports, logging = evaluate(iter_logged(args.events, arms), arms, policies,
+                                n_boot=args.boot, alpha=args.alpha, min_propensity=args.clip)
+    if logging["n"] == 0:
+        raise SystemExit("[WARN] propensity가 기록된 이벤트가 없습니다. /choose 노출 로그를 확인하세요.")
+    print(format_reports(reports, logging))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"logging": logging,
+                       "policies": [r.__dict__ for r in reports]}, f, indent=2)
+        print(f"[OK] report saved → {args.json}")
+
+
+if __name__ == "__main__":
+    main()
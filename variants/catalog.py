@@ -0,0 +1,120 @@
+# 모든 variant가 공유하는 아이템 카탈로그.
+# - data/preprocess.py 가 만든 바이너리 산출물(data/artifacts/catalog/*.npy)을 mmap으로 한 번만 적재
+# - 컬럼형 표현: item_id(int32), 장르 비트마스크(uint32), 제목은 utf-8 blob + offset
+# - 산출물이 없으면 sample_items.csv(ITEM_PATH)로 대체(장르 없음)
+# - version: 전처리 산출물 내용 해시(meta.json "hash"), CSV 대체 시 None
+
+import csv
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+CATALOG_DIR = os.getenv("CATALOG_DIR", "data/artifacts/catalog")
+ITEM_PATH = os.getenv("ITEM_PATH", "data/sample_items.csv")
+
+
+class Catalog:
+    def __init__(
+        self,
+        item_ids: np.ndarray,
+        genre_mask: np.ndarray,
+        title_offsets: np.ndarray,
+        title_blob: np.ndarray,
+        genre_names: List[str],
+        source: str,
+        version: Optional[str] = None,
+    ):
+        self.item_ids = item_ids
+        self.genre_mask = genre_mask
+        self.title_offsets = title_offsets
+        self.title_blob = title_blob
+        self.genre_names = genre_names
+        self.source = source
+        self.version = version
+        self._titles: List[Optional[str]] = [None] * len(item_ids)
+        # item_id → 행 인덱스 (id가 1..N 연속이면 배열 인덱싱으로 충분)
+        self._pos = {int(x): i for i, x in enumerate(item_ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def index_of(self, item_id: int) -> Optional[int]:
+        return self._pos.get(int(item_id))
+
+    def title(self, i: int) -> str:
+        t = self._titles[i]
+        if t is None:
+            lo, hi = self.title_offsets[i], self.title_offsets[i + 1]
+            t = self._titles[i] = sys.intern(bytes(self.title_blob[lo:hi]).decode("utf-8"))
+        return t
+
+    def genres(self, i: int) -> List[str]:
+        mask = int(self.genre_mask[i])
+        return [g for bit, g in enumerate(self.genre_names) if mask >> bit & 1]
+
+    def item(self, i: int) -> Dict:
+        genres = self.genres(i)
+        return {
+            "item_id": int(self.item_ids[i]),
+            "title": self.title(i),
+            "genre": genres[0] if genres else None,
+            "genres": genres,
+        }
+
+    def items(self, indices: Sequence[int]) -> List[Dict]:
+        return [self.item(int(i)) for i in indices]
+
+
+def _load_artifacts(root: str) -> Catalog:
+    with open(os.path.join(root, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def npy(name):
+        return np.load(os.path.join(root, f"{name}.npy"), mmap_mode="r")
+
+    return Catalog(
+        item_ids=npy("item_ids"),
+        genre_mask=npy("genre_mask"),
+        title_offsets=npy("title_offsets"),
+        title_blob=npy("title_blob"),
+        genre_names=meta["genres"],
+        source=root,
+        version=meta.get("hash"),
+    )
+
+
+def _load_csv(path: str) -> Catalog:
+    ids, blobs = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            ids.append(int(r["item_id"]))
+            blobs.append(r["title"].encode("utf-8"))
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in blobs])
+    return Catalog(
+        item_ids=np.asarray(ids, dtype=np.int32),
+        genre_mask=np.zeros(len(ids), dtype=np.uint32),
+        title_offsets=offsets,
+        title_blob=np.frombuffer(b"".join(blobs), dtype=np.uint8),
+        genre_names=[],
+        source=path,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> Catalog:
+    if os.path.exists(os.path.join(CATALOG_DIR, "meta.json")):
+        return _load_artifacts(CATALOG_DIR)
+    print(f"[WARN] catalog artifacts not found in {CATALOG_DIR}, falling back to {ITEM_PATH} "
+          f"(run `python data/preprocess.py` to build them)")
+    return _load_csv(ITEM_PATH)
+
+
+def reload_catalog() -> Catalog:
+    """다음 get_catalog()가 산출물을 다시 읽도록 캐시를 비우고 새 카탈로그를 반환."""
+    get_catalog.cache_clear()
+    return get_catalog()
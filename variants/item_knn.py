@@ -0,0 +1,145 @@
+# Variant B 오프라인 모델: MovieLens 평점 기반 item-item 코사인 유사도 → 유저별 top-K 사전 계산.
+# 학습:  python data/preprocess.py 의 variant_b 단계(평점 산출물이 바뀌었을 때만), 또는 python -m variants.item_knn
+# 서빙:  load_index() → TopKIndex.lookup(user_id) 는 배열 한 행을 읽는 O(1) 조회
+# 평점은 data/preprocess.py 의 CSR 산출물(data/artifacts/ratings/)을 mmap으로 읽고, 없을 때만 u.data를 파싱한다.
+# 모델 meta.json에 학습에 쓴 평점 해시를 남겨 두고, load_index는 해시가 다르면 오래된 모델이라고 경고만 한다
+
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+
+import numpy as np
+
+RATINGS_PATH = os.getenv("RATINGS_PATH", "data/ml-100k/u.data")
+RATINGS_DIR = os.getenv("RATINGS_DIR", "data/artifacts/ratings")
+MODEL_DIR = os.getenv("VARIANT_B_MODEL_DIR", "data/artifacts/variant_b")
+TOP_K = 20
+MIN_RATING = 4   # 이 점수 이상만 '선호'로 보고 유사도/추천에 사용
+
+_DIGITS = re.compile(r"(\d+)$")
+
+
+def ratings_version(ratings_dir: str = RATINGS_DIR) -> Optional[str]:
+    """전처리 산출물의 내용 해시(없으면 None)."""
+    try:
+        with open(os.path.join(ratings_dir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f).get("hash")
+    except (OSError, ValueError):
+        return None
+
+
+def load_ratings(path: str = RATINGS_PATH, ratings_dir: str = RATINGS_DIR) -> np.ndarray:
+    """(user, item, rating) int32 (N, 3) 배열. CSR 산출물이 있으면 그것을, 없으면 u.data 텍스트를 읽는다."""
+    if ratings_version(ratings_dir) is not None:
+        def npy(name):
+            return np.load(os.path.join(ratings_dir, f"{name}.npy"), mmap_mode="r")
+
+        indptr = npy("indptr")
+        out = np.empty((int(indptr[-1]), 3), dtype=np.int32)
+        out[:, 0] = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+        out[:, 1] = npy("indices")
+        out[:, 2] = npy("ratings")
+        return out
+    data = np.loadtxt(path, dtype=np.int64, usecols=(0, 1, 2))
+    return data.astype(np.int32)
+
+
+def train(ratings: np.ndarray, k: int = TOP_K, min_rating: int = MIN_RATING) -> dict:
+    """
+    item-item 코사인 유사도로 유저별 top-k item_id를 계산.
+    반환: topk(int32, (max_user+1, k), 없으면 -1), popular(int32, k), version(str)
+    """
+    users, items, r = ratings[:, 0], ratings[:, 1], ratings[:, 2]
+    n_users, n_items = int(users.max()) + 1, int(items.max()) + 1
+
+    liked = r >= min_rating
+    # 유저 x 아이템 선호 행렬(0/1). MovieLens 100K 규모는 dense float32로 충분
+    X = np.zeros((n_users, n_items), dtype=np.float32)
+    X[users[liked], items[liked]] = 1.0
+    seen = np.zeros((n_users, n_items), dtype=bool)
+    seen[users, items] = True
+
+    norms = np.sqrt(X.sum(axis=0))
+    norms[norms == 0] = 1.0
+    Xn = X / norms
+    sim = Xn.T @ Xn                 # (n_items, n_items) 코사인 유사도
+    np.fill_diagonal(sim, 0.0)
+
+    scores = X @ sim                # 유저가 좋아한 아이템들과의 유사도 합
+    scores[seen] = -np.inf          # 이미 평가한 아이템 제외
+    scores[:, 0] = -np.inf          # item_id 0 은 없음
+
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    topk = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    valid = np.isfinite(np.take_along_axis(scores, topk, axis=1)) & (X.sum(axis=1) > 0)[:, None]
+    topk[~valid] = -1
+
+    counts = np.bincount(items[liked], minlength=n_items)
+    popular = np.argsort(-counts, kind="stable")[:k].astype(np.int32)
+
+    h = hashlib.sha1(topk.tobytes())
+    h.update(popular.tobytes())
+    return {"topk": topk, "popular": popular, "version": h.hexdigest()[:12]}
+
+
+def save(model: dict, out_dir: str = MODEL_DIR, ratings_hash: Optional[str] = None):
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "topk.npy"), model["topk"])
+    np.save(os.path.join(out_dir, "popular.npy"), model["popular"])
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"model": "item_cosine", "k": int(model["topk"].shape[1]),
+                   "version": model["version"], "ratings_hash": ratings_hash}, f)
+
+
+class TopKIndex:
+    def __init__(self, topk: np.ndarray, popular: np.ndarray, version: str):
+        self.topk = topk
+        self.popular = popular
+        self.version = version
+
+    def lookup(self, user_id: str) -> np.ndarray:
+        """user_id("u001", "42" 등 끝자리 숫자)로 top-K item_id 조회. 모르는 유저는 인기순."""
+        uid = parse_user(user_id)
+        if uid is not None and 0 < uid < len(self.topk):
+            row = self.topk[uid]
+            if row[0] >= 0:
+                return row[row >= 0]
+        return self.popular
+
+
+def parse_user(user_id: str) -> Optional[int]:
+    m = _DIGITS.search(user_id.strip())
+    return int(m.group(1)) if m else None
+
+
+def load_index(model_dir: str = MODEL_DIR, ratings_dir: str = RATINGS_DIR) -> Optional[TopKIndex]:
+    """
+    학습된 산출물을 mmap으로 적재. 서빙 경로에서는 학습하지 않는다(data/preprocess.py 가 학습).
+    산출물이 없으면 None(variant_b는 카탈로그 순서로 대체), 평점이 바뀌어 오래됐으면 경고만 남기고 그대로 쓴다.
+    """
+    meta_path = os.path.join(model_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        print(f"[WARN] variant B model not found in {model_dir} — run `python data/preprocess.py` "
+              f"(or `python -m variants.item_knn`); variant B falls back to catalog order")
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    current = ratings_version(ratings_dir)
+    if current is not None and meta.get("ratings_hash") != current:
+        print(f"[WARN] variant B model in {model_dir} is stale (ratings changed) — "
+              f"re-run `python data/preprocess.py`")
+
+    return TopKIndex(
+        np.load(os.path.join(model_dir, "topk.npy"), mmap_mode="r"),
+        np.load(os.path.join(model_dir, "popular.npy"), mmap_mode="r"),
+        meta["version"],
+    )
+
+
+if __name__ == "__main__":
+    m = train(load_ratings())
+    save(m, ratings_hash=ratings_version())
+    print(f"[OK] variant B model {m['version']}: {m['topk'].shape} → {MODEL_DIR}")
@@ -1,15 +1,19 @@
-import random, csv, os
+from .catalog import get_catalog
 
-ITEM_PATH = os.getenv("ITEM_PATH", "data/sample_items.csv")
+CATALOG = get_catalog()
+TOP_N = 3
+CACHE_SCOPE = "arm"   # 유저/컨텍스트와 무관한 고정 목록(app/response_cache.py)
 
-def _load_items():
-    with open(ITEM_PATH, newline='', encoding='utf-8') as f:
-        rdr = csv.DictReader(f)
-        items = [r["title"] for r in rdr]
-    return items
 
-ITEMS = _load_items()
+def version():
+    return CATALOG.version
+
+
+def reload():
+    global CATALOG
+    CATALOG = get_catalog()
+
 
 def serve(user_id: str, context=None):
     # 간단히 상위 N 고정(데모용)
-    return ITEMS[:3] if len(ITEMS) >= 3 else ITEMS
+    return CATALOG.items(range(min(TOP_N, len(CATALOG))))
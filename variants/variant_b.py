@@ -1,16 +1,38 @@
-import random, csv, os
+from .catalog import get_catalog
+from .item_knn import load_index
 
-ITEM_PATH = os.getenv("ITEM_PATH", "data/sample_items.csv")
+CATALOG = get_catalog()
+INDEX = load_index()
+TOP_N = 3
+CACHE_SCOPE = "user"   # 유저별로만 다르다(컨텍스트 무시)
 
-def _load_items():
-    with open(ITEM_PATH, newline='', encoding='utf-8') as f:
-        rdr = csv.DictReader(f)
-        items = [r["title"] for r in rdr]
-    return items
 
-ITEMS = _load_items()
+def version():
+    return f"{CATALOG.version}:{INDEX.version if INDEX is not None else None}"
+
+
+def reload():
+    # 다시 전처리/학습된 산출물을 읽는다(학습은 data/preprocess.py, 여기서는 적재만)
+    global CATALOG, INDEX
+    CATALOG = get_catalog()
+    INDEX = load_index()
+
 
 def serve(user_id: str, context=None):
-    # 유저ID 해시 기반 랜덤 시드 → 개인화 느낌
-    rnd = random.Random(hash(user_id) % (2**32))
-    return rnd.sample(ITEMS, k=min(3, len(ITEMS)))
+    # 오프라인 학습된 유저별 top-K(item-item 코사인)를 그대로 조회, 모르는 유저는 인기순
+    # 이웃이 카탈로그에 없어 TOP_N을 못 채우면 인기순 → 카탈로그 순서(Variant A와 같은 목록)로 채운다
+    out, seen = [], set()
+
+    def add(item_ids):
+        for item_id in item_ids:
+            i = CATALOG.index_of(item_id)
+            if i is not None and i not in seen:
+                seen.add(i)
+                out.append(i)
+                if len(out) == TOP_N:
+                    return True
+        return False
+
+    if INDEX is None or not (add(INDEX.lookup(user_id)) or add(INDEX.popular)):
+        add(CATALOG.item_ids[:2 * TOP_N].tolist())   # 이미 고른 게 TOP_N 미만이라 이만큼이면 채워진다
+    return CATALOG.items(out)